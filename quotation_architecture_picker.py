@@ -0,0 +1,147 @@
+"""Selezione dell'architettura dal catalogo nell'interfaccia grafica.
+
+Come per l'editor delle baseline, i pannelli non sono uno per
+architettura: al massimo ``VISIBLE_ARCHITECTURES`` pannelli vengono
+ricollegati alle voci visibili del risultato della ricerca, quindi il
+costo dell'interfaccia non dipende dalla dimensione del catalogo. Il
+pannello mostra solo i dati dell'indice; le voci dell'architettura vengono
+lette dal catalogo quando servono.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+# Pannelli visibili contemporaneamente, su due colonne
+VISIBLE_ARCHITECTURES = 6
+COLUMNS = 2
+
+ALL_TAGS = "Tutte"
+
+
+class ArchitecturePanel:
+    """Pannello di un'architettura, ricollegabile a voci diverse del catalogo"""
+
+    def __init__(self, parent, variable, command):
+        self.entry = None
+        self.frame = tk.Frame(parent, bg='#f8f9fa', relief='ridge', bd=2)
+
+        self.radio = tk.Radiobutton(self.frame, variable=variable, bg='#f8f9fa', font=('Arial', 10, 'bold'),
+                                    command=command, anchor='w')
+        self.radio.pack(anchor='w', padx=10, pady=5)
+
+        self.desc_label = tk.Label(self.frame, bg='#f8f9fa', font=('Arial', 9), wraplength=200, justify='left')
+        self.desc_label.pack(anchor='w', padx=10, pady=(0, 10))
+
+    def bind(self, entry):
+        """Mostra nel pannello la voce del catalogo indicata"""
+        if self.entry == entry:
+            return
+        self.entry = entry
+        self.radio.config(text=entry.name, value=entry.key)
+        details = f"{entry.item_count} voci"
+        if entry.tags:
+            details += " · " + ", ".join(entry.tags)
+        self.desc_label.config(text=f"{entry.description}\n{details}" if entry.description else details)
+
+
+class ArchitecturePicker:
+    """Ricerca per testo ed etichetta e lista scorrevole delle architetture.
+
+    Il catalogo viene letto solo con ``load``, da chiamare dopo il primo
+    disegno della finestra.
+    """
+
+    def __init__(self, parent, catalog, variable, command=None):
+        self.catalog = catalog
+        self.variable = variable
+        self.command = command
+        self.entries = []
+        self.first = 0
+        self.panels = []
+
+        self.frame = tk.Frame(parent, bg='white')
+
+        # Ricerca ed etichetta
+        search_bar = tk.Frame(self.frame, bg='white')
+        search_bar.pack(fill='x', pady=(0, 5))
+        tk.Label(search_bar, text="🔍 Cerca:", bg='white', font=('Arial', 10, 'bold')).pack(side='left')
+        self.query = tk.StringVar()
+        tk.Entry(search_bar, textvariable=self.query, width=30, font=('Arial', 10)).pack(side='left', padx=(10, 0))
+        tk.Label(search_bar, text="Etichetta:", bg='white', font=('Arial', 10, 'bold')).pack(side='left', padx=(20, 0))
+        self.tag = tk.StringVar(value=ALL_TAGS)
+        self.tag_combo = ttk.Combobox(search_bar, textvariable=self.tag, values=[ALL_TAGS], width=15,
+                                      font=('Arial', 10), state='readonly')
+        self.tag_combo.pack(side='left', padx=(10, 0))
+        self.count_label = tk.Label(search_bar, text="Caricamento catalogo...", bg='white', font=('Arial', 9))
+        self.count_label.pack(side='right')
+
+        self.selected_label = tk.Label(self.frame, text="", bg='white', font=('Arial', 9), anchor='w')
+        self.selected_label.pack(fill='x')
+
+        body = tk.Frame(self.frame, bg='white')
+        body.pack(fill='x')
+        self.grid = tk.Frame(body, bg='white')
+        self.grid.pack(side='left', fill='x', expand=True)
+        for column in range(COLUMNS):
+            self.grid.columnconfigure(column, weight=1)
+        self.scrollbar = ttk.Scrollbar(body, orient='vertical', command=self.scroll)
+
+    def load(self):
+        """Legge l'indice del catalogo e mostra le prime architetture"""
+        self.tag_combo.config(values=[ALL_TAGS] + self.catalog.tags())
+        self.query.trace_add('write', lambda *_: self.filter())
+        self.tag.trace_add('write', lambda *_: self.filter())
+        self.variable.trace_add('write', lambda *_: self.show_selected())
+        self.filter()
+        self.show_selected()
+
+    def filter(self):
+        """Applica ricerca ed etichetta e torna all'inizio della lista"""
+        tag = self.tag.get()
+        self.entries = self.catalog.search(self.query.get(), None if tag == ALL_TAGS else tag)
+        self.first = 0
+        self.refresh()
+        text = f"{len(self.entries)} di {len(self.catalog)} architetture"
+        if self.catalog.errors:
+            text += f" · ⚠️ {len(self.catalog.errors)} file non validi"
+        self.count_label.config(text=text)
+
+    def show_selected(self):
+        """Mostra l'architettura selezionata, anche se esclusa dalla ricerca"""
+        key = self.variable.get()
+        entry = next((entry for entry in self.catalog.entries() if entry.key == key), None)
+        self.selected_label.config(
+            text=f"Selezionata: {entry.name}" if entry else f"⚠️ Architettura '{key}' non presente nel catalogo"
+        )
+
+    def refresh(self):
+        """Ricollega i pannelli alle voci visibili, creando solo quelli mancanti"""
+        visible = min(len(self.entries), VISIBLE_ARCHITECTURES)
+        self.first = max(0, min(self.first, len(self.entries) - visible))
+
+        while len(self.panels) < visible:
+            slot = len(self.panels)
+            panel = ArchitecturePanel(self.grid, self.variable, self.command)
+            panel.frame.grid(row=slot // COLUMNS, column=slot % COLUMNS, padx=5, pady=5, sticky='ew')
+            self.panels.append(panel)
+        while len(self.panels) > visible:
+            self.panels.pop().frame.destroy()
+
+        for slot, panel in enumerate(self.panels):
+            panel.bind(self.entries[self.first + slot])
+
+        if len(self.entries) > visible:
+            self.scrollbar.pack(side='right', fill='y')
+            self.scrollbar.set(self.first / len(self.entries), (self.first + visible) / len(self.entries))
+        else:
+            self.scrollbar.pack_forget()
+
+    def scroll(self, action, amount, unit=None):
+        """Comando della scrollbar (``moveto`` o ``scroll``), una riga alla volta"""
+        if action == 'moveto':
+            first = round(float(amount) * len(self.entries) / COLUMNS) * COLUMNS
+        else:
+            step = len(self.panels) if unit == 'pages' else COLUMNS
+            first = self.first + int(amount) * step
+        if first != self.first:
+            self.first = first
+            self.refresh()
@@ -0,0 +1,155 @@
+"""Editor delle baseline dell'interfaccia grafica.
+
+I pannelli non vengono distrutti e ricreati a ogni modifica: l'editor
+tiene un piccolo insieme di pannelli (al massimo ``VISIBLE_PANELS``) e li
+ricollega alle baseline visibili quando si scorre la lista o cambia il
+numero di baseline. Creare widget Tk è costoso, aggiornare le variabili
+di un pannello esistente no, quindi anche con centinaia di baseline il
+costo di un aggiornamento resta quello di pochi pannelli.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+# Numero massimo di pannelli visibili contemporaneamente
+VISIBLE_PANELS = 5
+
+
+class BaselinePanel:
+    """Pannello di modifica di una baseline, ricollegabile a indici diversi"""
+
+    def __init__(self, parent, risk_levels, on_change):
+        self.on_change = on_change
+        self.index = None
+        self.baseline = None
+        self._binding = False
+
+        self.frame = tk.LabelFrame(parent, text="", bg='white', font=('Arial', 10, 'bold'))
+
+        # Grid per i campi
+        grid = tk.Frame(self.frame, bg='white')
+        grid.pack(fill='x', padx=10, pady=10)
+
+        # Nome baseline
+        tk.Label(grid, text="Nome:", bg='white', font=('Arial', 9)).grid(row=0, column=0, sticky='w')
+        self.name_var = tk.StringVar()
+        tk.Entry(grid, textvariable=self.name_var, width=20, font=('Arial', 9)).grid(row=0, column=1, padx=5)
+        self.name_var.trace_add('write', lambda *_: self._changed('name', self.name_var.get()))
+
+        # Durata in quarters
+        tk.Label(grid, text="Durata (Q):", bg='white', font=('Arial', 9)).grid(row=0, column=2, sticky='w', padx=(20, 0))
+        self.quarters_var = tk.IntVar()
+        tk.Spinbox(grid, from_=2, to=12, textvariable=self.quarters_var, width=5,
+                   font=('Arial', 9)).grid(row=0, column=3, padx=5)
+        self.quarters_var.trace_add('write', lambda *_: self._quarters_changed())
+
+        # Livello di rischio
+        tk.Label(grid, text="Rischio:", bg='white', font=('Arial', 9)).grid(row=0, column=4, sticky='w', padx=(20, 0))
+        self.risk_var = tk.StringVar()
+        ttk.Combobox(grid, textvariable=self.risk_var, values=risk_levels, width=10,
+                     font=('Arial', 9), state='readonly').grid(row=0, column=5, padx=5)
+        self.risk_var.trace_add('write', lambda *_: self._changed('risk_level', self.risk_var.get()))
+
+        # Descrizione
+        tk.Label(grid, text="Descrizione:", bg='white', font=('Arial', 9)).grid(row=1, column=0, sticky='nw', pady=(10, 0))
+        self.desc_text = tk.Text(grid, height=2, width=60, font=('Arial', 9))
+        self.desc_text.grid(row=1, column=1, columnspan=5, sticky='ew', pady=(10, 0), padx=5)
+        # Il testo viene letto solo quando serve: si passa una funzione di lettura
+        self.desc_text.bind('<KeyRelease>', lambda e: self._changed('description', self._read_description))
+
+        grid.columnconfigure(1, weight=1)
+
+    def bind(self, index, baseline):
+        """Mostra nel pannello la baseline indicata"""
+        if self.index == index and self.baseline is baseline:
+            return  # Già collegato: nessun lavoro sui widget
+
+        self._binding = True
+        try:
+            self.index = index
+            self.baseline = baseline
+            self.frame.config(text=f"Baseline {index + 1}")
+            self.name_var.set(baseline['name'])
+            self.quarters_var.set(baseline['quarters'])
+            self.risk_var.set(baseline['risk_level'])
+            self.desc_text.delete('1.0', 'end')
+            self.desc_text.insert('1.0', baseline['description'])
+        finally:
+            self._binding = False
+
+    def _read_description(self):
+        return self.desc_text.get('1.0', 'end-1c')
+
+    def _quarters_changed(self):
+        try:
+            value = self.quarters_var.get()
+        except tk.TclError:
+            return  # Campo vuoto o non numerico durante la digitazione
+        self._changed('quarters', value)
+
+    def _changed(self, field, value):
+        if not self._binding and self.index is not None:
+            self.on_change(self.index, field, value)
+
+
+class BaselineEditor:
+    """Lista scorrevole di baseline con pannelli riutilizzati.
+
+    ``on_change(indice, campo, valore)`` riceve le modifiche; per la
+    descrizione ``valore`` è una funzione che legge il testo dal pannello,
+    quindi ``before_rebind`` deve consumare le letture in sospeso prima che
+    i pannelli vengano ricollegati ad altre baseline.
+    """
+
+    def __init__(self, parent, risk_levels, on_change, before_rebind=None):
+        self.risk_levels = risk_levels
+        self.on_change = on_change
+        self.before_rebind = before_rebind
+        self.baselines = []
+        self.first = 0
+        self.panels = []
+
+        self.frame = tk.Frame(parent, bg='white')
+        self.panel_frame = tk.Frame(self.frame, bg='white')
+        self.panel_frame.pack(side='left', fill='x', expand=True)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient='vertical', command=self.scroll)
+
+    def set_baselines(self, baselines):
+        """Collega l'editor alla lista di baseline e aggiorna i pannelli"""
+        self.baselines = baselines
+        self.refresh()
+
+    def refresh(self):
+        """Allinea i pannelli visibili alla lista, creando solo quelli mancanti"""
+        if self.before_rebind is not None:
+            self.before_rebind()
+        visible = min(len(self.baselines), VISIBLE_PANELS)
+        self.first = max(0, min(self.first, len(self.baselines) - visible))
+
+        while len(self.panels) < visible:
+            panel = BaselinePanel(self.panel_frame, self.risk_levels, self.on_change)
+            panel.frame.pack(fill='x', pady=5)
+            self.panels.append(panel)
+        while len(self.panels) > visible:
+            self.panels.pop().frame.destroy()
+
+        for slot, panel in enumerate(self.panels):
+            index = self.first + slot
+            panel.bind(index, self.baselines[index])
+
+        if len(self.baselines) > visible:
+            self.scrollbar.pack(side='right', fill='y')
+            self.scrollbar.set(self.first / len(self.baselines), (self.first + visible) / len(self.baselines))
+        else:
+            self.scrollbar.pack_forget()
+
+    def scroll(self, action, amount, unit=None):
+        """Comando della scrollbar (``moveto`` o ``scroll``)"""
+        if action == 'moveto':
+            first = round(float(amount) * len(self.baselines))
+        else:
+            step = len(self.panels) if unit == 'pages' else 1
+            first = self.first + int(amount) * step
+        if first != self.first:
+            self.first = first
+            self.refresh()
+
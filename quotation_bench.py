@@ -0,0 +1,620 @@
+"""Misure di prestazioni della generazione quotazioni.
+
+Le misure di generazione girano in un processo separato, così il picco di
+memoria non è influenzato dalle misure precedenti.
+
+Esempi:
+    python quotation_bench.py write-only --items 10 100 1000 --quarters 4 36
+    python quotation_bench.py backend --items 100 1000 --quarters 12
+    python quotation_bench.py effort --items 10 1000 5000 --quarters 4 36
+    python quotation_bench.py sweep --baselines 10 100 --quarters 36
+    python quotation_bench.py facts --quotes 1000 --items 100
+    python quotation_bench.py preview --baselines 3 10 --items 10 100
+    python quotation_bench.py suite --baselines 3 10 --items 100 1000 -o risultati.json
+    python quotation_bench.py compare prima.json dopo.json --threshold 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import openpyxl
+
+import quotation_effort
+import quotation_engine
+import quotation_model
+import quotation_risk
+import quotation_sweep
+
+# Versione del formato JSON dei risultati della suite
+SUITE_FORMAT = 1
+
+
+def synthetic_architecture(item_count):
+    """Architettura fittizia con il numero di voci richiesto"""
+    return {
+        "name": f"🧪 Benchmark ({item_count} voci)",
+        "description": "Architettura sintetica per benchmark",
+        "items": [f"Voce di progetto {i + 1}" for i in range(item_count)]
+    }
+
+
+def synthetic_config(baselines, quarters, items):
+    """Configurazione e architetture sintetiche per una misura"""
+    config = quotation_engine.default_config()
+    config['project_name'] = "Benchmark"
+    config['client_name'] = "Benchmark S.p.A."
+    config['baseline_count'] = baselines
+    config['baseline_data'] = [
+        dict(quotation_engine.default_baseline(i), quarters=quarters)
+        for i in range(baselines)
+    ]
+    config['selected_architecture'] = 'benchmark'
+    architectures = {'benchmark': synthetic_architecture(items)}
+    return config, architectures
+
+
+def _peak_rss_mb():
+    """Picco di memoria residente del processo in MB (solo Unix)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux riporta KB, macOS byte
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _measure_generation(baselines, quarters, items, write_only, backend='openpyxl'):
+    """Genera una quotazione e ne misura tempo, memoria e dimensione"""
+    config, architectures = synthetic_config(baselines, quarters, items)
+    fd, filename = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        rss_before = _peak_rss_mb()
+        start = time.perf_counter()
+        wb = quotation_engine.build_workbook(config, architectures, write_only=write_only, backend=backend)
+        built = time.perf_counter()
+        quotation_engine.save_workbook(wb, filename)
+        saved = time.perf_counter()
+        rss_after = _peak_rss_mb()
+
+        # Seconda esecuzione sotto tracemalloc per il picco di heap Python
+        tracemalloc.start()
+        quotation_engine.generate_quotation(config, filename, architectures, write_only=write_only,
+                                            backend=backend)
+        _, heap_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        size = os.path.getsize(filename)
+        with zipfile.ZipFile(filename) as archive:
+            styles_size = archive.getinfo('xl/styles.xml').file_size
+    finally:
+        os.remove(filename)
+
+    return {
+        'baselines': baselines,
+        'quarters': quarters,
+        'items': items,
+        'write_only': write_only,
+        'backend': backend,
+        'seconds': saved - start,
+        'build_seconds': built - start,
+        'save_seconds': saved - built,
+        'heap_peak_mb': heap_peak / (1024 * 1024),
+        'rss_growth_mb': None if rss_before is None else rss_after - rss_before,
+        'file_size_kb': size / 1024,
+        'styles_kb': styles_size / 1024
+    }
+
+
+def measure(baselines, quarters, items, write_only=False, backend='openpyxl'):
+    """Esegue una misura in un processo dedicato"""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(_measure_generation, baselines, quarters, items, write_only, backend).result()
+
+
+def compare_write_modes(item_counts, quarters_list, baselines=3):
+    """Confronta la modalità standard con quella streaming (write-only)"""
+    results = []
+    for quarters in quarters_list:
+        for items in item_counts:
+            for write_only in (False, True):
+                results.append(measure(baselines, quarters, items, write_only))
+    return results
+
+
+def compare_backends(item_counts, quarters_list, baselines=3):
+    """Confronta openpyxl (standard e streaming) con la scrittura diretta dello SpreadsheetML"""
+    results = []
+    for quarters in quarters_list:
+        for items in item_counts:
+            results.append(measure(baselines, quarters, items))
+            results.append(measure(baselines, quarters, items, write_only=True))
+            results.append(measure(baselines, quarters, items, backend='direct'))
+    return results
+
+
+def _mode_label(result):
+    """Etichetta della modalità di scrittura di una misura"""
+    if result.get('backend', 'openpyxl') != 'openpyxl':
+        return result['backend']
+    return 'streaming' if result['write_only'] else 'standard'
+
+
+def format_results(results):
+    """Formatta i risultati come tabella di testo"""
+    lines = [f"{'Q':>3} {'Voci':>6} {'Modalità':<10} {'Tempo (s)':>10} {'Save (s)':>9} {'Heap (MB)':>10} "
+             f"{'RSS +MB':>8} {'File (KB)':>10} {'Stili (KB)':>10}"]
+    for r in results:
+        rss = '-' if r['rss_growth_mb'] is None else f"{r['rss_growth_mb']:.1f}"
+        lines.append(
+            f"{r['quarters']:>3} {r['items']:>6} {_mode_label(r):<10} "
+            f"{r['seconds']:>10.3f} {r['save_seconds']:>9.3f} {r['heap_peak_mb']:>10.1f} {rss:>8} "
+            f"{r['file_size_kb']:>10.1f} {r['styles_kb']:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def _best_time(func, repeat=5):
+    """Miglior tempo su più ripetizioni, in secondi"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def synthetic_rate_card(item_count, role_count):
+    """Ripartizione sintetica: ogni voce divisa 60/25/15 su tre ruoli diversi"""
+    roles = tuple(f"Ruolo {r + 1}" for r in range(role_count))
+    rates = tuple(float(400 + (r * 37) % 800) for r in range(role_count))
+    allocation = []
+    for i in range(item_count):
+        shares = [0] * role_count
+        for offset, share in zip((0, 7, 13), (60, 25, 15)):
+            shares[(i + offset) % role_count] += share
+        allocation.append(tuple(shares))
+    item_rates = tuple(sum(share * rate for share, rate in zip(shares, rates)) / 100 for shares in allocation)
+    return quotation_effort.RateCard(roles, rates, tuple(allocation), item_rates)
+
+
+def compare_effort_engines(item_counts, quarters_list, baselines=5, roles=0):
+    """Confronta il calcolo dell'effort NumPy con quello in puro Python.
+
+    Con ``roles`` > 0 viene calcolato anche l'effort per ruolo su una
+    ripartizione sintetica con quel numero di ruoli.
+    """
+    results = []
+    indices = list(range(baselines))
+    for quarters in quarters_list:
+        for items in item_counts:
+            quarters_per_baseline = [quarters] * baselines
+            rate_card = synthetic_rate_card(items, roles) if roles else None
+            result = {
+                'baselines': baselines,
+                'quarters': quarters,
+                'items': items,
+                'roles': roles,
+                'python_seconds': _best_time(lambda: quotation_effort.compute_effort_batch(
+                    indices, quarters_per_baseline, items, use_numpy=False, rate_card=rate_card)),
+                'numpy_seconds': None,
+                'tensor_seconds': None
+            }
+            if quotation_effort.HAVE_NUMPY:
+                result['numpy_seconds'] = _best_time(lambda: quotation_effort.compute_effort_batch(
+                    indices, quarters_per_baseline, items, use_numpy=True, rate_card=rate_card))
+                result['tensor_seconds'] = _best_time(lambda: quotation_effort.effort_tensor(
+                    indices, quarters_per_baseline, items))
+            results.append(result)
+    return results
+
+
+def format_effort_results(results):
+    """Formatta il confronto dei motori di calcolo effort"""
+    def ms(value):
+        return '-' if value is None else f"{value * 1000:.3f}"
+
+    lines = [f"{'Q':>3} {'Voci':>6} {'Python (ms)':>12} {'NumPy (ms)':>11} {'Tensore (ms)':>13} {'Speedup':>8}"]
+    for r in results:
+        speedup = '-' if r['tensor_seconds'] is None else f"{r['python_seconds'] / r['tensor_seconds']:.0f}x"
+        lines.append(
+            f"{r['quarters']:>3} {r['items']:>6} {ms(r['python_seconds']):>12} {ms(r['numpy_seconds']):>11} "
+            f"{ms(r['tensor_seconds']):>13} {speedup:>8}"
+        )
+    return "\n".join(lines)
+
+
+def measure_sweep(baselines, quarters, items, use_numpy=None):
+    """Tempo della griglia di scenari di default su durate da 1 a ``quarters``"""
+    config, architectures = synthetic_config(baselines, quarters, items)
+    arch_data = architectures['benchmark']
+    spec = quotation_sweep.SweepSpec(quarters=tuple(range(1, quarters + 1)), budget=1e6)
+    model = quotation_model.compute_quote_model(config, arch_data)
+    start = time.perf_counter()
+    result = quotation_sweep.sweep_quote(config, arch_data, spec, model, use_numpy)
+    return {
+        'baselines': baselines,
+        'quarters': quarters,
+        'items': items,
+        'combinations': result.sweep.combinations,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def measure_risk_simulation(baselines, trials, items, use_numpy=None):
+    """Misura la simulazione Monte Carlo su una quotazione sintetica"""
+    config, architectures = synthetic_config(baselines, 4, items)
+    config = quotation_engine.normalize_config(config)
+    model = quotation_model.compute_quote_model(config, architectures['benchmark'])
+    return {
+        'baselines': baselines,
+        'trials': trials,
+        'items': items,
+        'numpy': quotation_effort.HAVE_NUMPY if use_numpy is None else use_numpy,
+        'seconds': _best_time(lambda: quotation_risk.simulate_quote_risk(model, trials, use_numpy=use_numpy),
+                              repeat=3)
+    }
+
+
+def measure_facts(quotes, baselines, quarters, items, directory):
+    """Scrittura e rilettura della tabella di effort e costi nei formati disponibili.
+
+    Per confronto misura anche la lettura degli stessi numeri dai file xlsx
+    (openpyxl in sola lettura, tutti i fogli).
+    """
+    import quotation_facts
+
+    config, architectures = synthetic_config(baselines, quarters, items)
+    configs = [(f"Q{i + 1:05d}", dict(config, project_name=f"Benchmark {i + 1}")) for i in range(quotes)]
+    formats = ['csv'] + (['npz'] if quotation_facts.np is not None else []) + \
+              (['parquet'] if quotation_facts.HAVE_PARQUET else [])
+    results = []
+    for extension in formats:
+        path = os.path.join(directory, f"facts.{extension}")
+        result = quotation_facts.export_facts(configs, path, architectures)
+        start = time.perf_counter()
+        columns = quotation_facts.read_facts(path)
+        results.append({'format': extension, 'rows': len(columns['cost']), 'bytes': os.path.getsize(path),
+                        'write_seconds': result.seconds, 'read_seconds': time.perf_counter() - start})
+
+    # Un solo file xlsx: tutte le quotazioni sintetiche hanno gli stessi fogli
+    path = os.path.join(directory, "quotazione.xlsx")
+    wb = quotation_engine.build_workbook(config, architectures, write_only=True)
+    quotation_engine.save_workbook(wb, path)
+    start = time.perf_counter()
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    cells = sum(1 for ws in wb.worksheets for row in ws.iter_rows(values_only=True) for _ in row)
+    wb.close()
+    seconds = (time.perf_counter() - start) * quotes
+    results.append({'format': 'xlsx', 'rows': cells * quotes, 'bytes': os.path.getsize(path) * quotes,
+                    'write_seconds': None, 'read_seconds': seconds})
+    return results
+
+
+def format_facts_results(results):
+    """Tabella dei risultati di ``measure_facts``"""
+    lines = [f"{'Formato':<8} {'Righe':>10} {'MB':>8} {'Scrittura (s)':>14} {'Lettura (s)':>12}"]
+    for r in results:
+        write = f"{r['write_seconds']:>14.2f}" if r['write_seconds'] is not None else f"{'-':>14}"
+        lines.append(f"{r['format']:<8} {r['rows']:>10} {r['bytes'] / 1024 / 1024:>8.1f} {write} "
+                     f"{r['read_seconds']:>12.3f}")
+    lines.append("(xlsx: celle lette da tutti i fogli, stimate da un file moltiplicato per le quotazioni)")
+    return "\n".join(lines)
+
+
+def measure_preview(baselines, quarters, items, risk_trials=quotation_risk.DEFAULT_TRIALS):
+    """Anteprima HTML e file Excel completo della stessa quotazione sintetica"""
+    import io
+    import quotation_html
+
+    config, architectures = synthetic_config(baselines, quarters, items)
+
+    def workbook():
+        wb = quotation_engine.build_workbook(config, architectures, risk_trials=risk_trials)
+        quotation_engine.save_workbook(wb, io.BytesIO())
+
+    return {
+        'baselines': baselines,
+        'quarters': quarters,
+        'items': items,
+        'html_seconds': _best_time(lambda: quotation_html.render_html(config, architectures, risk_trials),
+                                   repeat=3),
+        'xlsx_seconds': _best_time(workbook, repeat=3)
+    }
+
+
+def _architecture_cases(architecture_keys, item_counts):
+    """Architetture da misurare: quelle predefinite richieste più quelle sintetiche"""
+    cases = [(key, quotation_engine.ARCHITECTURES[key]) for key in architecture_keys]
+    cases += [(f"sintetica-{items}", synthetic_architecture(items)) for items in item_counts]
+    return cases
+
+
+def _run_stages(config, architectures, write_only, filename, trace):
+    """Genera una quotazione misurando ogni fase tramite il ``ProgressReporter``"""
+    baseline_steps = {f"Foglio {baseline['name']}" for baseline in config['baseline_data']}
+    stages = {}
+    current = ["Preparazione", time.perf_counter()]
+
+    def progress(done, total, message):
+        now = time.perf_counter()
+        name, started = current
+        stage = stages.setdefault(name, {'name': name, 'seconds': 0.0, 'heap_peak_mb': 0.0})
+        stage['seconds'] += now - started
+        if trace:
+            peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            stage['heap_peak_mb'] = max(stage['heap_peak_mb'], peak)
+            tracemalloc.reset_peak()
+        # I fogli delle singole baseline sono raggruppati in un'unica fase
+        current[:] = ["Fogli baseline" if message in baseline_steps else message, time.perf_counter()]
+
+    start = time.perf_counter()
+    quotation_engine.generate_quotation(config, filename, architectures, write_only=write_only, progress=progress)
+    return time.perf_counter() - start, list(stages.values())
+
+
+def _measure_suite_case(baselines, quarters, arch_key, arch_data, write_only, repeat):
+    """Misura un caso della suite: tempi per fase (mediana) e memoria per fase"""
+    config, _ = synthetic_config(baselines, quarters, 0)
+    config['selected_architecture'] = arch_key
+    architectures = {arch_key: arch_data}
+    fd, filename = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        runs = []
+        for _ in range(repeat):
+            quotation_model._cached_model.cache_clear()
+            runs.append(_run_stages(config, architectures, write_only, filename, trace=False))
+
+        # Esecuzione separata sotto tracemalloc, che rallenta e falserebbe i tempi
+        quotation_model._cached_model.cache_clear()
+        tracemalloc.start()
+        _, traced_stages = _run_stages(config, architectures, write_only, filename, trace=True)
+        tracemalloc.stop()
+
+        size = os.path.getsize(filename)
+    finally:
+        os.remove(filename)
+
+    stages = []
+    for i, traced in enumerate(traced_stages):
+        stages.append({
+            'name': traced['name'],
+            'seconds': statistics.median(run[1][i]['seconds'] for run in runs),
+            'heap_peak_mb': traced['heap_peak_mb']
+        })
+
+    return {
+        'case': f"{arch_key}/b{baselines}/q{quarters}/{'streaming' if write_only else 'standard'}",
+        'architecture': arch_key,
+        'items': len(arch_data['items']),
+        'baselines': baselines,
+        'quarters': quarters,
+        'write_only': write_only,
+        'seconds': statistics.median(run[0] for run in runs),
+        'heap_peak_mb': max(stage['heap_peak_mb'] for stage in stages),
+        'file_size_kb': size / 1024,
+        'stages': stages
+    }
+
+
+def _environment():
+    """Versioni e piattaforma, per confrontare risultati di macchine diverse"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'openpyxl': openpyxl.__version__,
+        'numpy': quotation_effort.np.__version__ if quotation_effort.HAVE_NUMPY else None,
+        'commit': commit
+    }
+
+
+def run_suite(baseline_counts, quarters_list, architecture_keys, item_counts, write_modes=(False,), repeat=3):
+    """Esegue la suite completa; ogni caso gira in un processo dedicato"""
+    results = []
+    for arch_key, arch_data in _architecture_cases(architecture_keys, item_counts):
+        for baselines in baseline_counts:
+            for quarters in quarters_list:
+                for write_only in write_modes:
+                    with ProcessPoolExecutor(max_workers=1) as executor:
+                        results.append(executor.submit(
+                            _measure_suite_case, baselines, quarters, arch_key, arch_data, write_only, repeat
+                        ).result())
+    return {
+        'format': SUITE_FORMAT,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': _environment(),
+        'repeat': repeat,
+        'results': results
+    }
+
+
+def format_suite_results(suite):
+    """Formatta i risultati della suite, una riga per fase"""
+    lines = [f"{'Caso':<36} {'Fase':<38} {'Tempo (s)':>10} {'Heap (MB)':>10}"]
+    for result in suite['results']:
+        for stage in result['stages']:
+            lines.append(f"{result['case']:<36} {stage['name']:<38} {stage['seconds']:>10.3f} "
+                         f"{stage['heap_peak_mb']:>10.1f}")
+        lines.append(f"{result['case']:<36} {'TOTALE (' + format(result['file_size_kb'], '.0f') + ' KB)':<38} "
+                     f"{result['seconds']:>10.3f} {result['heap_peak_mb']:>10.1f}")
+    return "\n".join(lines)
+
+
+def compare_suites(baseline_suite, current_suite, threshold=0.10, min_seconds=0.005):
+    """Confronta due esecuzioni della suite e restituisce le righe del confronto.
+
+    Una fase è una regressione se è più lenta di ``threshold`` (frazione) e
+    la differenza supera ``min_seconds``, per ignorare il rumore delle fasi
+    brevissime.
+    """
+    previous = {
+        (result['case'], stage['name']): stage['seconds']
+        for result in baseline_suite['results'] for stage in result['stages']
+    }
+    previous.update({(result['case'], 'TOTALE'): result['seconds'] for result in baseline_suite['results']})
+
+    rows = []
+    for result in current_suite['results']:
+        stages = [(stage['name'], stage['seconds']) for stage in result['stages']] + [('TOTALE', result['seconds'])]
+        for name, seconds in stages:
+            before = previous.get((result['case'], name))
+            if before is None:
+                continue
+            change = (seconds - before) / before if before > 0 else 0.0
+            regression = change > threshold and seconds - before > min_seconds
+            rows.append({'case': result['case'], 'stage': name, 'before': before, 'after': seconds,
+                         'change': change, 'regression': regression})
+    return rows
+
+
+def format_comparison(rows):
+    """Formatta il confronto tra due esecuzioni della suite"""
+    lines = [f"{'Caso':<36} {'Fase':<38} {'Prima (s)':>10} {'Dopo (s)':>10} {'Var.':>8}"]
+    for row in rows:
+        flag = "  ⚠️" if row['regression'] else ""
+        lines.append(f"{row['case']:<36} {row['stage']:<38} {row['before']:>10.3f} {row['after']:>10.3f} "
+                     f"{row['change'] * 100:>+7.1f}%{flag}")
+    return "\n".join(lines)
+
+
+def build_parser():
+    """Crea il parser degli argomenti"""
+    parser = argparse.ArgumentParser(prog="quotation_bench", description="Benchmark generazione quotazioni")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    write_only = subparsers.add_parser('write-only', help="Confronta modalità standard e streaming")
+    write_only.add_argument('--items', type=int, nargs='+', default=[10, 100, 500, 2000])
+    write_only.add_argument('--quarters', type=int, nargs='+', default=[4, 36])
+    write_only.add_argument('--baselines', type=int, default=3)
+
+    backend = subparsers.add_parser('backend', help="Confronta openpyxl con la scrittura diretta dei fogli")
+    backend.add_argument('--items', type=int, nargs='+', default=[10, 100, 1000])
+    backend.add_argument('--quarters', type=int, nargs='+', default=[12])
+    backend.add_argument('--baselines', type=int, default=3)
+
+    effort = subparsers.add_parser('effort', help="Confronta il calcolo effort NumPy e puro Python")
+    effort.add_argument('--items', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    effort.add_argument('--quarters', type=int, nargs='+', default=[4, 12, 36])
+    effort.add_argument('--baselines', type=int, default=5)
+    effort.add_argument('--roles', type=int, default=0,
+                        help="calcola anche l'effort per ruolo su una ripartizione sintetica con N ruoli")
+
+    risk = subparsers.add_parser('risk', help="Misura la simulazione Monte Carlo del rischio")
+    risk.add_argument('--baselines', type=int, default=5)
+    risk.add_argument('--trials', type=int, nargs='+', default=[10000, 50000, 100000])
+    risk.add_argument('--items', type=int, nargs='+', default=[10, 100])
+
+    sweep = subparsers.add_parser('sweep', help="Misura la griglia di scenari del foglio Sensibilità")
+    sweep.add_argument('--baselines', type=int, nargs='+', default=[3, 10, 100])
+    sweep.add_argument('--quarters', type=int, nargs='+', default=[12, 36])
+    sweep.add_argument('--items', type=int, default=100)
+    sweep.add_argument('--python', action='store_true', help="usa l'implementazione in puro Python")
+
+    preview = subparsers.add_parser('preview', help="Confronta l'anteprima HTML con il file Excel completo")
+    preview.add_argument('--baselines', type=int, nargs='+', default=[3, 10])
+    preview.add_argument('--quarters', type=int, default=12)
+    preview.add_argument('--items', type=int, nargs='+', default=[10, 100])
+    preview.add_argument('--trials', type=int, default=quotation_risk.DEFAULT_TRIALS,
+                         help="prove Monte Carlo (0 per escludere la simulazione)")
+
+    facts = subparsers.add_parser('facts', help="Scrittura e lettura della tabella di effort e costi")
+    facts.add_argument('--quotes', type=int, default=100)
+    facts.add_argument('--baselines', type=int, default=4)
+    facts.add_argument('--quarters', type=int, default=12)
+    facts.add_argument('--items', type=int, default=100)
+
+    suite = subparsers.add_parser('suite', help="Misura ogni fase della generazione e salva i risultati in JSON")
+    suite.add_argument('--baselines', type=int, nargs='+', default=[3, 10])
+    suite.add_argument('--quarters', type=int, nargs='+', default=[4, 12])
+    suite.add_argument('--architectures', nargs='+', default=['enterprise'],
+                       choices=sorted(quotation_engine.ARCHITECTURES))
+    suite.add_argument('--items', type=int, nargs='*', default=[100], help="voci delle architetture sintetiche")
+    suite.add_argument('--streaming', action='store_true', help="misura anche la modalità streaming")
+    suite.add_argument('--repeat', type=int, default=3)
+    suite.add_argument('-o', '--output', help="file JSON in cui salvare i risultati")
+
+    compare = subparsers.add_parser('compare', help="Confronta due file JSON della suite")
+    compare.add_argument('before')
+    compare.add_argument('after')
+    compare.add_argument('--threshold', type=float, default=10.0, help="soglia di regressione in %%")
+
+    return parser
+
+
+def main(argv=None):
+    """Punto di ingresso dei benchmark"""
+    args = build_parser().parse_args(argv)
+
+    if args.command == 'write-only':
+        print(format_results(compare_write_modes(args.items, args.quarters, args.baselines)))
+    elif args.command == 'backend':
+        print(format_results(compare_backends(args.items, args.quarters, args.baselines)))
+    elif args.command == 'effort':
+        print(format_effort_results(compare_effort_engines(args.items, args.quarters, args.baselines, args.roles)))
+    elif args.command == 'risk':
+        print(f"{'Baseline':>8} {'Prove':>8} {'Voci':>6} {'Tempo (s)':>10}")
+        for items in args.items:
+            for trials in args.trials:
+                r = measure_risk_simulation(args.baselines, trials, items)
+                print(f"{r['baselines']:>8} {r['trials']:>8} {r['items']:>6} {r['seconds']:>10.3f}")
+    elif args.command == 'sweep':
+        print(f"{'Baseline':>8} {'Q':>3} {'Voci':>6} {'Combinazioni':>13} {'Tempo (s)':>10}")
+        for quarters in args.quarters:
+            for baselines in args.baselines:
+                r = measure_sweep(baselines, quarters, args.items, use_numpy=False if args.python else None)
+                print(f"{r['baselines']:>8} {r['quarters']:>3} {r['items']:>6} {r['combinations']:>13} "
+                      f"{r['seconds']:>10.3f}")
+    elif args.command == 'preview':
+        print(f"{'Baseline':>8} {'Voci':>6} {'HTML (ms)':>10} {'Excel (ms)':>11}")
+        for items in args.items:
+            for baselines in args.baselines:
+                r = measure_preview(baselines, args.quarters, items, args.trials)
+                print(f"{r['baselines']:>8} {r['items']:>6} {r['html_seconds'] * 1000:>10.1f} "
+                      f"{r['xlsx_seconds'] * 1000:>11.1f}")
+    elif args.command == 'facts':
+        with tempfile.TemporaryDirectory() as directory:
+            print(format_facts_results(measure_facts(args.quotes, args.baselines, args.quarters, args.items,
+                                                     directory)))
+    elif args.command == 'suite':
+        write_modes = (False, True) if args.streaming else (False,)
+        suite = run_suite(args.baselines, args.quarters, args.architectures, args.items, write_modes, args.repeat)
+        print(format_suite_results(suite))
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(suite, f, indent=2, ensure_ascii=False)
+            print(f"\nRisultati salvati in {args.output}")
+    elif args.command == 'compare':
+        with open(args.before, encoding='utf-8') as f:
+            before = json.load(f)
+        with open(args.after, encoding='utf-8') as f:
+            after = json.load(f)
+        rows = compare_suites(before, after, threshold=args.threshold / 100)
+        print(format_comparison(rows))
+        if any(row['regression'] for row in rows):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
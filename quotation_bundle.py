@@ -0,0 +1,168 @@
+"""Esportazione di molte quotazioni in un unico archivio ZIP.
+
+I file Excel vengono generati in memoria da un pool di processi e scritti
+uno alla volta nell'archivio, senza file intermedi su disco. Il numero di
+quotazioni in corso o in attesa di essere scritte è limitato a
+``window`` (default: il doppio dei processi), quindi la memoria dipende
+dai processi e non dal numero di quotazioni.
+
+L'archivio contiene anche ``manifest.csv`` con una riga per quotazione:
+file, origine, progetto, cliente, architettura, totali calcolati ed
+eventuale errore (le quotazioni non generabili non bloccano le altre).
+"""
+import csv
+import io
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import NamedTuple, Tuple
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+from quotation_config import default_filename, load_config, normalize_config
+
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_COLUMNS = ('file', 'origine', 'progetto', 'cliente', 'architettura', 'baseline',
+                    'effort_gg', 'costo_eur', 'prezzo_min_eur', 'prezzo_max_eur', 'errore')
+
+
+class BundleResult(NamedTuple):
+    """Esito di ``export_bundle``"""
+    written: int
+    errors: Tuple[Tuple[str, str], ...]  # (origine, messaggio)
+    archive_bytes: int
+    seconds: float
+
+
+def render_entry(config, write_only=False, formulas=False, quote_date=None, backend='openpyxl'):
+    """Genera una quotazione in memoria (nel processo di lavoro).
+
+    ``config`` è la configurazione o il percorso del file JSON. Restituisce
+    configurazione normalizzata, contenuto del file xlsx e totali
+    ``(effort, costo, prezzo minimo, prezzo massimo)``.
+    """
+    import quotation_engine
+    from quotation_library import quote_totals
+
+    if isinstance(config, str):
+        config = load_config(config)
+    config = normalize_config(config)
+    wb = quotation_engine.build_workbook(config, write_only=write_only, quote_date=quote_date, formulas=formulas,
+                                         backend=backend)
+    buffer = io.BytesIO()
+    quotation_engine.save_workbook(wb, buffer)
+    return config, buffer.getvalue(), quote_totals(config)
+
+
+def _archive_name(config, used):
+    """Nome del file nell'archivio, reso unico con un suffisso numerico"""
+    stem, extension = os.path.splitext(default_filename(config).replace('/', '_').replace('\\', '_'))
+    name = stem + extension
+    counter = 2
+    while name.lower() in used:
+        name = f"{stem}_{counter}{extension}"
+        counter += 1
+    used.add(name.lower())
+    return name
+
+
+def _zip_info(name):
+    info = ZipInfo(name, time.localtime()[:6])
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def _manifest(rows):
+    text = io.StringIO()
+    writer = csv.writer(text, lineterminator='\n')
+    writer.writerow(MANIFEST_COLUMNS)
+    writer.writerows(rows)
+    return text.getvalue().encode('utf-8-sig')  # BOM: Excel riconosce le lettere accentate
+
+
+def export_bundle(configs, output, workers=None, window=None, total=None, progress=None, cancel_event=None,
+                  write_only=False, formulas=False, quote_date=None, backend='openpyxl'):
+    """Genera le configurazioni e le scrive nell'archivio ZIP ``output``.
+
+    ``configs`` è un iterabile di coppie ``(origine, configurazione)``, dove
+    la configurazione può essere anche il percorso di un file JSON e
+    l'origine compare nel manifest e negli errori; viene letto man mano che
+    si liberano posti nella finestra. ``output`` è un percorso (scritto in
+    un file temporaneo e rinominato alla fine) o un file binario aperto.
+
+    ``progress`` e ``cancel_event`` funzionano come in
+    ``generate_quotation``, con una fase per quotazione (``total`` è il
+    numero previsto, se noto).
+    """
+    from quotation_engine import ProgressReporter
+
+    start = time.perf_counter()
+    reporter = ProgressReporter(progress, cancel_event)
+    reporter.expect(total or 0)
+    workers = workers or os.cpu_count() or 1
+    window = window or 2 * workers
+    options = {'write_only': write_only, 'formulas': formulas, 'quote_date': quote_date, 'backend': backend}
+
+    target = output
+    if isinstance(output, (str, os.PathLike)):
+        target = f"{output}.{os.getpid()}.tmp"
+
+    rows = {}  # posizione -> riga del manifest
+    errors = []
+    used_names = set()
+    written = 0
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        with ZipFile(target, 'w', ZIP_STORED, allowZip64=True) as archive:
+            pending = {}  # future -> (posizione, origine)
+            sources = iter(enumerate(configs))
+            exhausted = False
+            while pending or not exhausted:
+                # Riempie la finestra, poi attende la prima quotazione pronta
+                while not exhausted and len(pending) < window:
+                    item = next(sources, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    position, (source, config) = item
+                    pending[executor.submit(render_entry, config, **options)] = (position, str(source))
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position, source = pending.pop(future)
+                    try:
+                        config, content, (effort, cost, min_price, max_price) = future.result()
+                    except Exception as e:
+                        errors.append((source, str(e)))
+                        rows[position] = ('', source) + ('',) * 8 + (str(e),)
+                        reporter.step(f"❌ {source}")
+                        continue
+                    name = _archive_name(config, used_names)
+                    archive.writestr(_zip_info(name), content)
+                    del content
+                    written += 1
+                    rows[position] = (name, source, config['project_name'], config['client_name'],
+                                      config['selected_architecture'], config['baseline_count'],
+                                      effort, cost, min_price, max_price, '')
+                    reporter.step(name)
+
+            archive.writestr(_zip_info(MANIFEST_NAME), _manifest(rows[position] for position in sorted(rows)),
+                             compress_type=ZIP_DEFLATED)
+    except BaseException:
+        if target is not output:
+            try:
+                os.remove(target)
+            except OSError:
+                pass
+        raise
+    finally:
+        # In caso di annullamento le quotazioni non ancora avviate vengono scartate
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if target is not output:
+        os.replace(target, output)
+        archive_bytes = os.path.getsize(output)
+    else:
+        archive_bytes = output.tell() if output.seekable() else 0
+    reporter.finish()
+    return BundleResult(written, tuple(errors), archive_bytes, time.perf_counter() - start)
@@ -0,0 +1,130 @@
+"""Cache su disco dei file Excel generati, indirizzata per contenuto.
+
+La chiave è l'hash SHA-256 di tutto ciò che determina il contenuto del
+file: configurazione normalizzata, architettura selezionata, data della
+quotazione, opzioni di generazione e impronta del generatore (versione,
+sorgenti dei moduli di rendering, versione di openpyxl, presenza di NumPy).
+Se nulla è cambiato il file viene copiato dalla cache invece di essere
+rigenerato.
+
+La cartella ha una dimensione massima: oltre il limite vengono eliminati
+i file usati meno di recente (l'uso aggiorna la data di modifica).
+"""
+import functools
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import tempfile
+
+from quotation_catalog import default_catalog
+from quotation_config import normalize_config
+
+GENERATOR_VERSION = "2.1"
+
+# Moduli che determinano il contenuto del file generato
+RENDER_MODULES = (
+    'quotation_config', 'quotation_engine', 'quotation_styles',
+    'quotation_model', 'quotation_effort', 'quotation_risk', 'quotation_formulas', 'quotation_sweep',
+    'quotation_xlsx'
+)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def generator_fingerprint():
+    """Impronta del generatore: cambia a ogni modifica del codice di rendering"""
+    import openpyxl
+    from quotation_effort import HAVE_NUMPY
+
+    digest = hashlib.sha256()
+    digest.update(f"{GENERATOR_VERSION}|{openpyxl.__version__}|{HAVE_NUMPY}".encode())
+    for name in RENDER_MODULES:
+        module = importlib.import_module(name)
+        try:
+            with open(module.__file__, 'rb') as f:
+                digest.update(f.read())
+        except (OSError, TypeError):
+            pass  # Eseguibile compilato senza sorgenti: vale la sola versione
+    return digest.hexdigest()
+
+
+def content_hash(payload):
+    """SHA-256 della serializzazione JSON canonica di ``payload``"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def cache_key(config, architectures=None, quote_date=None, **options):
+    """Hash canonico degli input di una generazione"""
+    architectures = architectures or default_catalog()
+    config = normalize_config(config)
+    return content_hash({
+        'config': config,
+        'architecture': architectures.get(config['selected_architecture']),
+        'quote_date': quote_date.isoformat() if quote_date else None,
+        'options': options,
+        'generator': generator_fingerprint()
+    })
+
+
+class OutputCache:
+    """Cartella di file Excel indicizzati per chiave, con limite di dimensione LRU"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.xlsx")
+
+    def get(self, key, destination):
+        """Copia il file in cache in ``destination``; ``False`` se assente"""
+        path = self.path(key)
+        try:
+            shutil.copyfile(path, destination)
+            os.utime(path)  # Segna l'uso per l'ordine LRU
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key, source):
+        """Aggiunge alla cache una copia del file generato"""
+        # Copia su file temporaneo e rinomina: altri processi non vedono mai file parziali
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        os.close(fd)
+        try:
+            shutil.copyfile(source, temp_path)
+            os.replace(temp_path, self.path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Elimina i file usati meno di recente finché la cartella supera il limite"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.xlsx'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Eliminato da un altro processo
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
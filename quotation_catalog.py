@@ -0,0 +1,261 @@
+"""Catalogo delle architetture: predefinite più file JSON in una cartella.
+
+Ogni file ``<chiave>.json`` della cartella descrive un'architettura con lo
+stesso formato di ``quotation_config.ARCHITECTURES`` (``name``,
+``description``, ``items``, eventuali ``tags`` e ``allocations``); un file
+con la chiave di un'architettura predefinita la sostituisce.
+
+Il catalogo si comporta come un dizionario di sola lettura, quindi può
+essere passato ovunque il motore accetta ``architectures``. Per non
+rallentare l'avvio con cataloghi grandi:
+
+- la cartella viene letta solo al primo uso;
+- nome, descrizione ed etichette di ogni file sono salvati nell'indice
+  ``.indice_catalogo.json`` insieme a data di modifica e dimensione, per
+  cui all'avvio successivo vengono rilette solo le voci dei file cambiati;
+- le voci complete vengono lette alla prima richiesta dell'architettura e
+  rilette solo se il file è stato modificato.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from typing import NamedTuple, Tuple
+
+from quotation_config import ARCHITECTURES
+
+# Cartella del catalogo: variabile d'ambiente o "architetture" accanto al programma
+# (nell'eseguibile compilato accanto al .exe)
+CATALOG_ENV = "QG_CATALOGO"
+DEFAULT_CATALOG_DIR = os.path.join(
+    os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__)),
+    "architetture"
+)
+
+INDEX_FILE = ".indice_catalogo.json"
+INDEX_FORMAT = 1
+
+# Intervallo minimo tra due letture della cartella durante le ricerche
+RESCAN_SECONDS = 5.0
+
+
+class CatalogEntry(NamedTuple):
+    """Voce dell'indice: i dati necessari per cercare e mostrare un'architettura"""
+    key: str
+    name: str
+    description: str
+    tags: Tuple[str, ...]
+    item_count: int
+    path: str = ''  # vuoto per le architetture predefinite
+
+    @property
+    def search_text(self):
+        return " ".join((self.key, self.name, self.description) + self.tags).lower()
+
+
+def validate_architecture(data, source):
+    """Verifica il formato di un'architettura, solleva ValueError altrimenti"""
+    if not isinstance(data, dict):
+        raise ValueError(f"{source}: l'architettura deve essere un oggetto JSON")
+    if not isinstance(data.get('name'), str) or not data['name'].strip():
+        raise ValueError(f"{source}: nome mancante")
+    items = data.get('items')
+    if not isinstance(items, list) or not items or not all(isinstance(item, str) for item in items):
+        raise ValueError(f"{source}: 'items' deve essere una lista non vuota di voci")
+    tags = data.get('tags', [])
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError(f"{source}: 'tags' deve essere una lista di etichette")
+    if not isinstance(data.get('allocations', {}), dict):
+        raise ValueError(f"{source}: 'allocations' deve essere un oggetto")
+
+
+def _entry(key, data, path=''):
+    return CatalogEntry(
+        key=key,
+        name=data['name'],
+        description=data.get('description', ''),
+        tags=tuple(data.get('tags', ())),
+        item_count=len(data['items']),
+        path=path
+    )
+
+
+def _read_architecture(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{os.path.basename(path)}: JSON non valido ({e})") from None
+    validate_architecture(data, os.path.basename(path))
+    data.setdefault('description', '')
+    return data
+
+
+class ArchitectureCatalog(Mapping):
+    """Architetture predefinite e file della cartella ``directory``.
+
+    ``errors`` contiene i messaggi dei file scartati all'ultima lettura
+    della cartella (JSON non valido o formato errato).
+    """
+
+    def __init__(self, directory=None, builtins=None):
+        self.directory = directory
+        self.builtins = ARCHITECTURES if builtins is None else builtins
+        self.errors = []
+        self._lock = threading.RLock()
+        self._entries = None  # chiave -> CatalogEntry, dopo la prima lettura
+        self._files = {}  # nome file -> ((mtime_ns, dimensione), CatalogEntry)
+        self._loaded = {}  # chiave -> ((mtime_ns, dimensione), architettura)
+        self._scanned_at = 0.0
+
+    # --- Indice -------------------------------------------------------
+
+    def _index_path(self):
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _read_index(self):
+        """File già analizzati: ``{nome file: ((mtime_ns, dimensione), CatalogEntry)}``"""
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('format') != INDEX_FORMAT:
+                return {}
+            return {
+                name: (tuple(record['stat']), CatalogEntry(
+                    key=name[:-5], name=record['name'], description=record['description'],
+                    tags=tuple(record['tags']), item_count=record['item_count'],
+                    path=os.path.join(self.directory, name)
+                ))
+                for name, record in index['files'].items()
+            }
+        except (OSError, ValueError, AttributeError, KeyError, TypeError):
+            return {}  # Indice assente o illeggibile: si rileggono i file
+
+    def _write_index(self, files):
+        # Scrittura atomica; su cartelle di sola lettura l'indice resta in memoria
+        records = {
+            name: {'stat': list(signature), 'name': entry.name, 'description': entry.description,
+                   'tags': list(entry.tags), 'item_count': entry.item_count}
+            for name, (signature, entry) in files.items()
+        }
+        temp_path = self._index_path() + f".{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'format': INDEX_FORMAT, 'files': records}, f, ensure_ascii=False)
+            os.replace(temp_path, self._index_path())
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def refresh(self):
+        """Rilegge la cartella: vengono analizzati solo i file nuovi o modificati"""
+        with self._lock:
+            known = self._read_index() if self._entries is None else self._files
+            files = {}
+            errors = []
+            if self.directory and os.path.isdir(self.directory):
+                for item in sorted(os.scandir(self.directory), key=lambda item: item.name):
+                    if not item.name.lower().endswith('.json') or item.name.startswith('.'):
+                        continue
+                    try:
+                        stat = item.stat()
+                    except FileNotFoundError:
+                        continue  # Eliminato durante la lettura
+                    signature = (stat.st_mtime_ns, stat.st_size)
+                    previous = known.get(item.name)
+                    if previous is not None and previous[0] == signature:
+                        files[item.name] = previous
+                        continue
+                    try:
+                        data = _read_architecture(item.path)
+                    except (OSError, ValueError) as e:
+                        errors.append(str(e))
+                        continue
+                    key = item.name[:-5]
+                    files[item.name] = (signature, _entry(key, data, item.path))
+                    self._loaded[key] = (signature, data)
+                if files != known:
+                    self._write_index(files)
+
+            entries = {key: _entry(key, data) for key, data in self.builtins.items()}
+            entries.update((entry.key, entry) for _, entry in files.values())
+            self._entries = entries
+            self._files = files
+            self.errors = errors
+            self._scanned_at = time.monotonic()
+            for key in [key for key in self._loaded if key not in entries or not entries[key].path]:
+                del self._loaded[key]
+
+    def _index(self):
+        if self._entries is None:
+            self.refresh()
+        return self._entries
+
+    # --- Ricerca --------------------------------------------------------
+
+    def entries(self):
+        """Voci dell'indice ordinate per nome"""
+        return sorted(self._index().values(), key=lambda entry: (entry.name.lower(), entry.key))
+
+    def tags(self):
+        """Etichette presenti nel catalogo, in ordine alfabetico"""
+        return sorted({tag for entry in self._index().values() for tag in entry.tags}, key=str.lower)
+
+    def search(self, query='', tag=None):
+        """Voci che contengono tutte le parole di ``query`` (e l'etichetta ``tag``).
+
+        Se la cartella non è stata letta negli ultimi ``RESCAN_SECONDS``
+        secondi viene prima aggiornato l'indice.
+        """
+        if self._entries is not None and time.monotonic() - self._scanned_at > RESCAN_SECONDS:
+            self.refresh()
+        words = query.lower().split()
+        return [
+            entry for entry in self.entries()
+            if (tag is None or tag in entry.tags) and all(word in entry.search_text for word in words)
+        ]
+
+    # --- Mapping --------------------------------------------------------
+
+    def __getitem__(self, key):
+        entry = self._index().get(key)
+        if entry is None:
+            raise KeyError(key)
+        if not entry.path:
+            return self.builtins[key]
+
+        with self._lock:
+            try:
+                stat = os.stat(entry.path)
+            except FileNotFoundError:
+                raise KeyError(key) from None
+            signature = (stat.st_mtime_ns, stat.st_size)
+            loaded = self._loaded.get(key)
+            if loaded is None or loaded[0] != signature:
+                loaded = (signature, _read_architecture(entry.path))
+                self._loaded[key] = loaded
+            return loaded[1]
+
+    def __iter__(self):
+        return iter(self._index())
+
+    def __len__(self):
+        return len(self._index())
+
+    def __contains__(self, key):
+        return key in self._index()
+
+
+_default_catalog = None
+
+
+def default_catalog():
+    """Catalogo condiviso della cartella ``$QG_CATALOGO`` (default: ``architetture``)"""
+    global _default_catalog
+    if _default_catalog is None:
+        _default_catalog = ArchitectureCatalog(os.environ.get(CATALOG_ENV) or DEFAULT_CATALOG_DIR)
+    return _default_catalog
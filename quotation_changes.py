@@ -0,0 +1,72 @@
+"""Notifica delle modifiche alla configurazione, raggruppate e ritardate.
+
+I gestori degli eventi di tastiera segnalano solo *cosa* è cambiato con
+``mark_dirty``; dopo ``DEFAULT_DELAY_MS`` millisecondi senza nuove
+modifiche gli iscritti (anteprima, validazione, salvataggio automatico...)
+ricevono una sola notifica con l'insieme dei campi modificati.
+
+Le chiavi sono tuple: ``('project_name',)``, ``('rates', ruolo)``,
+``('baseline_data', indice, campo)`` e così via.
+"""
+import sys
+
+DEFAULT_DELAY_MS = 300
+
+
+class ChangeNotifier:
+    """Raccoglie le modifiche e notifica gli iscritti una volta per pausa"""
+
+    def __init__(self, root, delay_ms=DEFAULT_DELAY_MS):
+        self.root = root
+        self.delay_ms = delay_ms
+        self.dirty = set()
+        self.pending_syncs = {}
+        self.subscribers = []
+        self._after_id = None
+
+    def subscribe(self, callback):
+        """Registra ``callback(campi_modificati)``; restituisce il callback"""
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Rimuove un iscritto registrato con ``subscribe``"""
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def mark_dirty(self, key, sync=None):
+        """Segna un campo come modificato e rimanda la notifica.
+
+        ``sync`` è una funzione che copia il valore dal widget al modello;
+        viene eseguita una sola volta, alla notifica o a ``sync()``, invece
+        che a ogni tasto premuto.
+        """
+        self.dirty.add(key)
+        if sync is not None:
+            self.pending_syncs[key] = sync
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay_ms, self.flush)
+
+    def sync(self):
+        """Copia nel modello i valori ancora in attesa, senza notificare"""
+        syncs, self.pending_syncs = self.pending_syncs, {}
+        for sync in syncs.values():
+            sync()
+
+    def flush(self):
+        """Notifica subito gli iscritti delle modifiche in attesa"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.sync()
+        if not self.dirty:
+            return
+
+        dirty, self.dirty = frozenset(self.dirty), set()
+        for callback in list(self.subscribers):
+            try:
+                callback(dirty)
+            except Exception:
+                # Un iscritto in errore non deve bloccare gli altri
+                self.root.report_callback_exception(*sys.exc_info())
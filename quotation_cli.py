@@ -0,0 +1,531 @@
+"""Interfaccia a riga di comando per generare quotazioni senza GUI.
+
+Esempi:
+    python quotation_cli.py batch configurazioni/ -o quotazioni/ -j 4
+    python quotation_cli.py update quotazione.xlsx configurazione.json
+    python quotation_cli.py sweep configurazione.json --budget 150000
+    python quotation_cli.py preview configurazione.json --open
+    python quotation_cli.py catalog cloud --tag web
+    python quotation_cli.py library import configurazioni/
+    python quotation_cli.py library search migrazione --client Acme
+    python quotation_cli.py serve --port 8765 -j 4
+    python quotation_cli.py bundle portafoglio.zip configurazioni/ --client Acme
+    python quotation_cli.py facts effort.parquet --client Acme
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+import quotation_engine
+from quotation_cache import OutputCache, DEFAULT_MAX_BYTES
+from quotation_catalog import default_catalog
+from quotation_config import format_thousands, normalize_config, validate_config
+from quotation_library import PAGE_SIZE, QuoteLibrary
+from quotation_service import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_QUEUE_SIZE, DEFAULT_TIMEOUT, serve
+from quotation_sweep import SweepSpec, DEFAULT_TOP_OPTIONS, parse_grid, sweep_quote
+from quotation_trace import Tracer, NULL_TRACER
+
+
+def find_config_files(config_dir):
+    """Elenca i file JSON di configurazione presenti nella cartella"""
+    return sorted(
+        os.path.join(config_dir, name)
+        for name in os.listdir(config_dir)
+        if name.lower().endswith('.json')
+    )
+
+
+def file_stem(path):
+    """Nome del file senza cartella né estensione"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def render_config_file(config_path, output_dir, write_only=False, trace=False, diagnostics=False,
+                       quote_date=None, cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES, formulas=False,
+                       backend='openpyxl'):
+    """Genera la quotazione per un singolo file di configurazione.
+
+    Con ``trace=True`` accanto al file Excel viene scritta la traccia
+    ``<nome>.trace.json`` (formato Chrome trace). Restituisce il file
+    generato e ``True`` se è stato copiato dalla cache.
+    """
+    config = quotation_engine.load_config(config_path)
+    stem = file_stem(config_path)
+    filename = os.path.join(output_dir, f"{stem}.xlsx")
+    cache = OutputCache(cache_dir, cache_bytes) if cache_dir else None
+    tracer = Tracer(memory=True).start() if trace or diagnostics else NULL_TRACER
+    try:
+        quotation_engine.generate_quotation(config, filename, write_only=write_only, tracer=tracer,
+                                            diagnostics=diagnostics, quote_date=quote_date, cache=cache,
+                                            formulas=formulas, backend=backend)
+    finally:
+        tracer.stop()
+    if trace:
+        tracer.save(os.path.join(output_dir, f"{stem}.trace.json"))
+    return filename, cache is not None and cache.hits > 0
+
+
+def run_batch(config_dir, output_dir, workers=None, write_only=False, trace=False, diagnostics=False,
+              quote_date=None, cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES, formulas=False, backend='openpyxl'):
+    """Genera tutte le configurazioni di una cartella su un pool di processi.
+
+    Restituisce la lista dei file generati e la lista degli errori
+    come coppie ``(file configurazione, messaggio)``.
+    """
+    config_files = find_config_files(config_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    generated = []
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(render_config_file, path, output_dir, write_only, trace, diagnostics,
+                            quote_date, cache_dir, cache_bytes, formulas, backend): path
+            for path in config_files
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                filename, cached = future.result()
+            except Exception as e:
+                errors.append((path, str(e)))
+                print(f"❌ {os.path.basename(path)}: {e}", file=sys.stderr)
+            else:
+                generated.append(filename)
+                print(f"{'♻️' if cached else '✅'} {os.path.basename(path)} -> {filename}")
+
+    return generated, errors
+
+
+def _grid_argument(kind):
+    """Tipo argparse per le griglie di ``parse_grid``"""
+    def parse(text):
+        try:
+            return parse_grid(text, kind)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+    return parse
+
+
+def add_sweep_arguments(parser):
+    """Opzioni della griglia di scenari del foglio Sensibilità"""
+    parser.add_argument('--margins', type=_grid_argument(float), default=SweepSpec().margins,
+                        help="margini %% da esplorare, min:max:passo o a,b,c (default: 0:60:1)")
+    parser.add_argument('--multipliers', type=_grid_argument(float), default=SweepSpec().multipliers,
+                        help="moltiplicatori delle tariffe (default: 0.8:1.2:0.01)")
+    parser.add_argument('--quarters', type=_grid_argument(int), default=None,
+                        help="durate in quarter (default: dalla baseline più corta -2 alla più lunga +2)")
+    parser.add_argument('--budget', type=float, default=None, help="budget del cliente in euro")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP_OPTIONS,
+                        help="numero di opzioni entro il budget da mostrare (default: %(default)s)")
+    parser.add_argument('--focus', type=int, default=1,
+                        help="baseline del grafico a tornado, da 1 (default: %(default)s)")
+
+
+def sweep_spec(args):
+    """``SweepSpec`` dalle opzioni di ``add_sweep_arguments``"""
+    return SweepSpec(margins=args.margins, multipliers=args.multipliers, quarters=args.quarters,
+                     budget=args.budget, top=args.top, focus=args.focus - 1)
+
+
+def build_parser():
+    """Crea il parser degli argomenti"""
+    parser = argparse.ArgumentParser(
+        prog="quotation_cli",
+        description="Generatore Quotazioni Progetti - modalità riga di comando"
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batch = subparsers.add_parser('batch', help="Genera le quotazioni per tutte le configurazioni di una cartella")
+    batch.add_argument('config_dir', help="Cartella con i file JSON salvati da 'Salva Configurazione'")
+    batch.add_argument('-o', '--output-dir', default='.', help="Cartella di destinazione dei file Excel")
+    batch.add_argument('-j', '--workers', type=int, default=None,
+                       help="Numero di processi (default: numero di CPU)")
+    batch.add_argument('--streaming', action='store_true',
+                       help="Scrive i fogli in modalità streaming (memoria costante)")
+    batch.add_argument('--trace', action='store_true',
+                       help="Scrive per ogni quotazione la traccia delle fasi (<nome>.trace.json, formato Chrome)")
+    batch.add_argument('--diagnostics', action='store_true',
+                       help="Aggiunge il foglio nascosto 'Diagnostica' con i tempi delle fasi")
+    batch.add_argument('--date', type=date.fromisoformat, default=None,
+                       help="Data della quotazione AAAA-MM-GG (default: oggi)")
+    batch.add_argument('--cache-dir', default=None,
+                       help="Cartella della cache: le configurazioni invariate vengono copiate senza rigenerarle")
+    batch.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                       help="Dimensione massima della cache in MB (default: %(default)s)")
+    batch.add_argument('--formulas', action='store_true',
+                       help="Costi e prezzi come formule sulle tariffe, modificabili in Excel")
+    batch.add_argument('--backend', choices=quotation_engine.BACKENDS, default='openpyxl',
+                       help="Scrittura dei fogli: openpyxl o 'direct' (SpreadsheetML diretto, più veloce)")
+
+    update = subparsers.add_parser('update', help="Aggiorna una quotazione esistente rigenerando solo i fogli cambiati")
+    update.add_argument('workbook', help="File Excel generato in precedenza")
+    update.add_argument('config', help="File JSON con la nuova configurazione")
+    update.add_argument('-o', '--output', default=None, help="File di destinazione (default: sovrascrive il file)")
+    update.add_argument('--date', type=date.fromisoformat, default=None,
+                        help="Data della quotazione AAAA-MM-GG (default: oggi)")
+    update.add_argument('--trace', default=None, metavar='FILE',
+                        help="Scrive la traccia delle fasi (formato Chrome) nel file indicato")
+    update.add_argument('--formulas', action='store_true',
+                        help="Costi e prezzi come formule sulle tariffe (come 'batch --formulas')")
+    update.add_argument('--sweep', action='store_true',
+                        help="Aggiunge o mantiene il foglio Sensibilità con la griglia indicata (vedi 'sweep')")
+    add_sweep_arguments(update)
+
+    sweep = subparsers.add_parser('sweep', help="Esplora prezzi e sensibilità su una griglia di margini, "
+                                                "tariffe e durate")
+    sweep.add_argument('config', help="File JSON con la configurazione")
+    sweep.add_argument('-o', '--output', default=None,
+                       help="Genera anche la quotazione con il foglio Sensibilità nel file indicato")
+    sweep.add_argument('--date', type=date.fromisoformat, default=None,
+                       help="Data della quotazione AAAA-MM-GG (default: oggi)")
+    sweep.add_argument('--formulas', action='store_true',
+                       help="Costi e prezzi come formule sulle tariffe (come 'batch --formulas')")
+    add_sweep_arguments(sweep)
+
+    preview = subparsers.add_parser('preview', help="Anteprima HTML di Dashboard, Quotazione e Grafici "
+                                                    "senza generare il file Excel")
+    preview.add_argument('config', help="File JSON con la configurazione")
+    preview.add_argument('-o', '--output', default=None,
+                         help="File HTML da scrivere (default: accanto alla configurazione)")
+    preview.add_argument('--date', type=date.fromisoformat, default=None,
+                         help="Data della quotazione AAAA-MM-GG (default: oggi)")
+    preview.add_argument('--trials', type=int, default=None,
+                         help="Prove della simulazione del rischio (default: come il file Excel; 0 per ometterla)")
+    preview.add_argument('--open', action='store_true', help="Apre l'anteprima nel browser")
+
+    catalog = subparsers.add_parser('catalog', help="Cerca nel catalogo delle architetture "
+                                                    "(cartella $QG_CATALOGO o 'architetture')")
+    catalog.add_argument('query', nargs='*', help="parole da cercare in chiave, nome, descrizione ed etichette")
+    catalog.add_argument('--tag', default=None, help="solo le architetture con questa etichetta")
+
+    library = subparsers.add_parser('library', help="Libreria locale delle configurazioni "
+                                                    "(database $QG_LIBRERIA)")
+    library.add_argument('--db', default=None, help="File del database (default: $QG_LIBRERIA o quello utente)")
+    actions = library.add_subparsers(dest='action', required=True)
+    library_import = actions.add_parser('import', help="Importa i file JSON di una cartella e sottocartelle")
+    library_import.add_argument('config_dir', help="Cartella con le configurazioni")
+    library_search = actions.add_parser('search', help="Cerca per testo, cliente, architettura e data")
+    library_search.add_argument('query', nargs='*', help="parole da cercare in progetto, cliente e descrizioni")
+    library_search.add_argument('--client', default=None, help="solo le quotazioni di questo cliente")
+    library_search.add_argument('--architecture', default=None, help="solo questa architettura (chiave)")
+    library_search.add_argument('--since', type=date.fromisoformat, default=None,
+                                help="aggiornate dal giorno AAAA-MM-GG")
+    library_search.add_argument('--until', type=date.fromisoformat, default=None,
+                                help="aggiornate prima del giorno AAAA-MM-GG")
+    library_search.add_argument('--limit', type=int, default=PAGE_SIZE, help="risultati per pagina")
+    library_search.add_argument('--offset', type=int, default=0, help="risultati da saltare")
+    library_export = actions.add_parser('export', help="Scrive la configurazione salvata in un file JSON")
+    library_export.add_argument('id', type=int, help="id della configurazione (vedi 'search')")
+    library_export.add_argument('-o', '--output', required=True, help="File JSON da scrivere")
+
+    bundle = subparsers.add_parser('bundle', help="Genera molte quotazioni in un unico archivio ZIP con "
+                                                  "manifest.csv dei totali")
+    bundle.add_argument('output', help="Archivio ZIP da scrivere")
+    bundle.add_argument('sources', nargs='*',
+                        help="File JSON o cartelle di configurazioni (senza: tutte quelle della libreria)")
+    bundle.add_argument('--client', default=None,
+                        help="Dalla libreria: solo le configurazioni di questo cliente")
+    bundle.add_argument('--search', default='', help="Dalla libreria: parole da cercare")
+    bundle.add_argument('--db', default=None, help="File del database della libreria")
+    bundle.add_argument('-j', '--workers', type=int, default=None,
+                        help="Processi paralleli (default: numero di CPU)")
+    bundle.add_argument('--streaming', action='store_true', help="Workbook write-only (come 'batch')")
+    bundle.add_argument('--formulas', action='store_true', help="Modalità formule (come 'batch')")
+    bundle.add_argument('--backend', choices=quotation_engine.BACKENDS, default='openpyxl',
+                        help="Scrittura dei fogli (come 'batch')")
+    bundle.add_argument('--date', type=date.fromisoformat, default=None,
+                        help="Data delle quotazioni AAAA-MM-GG (default: oggi)")
+
+    facts = subparsers.add_parser('facts', help="Esporta effort e costi (quotazione, baseline, voce, quarter) "
+                                                "in CSV, Parquet o .npz per l'analisi")
+    facts.add_argument('output', help="File da scrivere: .csv, .parquet (con pyarrow) o .npz (con NumPy)")
+    facts.add_argument('sources', nargs='*',
+                       help="File JSON o cartelle di configurazioni (senza: tutte quelle della libreria)")
+    facts.add_argument('--client', default=None,
+                       help="Dalla libreria: solo le configurazioni di questo cliente")
+    facts.add_argument('--search', default='', help="Dalla libreria: parole da cercare")
+    facts.add_argument('--db', default=None, help="File del database della libreria")
+
+    serve = subparsers.add_parser('serve', help="Servizio HTTP locale: POST /quote con la configurazione JSON "
+                                                "restituisce il file Excel")
+    serve.add_argument('--host', default=DEFAULT_HOST, help=f"Indirizzo di ascolto (default: {DEFAULT_HOST})")
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Porta (default: {DEFAULT_PORT})")
+    serve.add_argument('-j', '--workers', type=int, default=None,
+                       help="Quotazioni generate in parallelo (default: numero di CPU)")
+    serve.add_argument('--queue', type=int, default=DEFAULT_QUEUE_SIZE,
+                       help=f"Richieste in attesa oltre le quali si risponde 503 (default: {DEFAULT_QUEUE_SIZE})")
+    serve.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                       help=f"Secondi massimi per richiesta, attesa compresa (default: {DEFAULT_TIMEOUT:g})")
+    serve.add_argument('--cache-dir', default=None, help="Cache dei file generati (come 'batch')")
+    serve.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                       help="Dimensione massima della cache in MB")
+
+    return parser
+
+
+def run_update(workbook, config_path, output=None, quote_date=None, trace=None, formulas=False, sweep=None):
+    """Aggiorna un file generato; restituisce i ruoli dei fogli rigenerati"""
+    from quotation_update import update_quotation
+
+    config = quotation_engine.load_config(config_path)
+    tracer = Tracer().start() if trace else NULL_TRACER
+    try:
+        changed = update_quotation(workbook, config, output=output, quote_date=quote_date, tracer=tracer,
+                                   formulas=formulas, sweep=sweep)
+    finally:
+        tracer.stop()
+    if trace:
+        tracer.save(trace)
+    return changed
+
+
+def format_sweep(result, seconds):
+    """Riepilogo testuale della griglia: migliori opzioni e tornado"""
+    lines = [f"🎯 {format_thousands(result.sweep.combinations)} combinazioni valutate in {seconds * 1000:.0f} ms"]
+    if result.spec.budget is not None:
+        lines.append(f"\n🏆 Migliori opzioni entro {format_thousands(result.spec.budget)} €:")
+        if not result.best:
+            lines.append("   nessuna combinazione rientra nel budget")
+        for option in result.best:
+            lines.append(
+                f"   {option.name:<20} {option.quarters:>3} Q  tariffe ×{option.multiplier:.2f}  "
+                f"margine {option.margin:g}%  prezzo {format_thousands(option.price)} €  "
+                f"utile {format_thousands(option.profit)} €"
+            )
+    lines.append(f"\n🌪️ Sensibilità del prezzo di {result.focus_name} "
+                 f"(nominale {format_thousands(result.nominal_price)} €):")
+    for factor in result.tornado:
+        low, high = sorted((factor.low_price, factor.high_price))
+        lines.append(f"   {factor.factor:<36} {format_thousands(low):>12} - {format_thousands(high):>12} €")
+    return "\n".join(lines)
+
+
+def run_sweep(config_path, spec, output=None, quote_date=None, formulas=False):
+    """Valuta la griglia di scenari e la stampa; con ``output`` genera anche il file"""
+    config = normalize_config(quotation_engine.load_config(config_path))
+    catalog = default_catalog()
+    validate_config(config, catalog)
+    arch_data = catalog[config['selected_architecture']]
+
+    start = time.perf_counter()
+    result = sweep_quote(config, arch_data, spec)
+    print(format_sweep(result, time.perf_counter() - start))
+
+    if output:
+        quotation_engine.generate_quotation(config, output, quote_date=quote_date, formulas=formulas, sweep=spec)
+        print(f"\n✅ Quotazione con foglio Sensibilità -> {output}")
+    return result
+
+
+def run_preview(config_path, output=None, quote_date=None, open_browser=False, risk_trials=None):
+    """Scrive l'anteprima HTML della configurazione, restituisce il percorso del file"""
+    from quotation_html import render_html
+
+    start = time.perf_counter()
+    options = {} if risk_trials is None else {'risk_trials': risk_trials}
+    page = render_html(quotation_engine.load_config(config_path), quote_date=quote_date, **options)
+    output = output or os.path.splitext(config_path)[0] + ".html"
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(page)
+    print(f"✅ Anteprima -> {output} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    if open_browser:
+        import pathlib
+        import webbrowser
+        webbrowser.open(pathlib.Path(output).resolve().as_uri())
+    return output
+
+
+def format_catalog(entries, errors=()):
+    """Elenco delle architetture trovate e dei file scartati"""
+    lines = [f"{'Chiave':<24} {'Voci':>5}  Nome"]
+    for entry in entries:
+        tags = f"  [{', '.join(entry.tags)}]" if entry.tags else ""
+        lines.append(f"{entry.key:<24} {entry.item_count:>5}  {entry.name}{tags}")
+    lines.append(f"\n🏗️ {len(entries)} architetture")
+    lines.extend(f"⚠️ {error}" for error in errors)
+    return "\n".join(lines)
+
+
+def format_library_page(page):
+    """Tabella di una pagina di risultati della libreria"""
+    lines = [f"{'Id':>6}  {'Aggiornata':<16}  {'Cliente':<20} {'Architettura':<14} {'Costo':>12}  Progetto"]
+    for entry in page.entries:
+        cost = "—" if entry.total_cost is None else format_thousands(entry.total_cost)
+        lines.append(f"{entry.id:>6}  {entry.updated_at.replace('T', ' ')[:16]:<16}  {entry.client_name[:20]:<20} "
+                     f"{entry.architecture[:14]:<14} {cost:>12}  {entry.project_name}")
+    last = page.offset + len(page.entries)
+    lines.append(f"\n📚 {page.offset + 1 if page.entries else 0}-{last} di {page.total} configurazioni")
+    return "\n".join(lines)
+
+
+def run_library(args):
+    """Esegue un'azione del comando ``library``"""
+    with QuoteLibrary(args.db) as library:
+        if args.action == 'import':
+            start = time.perf_counter()
+            result = library.import_directory(args.config_dir)
+            print(f"📥 {result.imported} importate, {result.duplicates} già presenti "
+                  f"in {time.perf_counter() - start:.2f} s")
+            for path, error in result.errors:
+                print(f"⚠️ {path}: {error}", file=sys.stderr)
+        elif args.action == 'search':
+            print(format_library_page(library.search(
+                " ".join(args.query), client=args.client, architecture=args.architecture,
+                since=args.since, until=args.until, limit=args.limit, offset=args.offset
+            )))
+        elif args.action == 'export':
+            config = library.load(args.id)
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=2, ensure_ascii=False)
+            print(f"✅ Configurazione {args.id} -> {args.output}")
+
+
+def config_sources(args, file_label=str, library_label="libreria #{}".format):
+    """Coppie ``(etichetta, configurazione)`` da file e cartelle o dalla libreria.
+
+    Restituisce le coppie (lette man mano), il loro numero e la libreria
+    aperta da chiudere al termine (``None`` per i file).
+    """
+    if args.sources:
+        paths = []
+        for source in args.sources:
+            paths.extend(find_config_files(source) if os.path.isdir(source) else [source])
+        return ((file_label(path), path) for path in paths), len(paths), None
+    library = QuoteLibrary(args.db)
+    filters = {'text': args.search, 'client': args.client}
+    total = library.search(limit=0, **filters).total
+    configs = ((library_label(quote_id), config) for quote_id, config in library.configs(**filters))
+    return configs, total, library
+
+
+def run_bundle(args):
+    """Esegue ``bundle``: configurazioni da file e cartelle o dalla libreria"""
+    from quotation_bundle import export_bundle
+
+    def progress(done, total, message):
+        if done < total:
+            print(f"[{done + 1}/{total}] {message}")
+
+    configs, total, library = config_sources(args)
+    try:
+        result = export_bundle(configs, args.output, workers=args.workers, total=total, progress=progress,
+                               write_only=args.streaming, formulas=args.formulas, quote_date=args.date,
+                               backend=args.backend)
+    finally:
+        if library is not None:
+            library.close()
+    print(f"\n📦 {result.written} quotazioni in {args.output} ({result.archive_bytes / 1024 / 1024:.1f} MB, "
+          f"{result.seconds:.1f} s), {len(result.errors)} errori")
+    for source, error in result.errors:
+        print(f"❌ {source}: {error}", file=sys.stderr)
+    return result
+
+
+def run_facts(args):
+    """Esegue ``facts``: tabella di effort e costi delle configurazioni"""
+    from quotation_facts import export_facts
+
+    configs, _, library = config_sources(args, file_label=file_stem, library_label=str)
+    try:
+        result = export_facts(configs, args.output)
+    finally:
+        if library is not None:
+            library.close()
+    print(f"📋 {format_thousands(result.rows)} righe di {result.quotes} quotazioni in {args.output} "
+          f"({os.path.getsize(args.output) / 1024 / 1024:.1f} MB, {result.seconds:.1f} s), "
+          f"{len(result.errors)} errori")
+    for quote, error in result.errors:
+        print(f"❌ {quote}: {error}", file=sys.stderr)
+    return result
+
+
+def main(argv=None):
+    """Punto di ingresso della riga di comando"""
+    args = build_parser().parse_args(argv)
+
+    if args.command == 'batch':
+        generated, errors = run_batch(args.config_dir, args.output_dir, args.workers, args.streaming,
+                                     args.trace, args.diagnostics, args.date, args.cache_dir,
+                                     args.cache_size * 1024 * 1024, args.formulas, args.backend)
+        print(f"\n📊 Generate {len(generated)} quotazioni, {len(errors)} errori")
+        return 1 if errors else 0
+
+    if args.command == 'update':
+        try:
+            changed = run_update(args.workbook, args.config, args.output, args.date, args.trace, args.formulas,
+                                 sweep_spec(args) if args.sweep else None)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        if changed:
+            print(f"✅ Rigenerati {len(changed)} fogli: {', '.join(changed)}")
+        else:
+            print("✅ Nessuna modifica: quotazione già aggiornata")
+        return 0
+
+    if args.command == 'preview':
+        try:
+            run_preview(args.config, args.output, args.date, args.open, args.trials)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    if args.command == 'catalog':
+        catalog = default_catalog()
+        print(format_catalog(catalog.search(" ".join(args.query), args.tag), catalog.errors))
+        return 0
+
+    if args.command == 'library':
+        try:
+            run_library(args)
+        except KeyError as e:
+            print(f"❌ Configurazione {e} non presente nella libreria", file=sys.stderr)
+            return 1
+        except (OSError, sqlite3.Error) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    if args.command == 'bundle':
+        try:
+            result = run_bundle(args)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        return 1 if result.errors else 0
+
+    if args.command == 'facts':
+        try:
+            result = run_facts(args)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        return 1 if result.errors else 0
+
+    if args.command == 'serve':
+        serve(args.host, args.port, workers=args.workers, queue_size=args.queue, timeout=args.timeout,
+              cache_dir=args.cache_dir, cache_bytes=args.cache_size * 1024 * 1024)
+        return 0
+
+    if args.command == 'sweep':
+        try:
+            run_sweep(args.config, sweep_spec(args), args.output, args.date, args.formulas)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
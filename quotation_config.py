@@ -0,0 +1,255 @@
+"""Configurazione delle quotazioni: architetture, tariffe e valori di default.
+
+Modulo senza dipendenze pesanti, importato all'avvio dall'interfaccia
+grafica; openpyxl e il motore di calcolo vengono caricati solo quando
+servono (vedi ``quotation_engine``).
+"""
+import copy
+import json
+
+# Architetture predefinite (il catalogo su disco può aggiungerne e sostituirle, vedi quotation_catalog)
+ARCHITECTURES = {
+    "web-app": {
+        "name": "🌐 Web Application",
+        "description": "Frontend, Backend, Database, API, Testing",
+        "tags": ["web", "frontend", "backend"],
+        "items": [
+            "Frontend Development", "Backend Development", "Database Design",
+            "API Development", "UI/UX Design", "Testing & QA",
+            "DevOps & Deployment", "Project Management"
+        ]
+    },
+    "mobile-app": {
+        "name": "📱 Mobile Application",
+        "description": "iOS, Android, Backend, API, Store Deployment",
+        "tags": ["mobile", "ios", "android"],
+        "items": [
+            "iOS Development", "Android Development", "Backend Services",
+            "API Integration", "UI/UX Design", "Testing Mobile",
+            "App Store Deployment", "Push Notifications", "Project Management"
+        ]
+    },
+    "enterprise": {
+        "name": "🏢 Enterprise Solution",
+        "description": "Microservizi, Integration, Security, Monitoring",
+        "tags": ["enterprise", "microservizi", "sicurezza"],
+        "items": [
+            "Architecture Design", "Microservices Development", "Integration Layer",
+            "Security Implementation", "Monitoring & Logging", "Data Migration",
+            "Performance Optimization", "Documentation", "Training", "Project Management"
+        ]
+    },
+    "data-platform": {
+        "name": "📈 Data Platform",
+        "description": "ETL, Analytics, Reporting, ML Pipeline",
+        "tags": ["dati", "analytics", "ml"],
+        "items": [
+            "Data Ingestion", "ETL Development", "Data Warehouse Design",
+            "Analytics Dashboard", "ML Pipeline", "Data Governance",
+            "Reporting Tools", "Performance Tuning", "Project Management"
+        ]
+    }
+}
+
+# Tariffe di default (€/giorno)
+DEFAULT_RATES = {
+    "Senior Developer": 800,
+    "Developer": 600,
+    "Junior Developer": 400,
+    "Project Manager": 900,
+    "Business Analyst": 700,
+    "QA Tester": 500
+}
+
+# Ripartizione dell'effort di ogni voce tra i ruoli, in percentuale (somma 100).
+# Un'architettura può ridefinirla con la chiave 'allocations'.
+ITEM_ALLOCATIONS = {
+    "Frontend Development": {"Senior Developer": 20, "Developer": 50, "Junior Developer": 30},
+    "Backend Development": {"Senior Developer": 30, "Developer": 50, "Junior Developer": 20},
+    "Database Design": {"Senior Developer": 60, "Developer": 40},
+    "API Development": {"Senior Developer": 30, "Developer": 70},
+    "UI/UX Design": {"Business Analyst": 40, "Developer": 60},
+    "Testing & QA": {"QA Tester": 80, "Developer": 20},
+    "DevOps & Deployment": {"Senior Developer": 70, "Developer": 30},
+    "iOS Development": {"Senior Developer": 30, "Developer": 50, "Junior Developer": 20},
+    "Android Development": {"Senior Developer": 30, "Developer": 50, "Junior Developer": 20},
+    "Backend Services": {"Senior Developer": 30, "Developer": 50, "Junior Developer": 20},
+    "API Integration": {"Senior Developer": 20, "Developer": 80},
+    "Testing Mobile": {"QA Tester": 80, "Developer": 20},
+    "App Store Deployment": {"Developer": 70, "Project Manager": 30},
+    "Push Notifications": {"Developer": 70, "Junior Developer": 30},
+    "Architecture Design": {"Senior Developer": 80, "Business Analyst": 20},
+    "Microservices Development": {"Senior Developer": 30, "Developer": 50, "Junior Developer": 20},
+    "Integration Layer": {"Senior Developer": 40, "Developer": 60},
+    "Security Implementation": {"Senior Developer": 70, "Developer": 30},
+    "Monitoring & Logging": {"Developer": 70, "Junior Developer": 30},
+    "Data Migration": {"Developer": 60, "Business Analyst": 20, "QA Tester": 20},
+    "Performance Optimization": {"Senior Developer": 80, "Developer": 20},
+    "Documentation": {"Business Analyst": 50, "Junior Developer": 50},
+    "Training": {"Business Analyst": 60, "Senior Developer": 40},
+    "Data Ingestion": {"Senior Developer": 30, "Developer": 70},
+    "ETL Development": {"Senior Developer": 20, "Developer": 60, "Junior Developer": 20},
+    "Data Warehouse Design": {"Senior Developer": 70, "Business Analyst": 30},
+    "Analytics Dashboard": {"Developer": 60, "Business Analyst": 40},
+    "ML Pipeline": {"Senior Developer": 60, "Developer": 40},
+    "Data Governance": {"Business Analyst": 70, "Senior Developer": 30},
+    "Reporting Tools": {"Developer": 60, "Business Analyst": 40},
+    "Performance Tuning": {"Senior Developer": 80, "Developer": 20},
+    "Project Management": {"Project Manager": 100},
+}
+
+# Ruolo assegnato a rotazione alle voci senza ripartizione (es. architetture personalizzate)
+ITEM_RATE_ROLES = ("Developer", "Business Analyst", "Senior Developer")
+
+RISK_LEVELS = ['Basso', 'Medio', 'Alto', 'Molto Alto']
+
+# Condizioni riportate nel foglio Quotazione e nell'anteprima HTML
+OFFER_VALIDITY = "30 giorni"
+QUOTATION_TERMS = (
+    "• Prezzi espressi in Euro, IVA esclusa",
+    "• Pagamenti: 30% anticipo, 40% SAL intermedio, 30% a consegna",
+    "• Validità offerta: 30 giorni dalla data di emissione",
+    "• Eventuali modifiche ai requisiti comporteranno rinegoziazione",
+    "• Include training del team cliente (8 ore)",
+    "• Supporto post-go-live: 3 mesi inclusi",
+    "• Documentazione tecnica completa inclusa"
+)
+
+DEFAULT_ARCHITECTURE = "enterprise"
+DEFAULT_BASELINE_COUNT = 3
+MIN_BASELINE_COUNT = 2
+MAX_BASELINE_COUNT = 100
+
+
+def default_baseline(index):
+    """Restituisce la baseline di default per la posizione indicata"""
+    return {
+        'name': f'Baseline {index + 1}',
+        'quarters': 4,
+        'description': '',
+        'risk_level': 'Medio'
+    }
+
+
+def default_config():
+    """Restituisce una configurazione di default completa"""
+    return normalize_config({'project_name': "Nuovo Progetto"})
+
+
+def normalize_config(config):
+    """Completa una configurazione con i valori di default.
+
+    Il numero di baseline viene allineato a ``baseline_count`` come fa
+    ``update_baselines`` nell'interfaccia grafica.
+    """
+    config = copy.deepcopy(config)
+    baseline_data = list(config.get('baseline_data') or [])
+    baseline_count = int(config.get('baseline_count') or len(baseline_data) or DEFAULT_BASELINE_COUNT)
+
+    while len(baseline_data) < baseline_count:
+        baseline_data.append(default_baseline(len(baseline_data)))
+    baseline_data = baseline_data[:baseline_count]
+
+    for i, baseline in enumerate(baseline_data):
+        complete = default_baseline(i)
+        complete.update(baseline)
+        complete['quarters'] = int(complete['quarters'])
+        baseline_data[i] = complete
+
+    rates = dict(DEFAULT_RATES)
+    rates.update(config.get('rates') or {})
+
+    return {
+        'project_name': config.get('project_name', ''),
+        'client_name': config.get('client_name', ''),
+        'project_description': config.get('project_description', ''),
+        'baseline_count': baseline_count,
+        'selected_architecture': config.get('selected_architecture') or DEFAULT_ARCHITECTURE,
+        'baseline_data': baseline_data,
+        'rates': rates
+    }
+
+
+def validate_config(config, architectures=None):
+    """Verifica che la configurazione sia generabile, solleva ValueError altrimenti"""
+    architectures = architectures or ARCHITECTURES
+    if not str(config.get('project_name', '')).strip():
+        raise ValueError("Il nome del progetto è obbligatorio!")
+    if config.get('selected_architecture') not in architectures:
+        raise ValueError(f"Architettura sconosciuta: {config.get('selected_architecture')}")
+    for baseline in config.get('baseline_data', []):
+        if baseline['quarters'] < 1:
+            raise ValueError(f"Durata non valida per la baseline {baseline['name']}")
+
+    arch_data = architectures[config['selected_architecture']]
+    rates = config.get('rates') or DEFAULT_RATES
+    for i, item in enumerate(arch_data['items']):
+        allocation = item_allocation(arch_data, i)
+        unknown = [role for role in allocation if role not in rates]
+        if unknown:
+            raise ValueError(f"Ruolo senza tariffa nella ripartizione di '{item}': {', '.join(unknown)}")
+        if any(not isinstance(share, int) or share < 0 for share in allocation.values()) \
+                or sum(allocation.values()) != 100:
+            raise ValueError(f"La ripartizione di '{item}' deve essere in percentuali intere con somma 100")
+
+
+def item_rate_role(item_index):
+    """Ruolo delle voci senza ripartizione, a rotazione"""
+    return ITEM_RATE_ROLES[item_index % len(ITEM_RATE_ROLES)]
+
+
+def item_allocation(arch_data, item_index):
+    """Ripartizione ``{ruolo: percentuale}`` dell'effort di una voce"""
+    item = arch_data['items'][item_index]
+    allocations = arch_data.get('allocations') or {}
+    if item in allocations:
+        return allocations[item]
+    return ITEM_ALLOCATIONS.get(item) or {item_rate_role(item_index): 100}
+
+
+def allocation_matrix(arch_data, roles):
+    """Matrice voci × ruoli delle percentuali di ripartizione"""
+    columns = {role: r for r, role in enumerate(roles)}
+    matrix = []
+    for i in range(len(arch_data['items'])):
+        row = [0] * len(roles)
+        for role, share in item_allocation(arch_data, i).items():
+            row[columns[role]] = share
+        matrix.append(tuple(row))
+    return tuple(matrix)
+
+
+def allocated_roles(arch_data, roles):
+    """Ruoli (nell'ordine di ``roles``) a cui è assegnata almeno una voce"""
+    used = set()
+    for i in range(len(arch_data['items'])):
+        used.update(role for role, share in item_allocation(arch_data, i).items() if share)
+    return tuple(role for role in roles if role in used)
+
+
+def blended_rate(allocation, rates):
+    """Tariffa di una voce: media delle tariffe dei ruoli pesata sulla ripartizione.
+
+    Calcolata come la formula del foglio Excel, ``(30*A+70*B)/100``, quindi
+    il risultato memorizzato coincide con quello ricalcolato da Excel.
+    """
+    if len(allocation) == 1:
+        (role, _), = allocation.items()
+        return rates[role]
+    return sum(share * rates[role] for role, share in allocation.items()) / 100
+
+
+def load_config(path):
+    """Legge una configurazione JSON salvata da ``save_configuration``"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def default_filename(config):
+    """Nome file proposto per la quotazione"""
+    return f"Quotazione_{config['project_name'].replace(' ', '_')}.xlsx"
+
+
+def format_thousands(value):
+    """Numero intero con il punto come separatore delle migliaia"""
+    return f"{value:,.0f}".replace(',', '.')
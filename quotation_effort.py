@@ -0,0 +1,179 @@
+"""Calcolo dell'effort per voce e quarter di tutte le baseline in un colpo solo.
+
+Con NumPy disponibile le baseline vengono calcolate come un unico tensore
+baseline × voci × quarter; senza NumPy (ad es. nell'eseguibile compilato,
+che lo esclude) si usa l'implementazione in puro Python, che produce gli
+stessi numeri.
+
+Con un ``RateCard`` l'effort viene anche ripartito tra i ruoli: tensore
+dell'effort × matrice di ripartizione voci × ruoli, poi × vettore delle
+tariffe, per ottenere effort e costo per ruolo e quarter di tutte le
+baseline con un solo prodotto matriciale. Le percentuali di ripartizione
+sono intere, quindi le somme sono esatte e i due motori coincidono.
+"""
+from typing import NamedTuple, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAVE_NUMPY = np is not None
+
+
+class RateCard(NamedTuple):
+    """Tariffe per ruolo e ripartizione dell'effort delle voci tra i ruoli"""
+    roles: Tuple[str, ...]
+    rates: Tuple[float, ...]  # per ruolo (€/giorno)
+    allocation: Tuple[Tuple[int, ...], ...]  # voci × ruoli, percentuali intere con somma 100
+    item_rates: Tuple[float, ...]  # tariffa pesata di ogni voce
+
+
+class BaselineEffort(NamedTuple):
+    """Effort e costi di una baseline"""
+    effort: Tuple[Tuple[int, ...], ...]  # voci × quarter (giorni)
+    item_totals: Tuple[int, ...]
+    quarter_totals: Tuple[int, ...]
+    item_rates: Tuple[float, ...]
+    item_costs: Tuple[float, ...]
+    role_effort: Tuple[Tuple[float, ...], ...] = ()  # ruoli × quarter (giorni)
+    role_costs: Tuple[Tuple[float, ...], ...] = ()  # ruoli × quarter (€)
+
+
+def item_effort(baseline_index, item_index, quarters):
+    """Distribuzione dell'effort di una voce sui quarter (simulata)"""
+    base_effort = 5 + (baseline_index * 2)  # Effort base crescente per baseline
+    efforts = []
+    for q in range(quarters):
+        if q == 0:  # Q1 - più effort per analisi/setup
+            effort = base_effort + (item_index % 3) * 2
+        elif q == quarters - 1:  # Ultimo quarter - meno effort
+            effort = max(2, base_effort - 2)
+        else:  # Quarter intermedi
+            effort = base_effort + (item_index % 4)
+        efforts.append(effort)
+    return tuple(efforts)
+
+
+def item_rate(item_index):
+    """Tariffa media della voce con le tariffe di default"""
+    return 600 + (item_index % 3) * 100
+
+
+def effort_tensor(baseline_indices, quarters, item_count):
+    """Tensore dell'effort baseline × voci × quarter (solo NumPy).
+
+    Le baseline con meno quarter del massimo hanno le colonne in eccesso
+    a zero, quindi le somme lungo gli assi restano corrette.
+    """
+    b = np.asarray(baseline_indices, dtype=np.int64)[:, None, None]
+    n_quarters = np.asarray(quarters, dtype=np.int64)[:, None, None]
+    i = np.arange(item_count, dtype=np.int64)[None, :, None]
+    q = np.arange(int(n_quarters.max()) if len(quarters) else 0, dtype=np.int64)[None, None, :]
+
+    base_effort = 5 + b * 2
+    first = base_effort + (i % 3) * 2
+    last = np.maximum(2, base_effort - 2)
+    middle = base_effort + (i % 4)
+
+    grid = np.where(q == 0, first, np.where(q == n_quarters - 1, last, middle))
+    return np.where(q < n_quarters, grid, 0)
+
+
+def item_rates(item_count):
+    """Vettore delle tariffe per voce (solo NumPy)"""
+    return 600 + (np.arange(item_count, dtype=np.int64) % 3) * 100
+
+
+def role_tensor(grid, rate_card):
+    """Effort e costo per baseline × quarter × ruolo (solo NumPy).
+
+    Le percentuali sono intere e l'effort è in giorni interi, quindi il
+    prodotto in virgola mobile (BLAS) è esatto prima della divisione per 100.
+    """
+    allocation = np.asarray(rate_card.allocation, dtype=np.float64).reshape(grid.shape[1], len(rate_card.roles))
+    role_effort = np.matmul(grid.transpose(0, 2, 1).astype(np.float64), allocation) / 100
+    return role_effort, role_effort * np.asarray(rate_card.rates, dtype=np.float64)
+
+
+def _effort_batch_numpy(baseline_indices, quarters, item_count, rate_card=None):
+    grid = effort_tensor(baseline_indices, quarters, item_count)
+    if rate_card is None:
+        rates = item_rates(item_count)
+    else:
+        rates = np.asarray(rate_card.item_rates)
+        role_effort, role_costs = role_tensor(grid, rate_card)
+    totals = grid.sum(axis=2)
+    costs = totals * rates[None, :]
+    quarter_totals = grid.sum(axis=1)
+
+    rates_list = tuple(rates.tolist())
+    results = []
+    for k, n in enumerate(quarters):
+        if rate_card is None:
+            roles = {}
+        else:
+            roles = {
+                'role_effort': tuple(map(tuple, role_effort[k, :n].T.tolist())),
+                'role_costs': tuple(map(tuple, role_costs[k, :n].T.tolist()))
+            }
+        results.append(BaselineEffort(
+            effort=tuple(map(tuple, grid[k, :, :n].tolist())),
+            item_totals=tuple(totals[k].tolist()),
+            quarter_totals=tuple(quarter_totals[k, :n].tolist()),
+            item_rates=rates_list,
+            item_costs=tuple(costs[k].tolist()),
+            **roles
+        ))
+    return results
+
+
+def _roles_python(effort, rate_card, quarters):
+    """Effort e costo per ruolo e quarter di una baseline (puro Python)"""
+    accumulated = [[0] * quarters for _ in rate_card.roles]
+    for row, shares in zip(effort, rate_card.allocation):
+        for r, share in enumerate(shares):
+            if share:
+                target = accumulated[r]
+                for q, value in enumerate(row):
+                    target[q] += value * share
+    role_effort = tuple(tuple(value / 100 for value in row) for row in accumulated)
+    role_costs = tuple(
+        tuple(value * rate for value in row) for row, rate in zip(role_effort, rate_card.rates)
+    )
+    return {'role_effort': role_effort, 'role_costs': role_costs}
+
+
+def _effort_batch_python(baseline_indices, quarters, item_count, rate_card=None):
+    if rate_card is None:
+        rates = tuple(item_rate(i) for i in range(item_count))
+    else:
+        rates = tuple(rate_card.item_rates)
+    results = []
+    for index, n in zip(baseline_indices, quarters):
+        effort = tuple(item_effort(index, i, n) for i in range(item_count))
+        totals = tuple(sum(row) for row in effort)
+        results.append(BaselineEffort(
+            effort=effort,
+            item_totals=totals,
+            quarter_totals=tuple(sum(column) for column in zip(*effort)) if effort else (0,) * n,
+            item_rates=rates,
+            item_costs=tuple(total * rate for total, rate in zip(totals, rates)),
+            **(_roles_python(effort, rate_card, n) if rate_card is not None else {})
+        ))
+    return results
+
+
+def compute_effort_batch(baseline_indices, quarters, item_count, use_numpy=None, rate_card=None):
+    """Calcola effort, totali e costi per tutte le baseline indicate.
+
+    Con ``rate_card`` le voci sono valorizzate con le tariffe pesate sulla
+    ripartizione e viene calcolato l'effort per ruolo; senza, si usano le
+    tariffe di ``item_rate``. ``use_numpy`` forza l'implementazione
+    (default: NumPy se installato).
+    """
+    if use_numpy is None:
+        use_numpy = HAVE_NUMPY
+    if use_numpy:
+        return _effort_batch_numpy(baseline_indices, quarters, item_count, rate_card)
+    return _effort_batch_python(baseline_indices, quarters, item_count, rate_card)
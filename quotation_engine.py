@@ -0,0 +1,972 @@
+"""Motore di generazione quotazioni indipendente dall'interfaccia grafica.
+
+Riceve un dizionario di configurazione (lo stesso formato scritto da
+``save_configuration``) e produce il workbook Excel completo.
+"""
+import json
+from datetime import date, datetime
+from zipfile import ZipFile, ZIP_DEFLATED
+
+import openpyxl
+from openpyxl.chart import BarChart, Reference
+from openpyxl.utils import get_column_letter
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+
+import quotation_styles as styles
+# Configurazione e helper leggeri, riesportati per chi usa solo il motore
+from quotation_config import (
+    ARCHITECTURES, DEFAULT_RATES, RISK_LEVELS, DEFAULT_ARCHITECTURE, DEFAULT_BASELINE_COUNT,
+    MIN_BASELINE_COUNT, MAX_BASELINE_COUNT, default_baseline, default_config, normalize_config,
+    validate_config, load_config, default_filename, format_thousands, allocated_roles, item_allocation,
+    OFFER_VALIDITY, QUOTATION_TERMS
+)
+from quotation_catalog import default_catalog
+from quotation_formulas import (
+    EXCEL_CALC_ID, ALLOCATION_NAME, ALLOCATION_RATES_NAME, CachedValueExcelWriter, create_sheet, formula_cell,
+    add_defined_name, add_validation, rate_names, baseline_effort_name, baseline_cost_name
+)
+from quotation_model import BASELINE_FIELDS, build_rate_card, compute_quote_model
+from quotation_risk import simulate_quote_risk, risk_to_dict, DEFAULT_TRIALS, PERCENTILES
+from quotation_sweep import sweep_quote, price_ranges
+from quotation_trace import NULL_TRACER
+from quotation_cache import cache_key, content_hash, generator_fingerprint
+from quotation_xlsx import XlsxCell, XlsxSheet, XlsxWorkbook
+
+# Backend di scrittura dei fogli: modello a oggetti di openpyxl o SpreadsheetML diretto (quotation_xlsx)
+BACKENDS = ('openpyxl', 'direct')
+
+
+class GenerationCancelled(Exception):
+    """La generazione è stata annullata prima del termine"""
+
+
+class ProgressReporter:
+    """Notifica l'avanzamento della generazione e ne controlla l'annullamento.
+
+    ``callback(completati, totali, messaggio)`` viene chiamata all'inizio di
+    ogni fase; se ``cancel_event`` (es. ``threading.Event``) è impostato la
+    fase successiva solleva ``GenerationCancelled``.
+    """
+
+    def __init__(self, callback=None, cancel_event=None):
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.done = 0
+        self.total = 0
+
+    def expect(self, steps):
+        """Aggiunge fasi al totale previsto"""
+        self.total += steps
+
+    def step(self, message):
+        """Inizia una nuova fase"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise GenerationCancelled("Generazione annullata")
+        if self.callback is not None:
+            self.callback(self.done, self.total, message)
+        self.done += 1
+
+    def finish(self, message="Completato"):
+        """Segnala il completamento di tutte le fasi"""
+        self.done = self.total
+        if self.callback is not None:
+            self.callback(self.done, self.total, message)
+
+
+def _stage(reporter, tracer, message):
+    """Inizia una fase: avanzamento per l'interfaccia e intervallo per la traccia"""
+    reporter.step(message)
+    return tracer.span(message)
+
+
+def _sheet_stats(ws):
+    """Numero di celle di un foglio (non disponibile in modalità streaming di openpyxl)"""
+    if isinstance(ws, XlsxSheet):
+        return {'celle': ws.cells}
+    if isinstance(ws, WriteOnlyWorksheet):
+        return {}
+    return {'celle': len(ws._cells)}
+
+
+def build_workbook(config, architectures=None, write_only=False, risk_trials=DEFAULT_TRIALS, reporter=None,
+                   tracer=NULL_TRACER, diagnostics=False, quote_date=None, formulas=False, sweep=None,
+                   backend='openpyxl'):
+    """Costruisce il workbook completo a partire dalla configurazione.
+
+    Con ``write_only=True`` il workbook viene creato in modalità streaming:
+    le righe sono scritte in ordine e non restano in memoria, per cui il
+    consumo resta costante anche con centinaia di voci di progetto. Il
+    workbook risultante può solo essere salvato.
+
+    ``risk_trials`` è il numero di prove della simulazione Monte Carlo del
+    rischio (0 per non includerla). ``reporter`` riceve una fase per ogni
+    foglio creato, ``tracer`` un intervallo per ogni fase; con
+    ``diagnostics=True`` gli intervalli vengono riassunti nel foglio
+    nascosto "Diagnostica".
+
+    ``architectures`` (default: il catalogo di ``quotation_catalog``) è il
+    dizionario delle architetture selezionabili.
+
+    ``quote_date`` è la data riportata nei fogli (default: oggi); a parità
+    di data e configurazione il contenuto generato è lo stesso.
+
+    Con ``formulas=True`` le tariffe sono nomi definiti nel foglio
+    Configurazione e costi, totali e prezzi sono formule che li usano:
+    chi riceve il file può cambiare tariffe, effort e margini in Excel.
+    Ogni formula è scritta con il suo risultato, quindi il file si apre
+    senza ricalcolo; i percentili Monte Carlo restano valori fissi.
+
+    Con ``sweep`` (un ``quotation_sweep.SweepSpec``) viene aggiunto il
+    foglio Sensibilità con la griglia di scenari, le migliori opzioni entro
+    il budget e il grafico a tornado.
+
+    ``backend`` sceglie come vengono scritti i fogli (``BACKENDS``): con
+    ``'direct'`` le righe diventano subito XML SpreadsheetML
+    (``quotation_xlsx``), senza il modello a oggetti di openpyxl; il
+    contenuto è lo stesso e ``write_only`` non ha effetto.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend sconosciuto: '{backend}' (disponibili: {', '.join(BACKENDS)})")
+    architectures = architectures or default_catalog()
+    quote_date = quote_date or date.today()
+    reporter = reporter or ProgressReporter()
+    config = normalize_config(config)
+    validate_config(config, architectures)
+    arch_data = architectures[config['selected_architecture']]
+    reporter.expect(5 + len(config['baseline_data']) + (sweep is not None))
+
+    # Calcola i numeri una sola volta per tutti i fogli
+    with _stage(reporter, tracer, "Calcolo effort e simulazione rischio"):
+        with tracer.span("Modello effort e costi", category='calcolo'):
+            model = compute_quote_model(config, arch_data)
+        with tracer.span("Simulazione Monte Carlo", category='calcolo', prove=risk_trials):
+            risk = simulate_quote_risk(model, trials=risk_trials) if risk_trials else None
+
+    # Crea il workbook (tutte le formule hanno il risultato già scritto: niente ricalcolo all'apertura)
+    if backend == 'direct':
+        wb = XlsxWorkbook(calc_id=EXCEL_CALC_ID)
+    else:
+        wb = openpyxl.Workbook(write_only=write_only)
+
+        # Rimuovi il foglio default
+        if not write_only:
+            wb.remove(wb.active)
+
+        # Registra gli stili condivisi da tutti i fogli
+        styles.register_styles(wb)
+
+        wb.calculation.calcId = EXCEL_CALC_ID
+        wb.calculation.fullCalcOnLoad = False
+
+    # Crea i fogli (ruolo -> titolo, per i metadati dell'aggiornamento incrementale)
+    titles = {}
+    with _stage(reporter, tracer, "Foglio Dashboard"):
+        ws = create_dashboard_sheet(wb, config, model, risk, quote_date, formulas)
+    tracer.annotate(**_sheet_stats(ws))
+    titles['dashboard'] = ws.title
+    with _stage(reporter, tracer, "Foglio Configurazione"):
+        ws = create_configuration_sheet(wb, config, arch_data, formulas)
+    tracer.annotate(**_sheet_stats(ws))
+    titles['configurazione'] = ws.title
+
+    # Crea fogli baseline
+    for baseline in model.baselines:
+        with _stage(reporter, tracer, f"Foglio {baseline.name}"):
+            ws = create_baseline_sheet(wb, baseline, formulas)
+        tracer.annotate(**_sheet_stats(ws))
+        titles[f'baseline:{baseline.index}'] = ws.title
+
+    with _stage(reporter, tracer, "Foglio Quotazione"):
+        ws = create_quotation_sheet(wb, config, model, risk, quote_date, formulas)
+    tracer.annotate(**_sheet_stats(ws))
+    titles['quotazione'] = ws.title
+    with _stage(reporter, tracer, "Foglio Grafici"):
+        ws = create_charts_sheet(wb, model, risk, formulas)
+    tracer.annotate(**_sheet_stats(ws), grafici=len(ws._charts))
+    titles['grafici'] = ws.title
+
+    if sweep is not None:
+        with _stage(reporter, tracer, "Foglio Sensibilità"):
+            with tracer.span("Griglia scenari", category='calcolo'):
+                result = sweep_quote(config, arch_data, sweep, model)
+            tracer.annotate(combinazioni=result.sweep.combinations)
+            ws = create_sensitivity_sheet(wb, config, result)
+        titles['sensibilita'] = ws.title
+
+    if diagnostics and tracer.enabled:
+        create_diagnostics_sheet(wb, tracer)
+
+    hashes = sheet_input_hashes(config, arch_data, quote_date, risk_trials, formulas, sweep)
+    create_metadata_sheet(wb, titles, hashes, risk_input_hash(config, arch_data, risk_trials), risk)
+
+    return wb
+
+
+class TracedExcelWriter(CachedValueExcelWriter):
+    """``ExcelWriter`` con un intervallo per fase del salvataggio"""
+
+    def __init__(self, workbook, archive, tracer):
+        super().__init__(workbook, archive)
+        self.tracer = tracer
+
+    def write_worksheet(self, ws):
+        with self.tracer.span(f"Scrittura {ws.title}", category='salvataggio'):
+            return super().write_worksheet(ws)
+
+    def _write_charts(self):
+        with self.tracer.span("Scrittura grafici", category='salvataggio', grafici=len(self._charts)):
+            super()._write_charts()
+
+
+def save_workbook(wb, filename, tracer=NULL_TRACER):
+    """Salva il workbook; con un tracer attivo registra le fasi del salvataggio.
+
+    Le fasi non coperte da un intervallo proprio (stili, workbook.xml,
+    compressione) restano nel tempo dell'intervallo padre. Le formule create
+    con ``formula_cell`` vengono salvate insieme al loro risultato.
+    """
+    if isinstance(wb, XlsxWorkbook):
+        wb.save(filename, tracer)
+        tracer.annotate(stringhe=len(wb.strings))
+        return
+    with ZipFile(filename, 'w', ZIP_DEFLATED, allowZip64=True) as archive:
+        wb.properties.modified = datetime.utcnow()
+        if tracer.enabled:
+            TracedExcelWriter(wb, archive, tracer).write_data()
+        else:
+            CachedValueExcelWriter(wb, archive).write_data()
+    # Gli stili delle celle vengono raccolti durante la scrittura dei fogli
+    tracer.annotate(stili_celle=len(wb._cell_styles), stili_nominati=len(wb._named_styles))
+
+
+def generate_quotation(config, filename, architectures=None, write_only=False, risk_trials=DEFAULT_TRIALS,
+                       progress=None, cancel_event=None, tracer=NULL_TRACER, diagnostics=False,
+                       quote_date=None, cache=None, formulas=False, sweep=None, backend='openpyxl'):
+    """Genera e salva il file Excel della quotazione.
+
+    ``progress`` e ``cancel_event`` sono passati a un ``ProgressReporter``;
+    in caso di annullamento il file non viene scritto. ``tracer``,
+    ``diagnostics``, ``quote_date``, ``formulas``, ``sweep`` e ``backend``
+    sono descritti in ``build_workbook``.
+
+    Con ``cache`` (un ``quotation_cache.OutputCache``) un file già generato
+    con gli stessi input viene copiato invece di essere rigenerato; il
+    foglio Diagnostica cambia a ogni esecuzione, quindi non usa la cache.
+    """
+    reporter = ProgressReporter(progress, cancel_event)
+    quote_date = quote_date or date.today()
+
+    key = None
+    if cache is not None and not diagnostics:
+        key = cache_key(config, architectures, quote_date, write_only=write_only, risk_trials=risk_trials,
+                        formulas=formulas, sweep=sweep, backend=backend)
+        with tracer.span("Ricerca in cache", category='cache'):
+            found = cache.get(key, filename)
+        if found:
+            reporter.finish("Copiato dalla cache")
+            return filename
+
+    reporter.expect(1)
+    wb = build_workbook(config, architectures, write_only=write_only, risk_trials=risk_trials, reporter=reporter,
+                        tracer=tracer, diagnostics=diagnostics, quote_date=quote_date, formulas=formulas,
+                        sweep=sweep, backend=backend)
+    with _stage(reporter, tracer, "Salvataggio file"):
+        save_workbook(wb, filename, tracer)
+    if key is not None:
+        cache.put(key, filename)
+    reporter.finish()
+    return filename
+
+
+def styled_cell(ws, value, style):
+    """Crea una cella con uno stile del registro da accodare con ``ws.append``"""
+    if isinstance(ws, XlsxSheet):
+        return XlsxCell(value, style)
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def merge_cells(ws, range_string):
+    """Unisce un intervallo di celle sia in modalità normale che streaming"""
+    if isinstance(ws, XlsxSheet):
+        ws.merge_cells(range_string)
+    elif isinstance(ws, WriteOnlyWorksheet):
+        ws.merged_cells.add(range_string)
+    else:
+        ws.merge_cells(range_string)
+
+
+def set_column_widths(ws, widths):
+    """Imposta le larghezze delle colonne (da fare prima di scrivere le righe)"""
+    if isinstance(ws, XlsxSheet):
+        ws.set_column_widths(widths)
+        return
+    for i, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+
+
+def append_risk_table(ws, risk, header_style):
+    """Accoda la tabella dei percentili Monte Carlo, restituisce le righe scritte"""
+    ws.append([styled_cell(ws, f"🎲 ANALISI RISCHIO (Monte Carlo, {format_thousands(risk.trials)} prove)",
+                           styles.TITLE)])
+
+    headers = ['Baseline']
+    headers.extend(f'Effort P{p} (gg)' for p in PERCENTILES)
+    headers.extend(f'Costo P{p} (€)' for p in PERCENTILES)
+    ws.append([styled_cell(ws, header, header_style) for header in headers])
+
+    for baseline in risk.baselines:
+        row = [styled_cell(ws, baseline.name, styles.BORDERED_CENTER)]
+        row.extend(styled_cell(ws, value, styles.BORDERED_NUMBER) for value in baseline.effort)
+        row.extend(styled_cell(ws, value, styles.BORDERED_CURRENCY) for value in baseline.cost)
+        ws.append(row)
+
+    return 2 + len(risk.baselines)
+
+
+def create_dashboard_sheet(wb, config, model, risk=None, quote_date=None, formulas=False):
+    """Crea il foglio Dashboard"""
+    ws = create_sheet(wb, "📊 Dashboard", 0)
+
+    # Formattazione colonne
+    set_column_widths(ws, [20, 15, 20, 20, 15, 15, 15])
+
+    # Titolo
+    ws.append([styled_cell(ws, f"🚀 DASHBOARD PROGETTO: {config['project_name']}", styles.SHEET_TITLE)])
+    merge_cells(ws, 'A1:F1')
+    ws.append([])
+
+    # Informazioni progetto
+    ws.append([styled_cell(ws, "📋 INFORMAZIONI PROGETTO", styles.TITLE)])
+    ws.append([styled_cell(ws, "Cliente:", styles.BOLD), config['client_name'] or "Non specificato"])
+    ws.append([styled_cell(ws, "Data Creazione:", styles.BOLD), (quote_date or date.today()).strftime("%d/%m/%Y")])
+    ws.append([styled_cell(ws, "Baseline Configurate:", styles.BOLD), len(model.baselines)])
+    ws.append([])
+    ws.append([])
+
+    # Tabella confronto baseline
+    ws.append([styled_cell(ws, "📊 CONFRONTO BASELINE", styles.TITLE)])
+
+    headers = ['Baseline', 'Durata (Q)', 'Effort Totale (gg)', 'Costo Stimato (€)', 'Livello Rischio']
+    ws.append([styled_cell(ws, header, styles.DASHBOARD_HEADER) for header in headers])
+
+    # Dati baseline
+    for baseline in model.baselines:
+        if formulas:
+            effort = formula_cell(ws, f"={baseline_effort_name(baseline.index)}", baseline.total_effort,
+                                  styles.BORDERED_CENTER)
+            cost = formula_cell(ws, f"={baseline_cost_name(baseline.index)}", baseline.total_cost,
+                                styles.BORDERED_CURRENCY)
+        else:
+            effort = styled_cell(ws, baseline.total_effort, styles.BORDERED_CENTER)
+            cost = styled_cell(ws, baseline.total_cost, styles.BORDERED_CURRENCY)
+
+        ws.append([
+            styled_cell(ws, baseline.name, styles.BORDERED_CENTER),
+            styled_cell(ws, baseline.quarters, styles.BORDERED_CENTER),
+            effort,
+            cost,
+            styled_cell(ws, baseline.risk_level, styles.BORDERED_CENTER)
+        ])
+
+    # Analisi di rischio
+    if risk is not None:
+        ws.append([])
+        ws.append([])
+        append_risk_table(ws, risk, styles.DASHBOARD_HEADER)
+
+    return ws
+
+
+def create_configuration_sheet(wb, config, arch_data, formulas=False):
+    """Crea il foglio Configurazione"""
+    ws = create_sheet(wb, "⚙️ Configurazione")
+    roles = allocated_roles(arch_data, tuple(config['rates']))
+
+    # Formattazione colonne
+    set_column_widths(ws, [25, 30] + [18] * (len(roles) - 1))
+
+    # Titolo
+    ws.append([styled_cell(ws, "⚙️ CONFIGURAZIONE PROGETTO", styles.TITLE)])
+    ws.append([])
+
+    # Architettura selezionata
+    ws.append([styled_cell(ws, "🏗️ ARCHITETTURA PROGETTO", styles.SECTION)])
+    ws.append([styled_cell(ws, "Tipo:", styles.LABEL), arch_data['name']])
+    ws.append([styled_cell(ws, "Descrizione:", styles.LABEL), arch_data['description']])
+    ws.append([])
+
+    # Voci di progetto
+    ws.append([styled_cell(ws, "📋 VOCI DI PROGETTO", styles.SECTION)])
+    for i, item in enumerate(arch_data['items'], 1):
+        ws.append([f"{i}.", item])
+    ws.append([])
+
+    # Tariffe
+    ws.append([styled_cell(ws, "💰 TARIFFE CONFIGURATE", styles.SECTION)])
+    ws.append([styled_cell(ws, "Ruolo", styles.LABEL), styled_cell(ws, "Tariffa/giorno (€)", styles.LABEL)])
+    first_rate_row = 11 + len(arch_data['items'])
+    names = rate_names(config['rates'])
+    for row, (role, rate) in enumerate(config['rates'].items(), first_rate_row):
+        ws.append([role, styled_cell(ws, rate, styles.CURRENCY)])
+        if formulas:
+            add_defined_name(wb, names[role], ws, f"B{row}")
+
+    last_rate_row = first_rate_row + len(config['rates']) - 1
+    if formulas and config['rates']:
+        add_validation(ws, f"B{first_rate_row}:B{last_rate_row}", 'decimal',
+                       "La tariffa deve essere un numero non negativo", operator='greaterThanOrEqual', formula1='0')
+
+    # Ripartizione delle voci tra i ruoli (colonne B..: ruoli con almeno una voce)
+    ws.append([])
+    ws.append([styled_cell(ws, "👥 RIPARTIZIONE VOCI PER RUOLO", styles.SECTION)])
+    ws.append([styled_cell(ws, header, styles.LABEL) for header in ["Voce", *roles]])
+
+    rates_row = last_rate_row + 4
+    row = [styled_cell(ws, "Tariffa/giorno (€)", styles.LABEL)]
+    for role in roles:
+        rate = config['rates'][role]
+        row.append(formula_cell(ws, f"={names[role]}", rate, styles.CURRENCY) if formulas
+                   else styled_cell(ws, rate, styles.CURRENCY))
+    ws.append(row)
+
+    for i, item in enumerate(arch_data['items']):
+        allocation = item_allocation(arch_data, i)
+        ws.append([item] + [styled_cell(ws, allocation.get(role, 0) / 100, styles.BORDERED_PERCENT)
+                            for role in roles])
+
+    if formulas and roles and arch_data['items']:
+        last_col = get_column_letter(1 + len(roles))
+        first_item_row = rates_row + 1
+        last_item_row = rates_row + len(arch_data['items'])
+        add_defined_name(wb, ALLOCATION_RATES_NAME, ws, f"B{rates_row}:{last_col}{rates_row}")
+        add_defined_name(wb, ALLOCATION_NAME, ws, f"B{first_item_row}:{last_col}{last_item_row}")
+        add_validation(ws, f"B{first_item_row}:{last_col}{last_item_row}", 'decimal',
+                       "La quota deve essere una percentuale tra 0% e 100%", operator='between',
+                       formula1='0', formula2='1')
+
+    return ws
+
+
+def create_baseline_sheet(wb, baseline, formulas=False):
+    """Crea un foglio per una baseline specifica"""
+    ws = create_sheet(wb, f"📈 {baseline.name}")
+    quarters = baseline.quarters
+
+    # Formattazione colonne
+    set_column_widths(ws, [25] + [12] * quarters + [15, 18, 18])
+
+    # Titolo
+    ws.append([styled_cell(ws, f"📈 {baseline.name} - DETTAGLIO EFFORT", styles.TITLE)])
+    merge_cells(ws, 'A1:H1')
+    ws.append([])
+
+    # Informazioni baseline
+    ws.append([f"Durata: {quarters} quarters"])
+    ws.append([f"Livello Rischio: {baseline.risk_level}"])
+    ws.append([f"Descrizione: {baseline.description}"])
+    ws.append([])
+
+    # Headers tabella
+    header_row = 7
+    headers = ['Voce di Progetto']
+
+    # Aggiungi colonne per ogni quarter
+    for q in range(1, quarters + 1):
+        headers.append(f'Q{q} (gg)')
+
+    headers.extend(['Totale (gg)', 'Tariffa Media (€)', 'Costo Totale (€)'])
+
+    ws.append([styled_cell(ws, header, styles.BASELINE_HEADER) for header in headers])
+
+    # Colonne dopo i quarter: totale, tariffa e costo
+    last_quarter = get_column_letter(quarters + 1)
+    total_col, rate_col, cost_col = (get_column_letter(quarters + offset) for offset in (2, 3, 4))
+    start_row = header_row + 1
+    end_row = header_row + len(baseline.items)
+    totals_row = end_row + 1
+
+    # Dati progetto: effort per quarter, totale, tariffa e costo di ogni voce
+    for i, (item, efforts, item_total, rate, cost) in enumerate(zip(
+            baseline.items, baseline.effort, baseline.item_totals, baseline.item_rates, baseline.item_costs)):
+        row = [styled_cell(ws, item, styles.BORDERED)]
+        row.extend(styled_cell(ws, effort, styles.BORDERED_CENTER) for effort in efforts)
+        if formulas:
+            r = start_row + i
+            row.append(formula_cell(ws, f"=SUM(B{r}:{last_quarter}{r})", item_total, styles.BORDERED_BOLD))
+            row.append(formula_cell(ws, f"=SUMPRODUCT(INDEX({ALLOCATION_NAME},{i + 1},0),{ALLOCATION_RATES_NAME})",
+                                    rate, styles.BORDERED_CURRENCY))
+            row.append(formula_cell(ws, f"={total_col}{r}*{rate_col}{r}", cost, styles.BORDERED_CURRENCY))
+        else:
+            row.append(styled_cell(ws, item_total, styles.BORDERED_BOLD))
+            row.append(styled_cell(ws, rate, styles.BORDERED_CURRENCY))
+            row.append(styled_cell(ws, cost, styles.BORDERED_CURRENCY))
+        ws.append(row)
+
+    # Riga totali
+    row = [styled_cell(ws, "TOTALE", styles.TOTAL)]
+
+    # Totali per quarter (formula per sommare la colonna)
+    for q in range(quarters):
+        col_letter = get_column_letter(q + 2)
+        formula = f"=SUM({col_letter}{start_row}:{col_letter}{end_row})"
+        row.append(formula_cell(ws, formula, baseline.quarter_totals[q], styles.TOTAL_CENTER))
+
+    if formulas:
+        total = f"{total_col}{totals_row}"
+        cost = f"{cost_col}{totals_row}"
+        row.append(formula_cell(ws, f"=SUM({total_col}{start_row}:{total_col}{end_row})", baseline.total_effort,
+                                styles.TOTAL_CENTER))
+        row.append(formula_cell(ws, f"=IF({total}>0,{cost}/{total},0)", baseline.average_rate,
+                                styles.TOTAL_CURRENCY))
+        row.append(formula_cell(ws, f"=SUM({cost_col}{start_row}:{cost_col}{end_row})", baseline.total_cost,
+                                styles.TOTAL_CURRENCY))
+        add_defined_name(wb, baseline_effort_name(baseline.index), ws, total)
+        add_defined_name(wb, baseline_cost_name(baseline.index), ws, cost)
+        if baseline.items:
+            add_validation(ws, f"B{start_row}:{last_quarter}{end_row}", 'whole',
+                           "L'effort deve essere un numero intero di giorni non negativo",
+                           operator='greaterThanOrEqual', formula1='0')
+    else:
+        row.append(styled_cell(ws, baseline.total_effort, styles.TOTAL_CENTER))
+        row.append(styled_cell(ws, baseline.average_rate, styles.TOTAL_CURRENCY))
+        row.append(styled_cell(ws, baseline.total_cost, styles.TOTAL_CURRENCY))
+
+    ws.append(row)
+
+    if baseline.roles:
+        append_role_table(ws, baseline, start_row, end_row, formulas)
+
+    return ws
+
+
+def append_role_table(ws, baseline, start_row, end_row, formulas=False):
+    """Accoda a un foglio baseline effort e costo per ruolo e quarter.
+
+    In modalità formule l'effort di un ruolo in un quarter è la somma
+    dell'effort delle voci pesata sulla loro quota nella ripartizione.
+    """
+    quarters = baseline.quarters
+    last_quarter = get_column_letter(quarters + 1)
+    total_col, rate_col = get_column_letter(quarters + 2), get_column_letter(quarters + 3)
+
+    ws.append([])
+    ws.append([styled_cell(ws, "👥 EFFORT E COSTI PER RUOLO", styles.SECTION)])
+    headers = ['Ruolo'] + [f'Q{q} (gg)' for q in range(1, quarters + 1)]
+    headers.extend(['Totale (gg)', 'Tariffa (€)', 'Costo Totale (€)'])
+    ws.append([styled_cell(ws, header, styles.BASELINE_HEADER) for header in headers])
+
+    # Solo i ruoli con almeno una voce, nell'ordine delle colonne della ripartizione
+    row_index = end_row + 5
+    column = 0
+    names = rate_names(baseline.roles)
+    for role, rate, effort in zip(baseline.roles, baseline.role_rates, baseline.role_effort):
+        if not any(effort):
+            continue
+        column += 1
+        total = sum(effort)
+        cost = total * rate
+        row = [styled_cell(ws, role, styles.BORDERED)]
+        if formulas:
+            for q, value in enumerate(effort):
+                col_letter = get_column_letter(q + 2)
+                formula = f"=SUMPRODUCT({col_letter}${start_row}:{col_letter}${end_row},INDEX({ALLOCATION_NAME},0,{column}))"
+                row.append(formula_cell(ws, formula, value, styles.BORDERED_CENTER))
+            row.append(formula_cell(ws, f"=SUM(B{row_index}:{last_quarter}{row_index})", total, styles.BORDERED_BOLD))
+            row.append(formula_cell(ws, f"={names[role]}", rate, styles.BORDERED_CURRENCY))
+            row.append(formula_cell(ws, f"={total_col}{row_index}*{rate_col}{row_index}", cost,
+                                    styles.BORDERED_CURRENCY))
+        else:
+            row.extend(styled_cell(ws, value, styles.BORDERED_CENTER) for value in effort)
+            row.append(styled_cell(ws, total, styles.BORDERED_BOLD))
+            row.append(styled_cell(ws, rate, styles.BORDERED_CURRENCY))
+            row.append(styled_cell(ws, cost, styles.BORDERED_CURRENCY))
+        ws.append(row)
+        row_index += 1
+
+
+def create_quotation_sheet(wb, config, model, risk=None, quote_date=None, formulas=False):
+    """Crea il foglio Quotazione finale"""
+    ws = create_sheet(wb, "💰 Quotazione")
+
+    # Formattazione colonne
+    set_column_widths(ws, [15, 30, 12, 12, 15, 10, 18])
+
+    # Titolo
+    ws.append([styled_cell(ws, f"💰 QUOTAZIONE FINALE - {config['project_name']}", styles.SHEET_TITLE)])
+    merge_cells(ws, 'A1:F1')
+    ws.append([])
+
+    # Informazioni cliente
+    ws.append([styled_cell(ws, "Cliente:", styles.BOLD), config['client_name'] or "Non specificato"])
+    ws.append([styled_cell(ws, "Data Quotazione:", styles.BOLD), (quote_date or date.today()).strftime("%d/%m/%Y")])
+    ws.append([styled_cell(ws, "Validità Offerta:", styles.BOLD), OFFER_VALIDITY])
+    ws.append([])
+    ws.append([])
+
+    # Tabella opzioni
+    ws.append([styled_cell(ws, "🎯 OPZIONI DI PROGETTO", styles.TITLE)])
+
+    headers = ['Opzione', 'Descrizione', 'Durata', 'Effort (gg)', 'Costo Base (€)', 'Margine %', 'Prezzo Finale (€)']
+    ws.append([styled_cell(ws, header, styles.QUOTATION_HEADER) for header in headers])
+    row = 9
+
+    # Opzioni baseline
+    for baseline in model.baselines:
+        row += 1
+        if formulas:
+            # Margine modificabile: il prezzo è il costo maggiorato del margine
+            figures = [
+                formula_cell(ws, f"={baseline_effort_name(baseline.index)}", baseline.total_effort,
+                             styles.BORDERED_CENTER),
+                formula_cell(ws, f"={baseline_cost_name(baseline.index)}", baseline.total_cost,
+                             styles.BORDERED_CURRENCY),
+                styled_cell(ws, baseline.margin / 100, styles.BORDERED_PERCENT),
+                formula_cell(ws, f"=E{row}*(1+F{row})", baseline.final_price, styles.BORDERED_CURRENCY)
+            ]
+        else:
+            figures = [
+                styled_cell(ws, baseline.total_effort, styles.BORDERED_CENTER),
+                styled_cell(ws, baseline.total_cost, styles.BORDERED_CURRENCY),
+                styled_cell(ws, f"{baseline.margin}%", styles.BORDERED_CENTER),
+                styled_cell(ws, baseline.final_price, styles.BORDERED_CURRENCY)
+            ]
+
+        ws.append([
+            styled_cell(ws, baseline.name, styles.BORDERED_CENTER),
+            styled_cell(ws, baseline.description or 'Scenario standard', styles.BORDERED_CENTER),
+            styled_cell(ws, f"{baseline.quarters} quarters", styles.BORDERED_CENTER),
+            *figures
+        ])
+
+    if formulas and model.baselines:
+        add_validation(ws, f"F10:F{row}", 'decimal', "Il margine deve essere una percentuale non negativa",
+                       operator='greaterThanOrEqual', formula1='0')
+
+    # Analisi di rischio
+    if risk is not None:
+        ws.append([])
+        ws.append([])
+        row += 2 + append_risk_table(ws, risk, styles.QUOTATION_HEADER)
+
+    # Termini e condizioni
+    ws.append([])
+    ws.append([])
+    ws.append([styled_cell(ws, "📋 TERMINI E CONDIZIONI", styles.TITLE)])
+    row += 3
+
+    for term in QUOTATION_TERMS:
+        ws.append([term])
+        row += 1
+        merge_cells(ws, f'A{row}:G{row}')
+
+    return ws
+
+
+def create_charts_sheet(wb, model, risk=None, formulas=False):
+    """Crea il foglio con i grafici"""
+    ws = create_sheet(wb, "📊 Grafici")
+    baseline_count = len(model.baselines)
+
+    # Formattazione
+    set_column_widths(ws, [20, 15, 15, 12])
+
+    # Titolo
+    ws.append([styled_cell(ws, "📊 ANALISI GRAFICHE BASELINE", styles.TITLE)])
+    ws.append([])
+
+    # Crea grafico comparativo baseline
+    ws.append(["Baseline", "Effort Totale (gg)", "Costo (€)", "Durata (Q)"])
+
+    # Dati per il grafico (con le formule i grafici seguono le modifiche alle tariffe)
+    for baseline in model.baselines:
+        if formulas:
+            ws.append([
+                baseline.name,
+                formula_cell(ws, f"={baseline_effort_name(baseline.index)}", baseline.total_effort),
+                formula_cell(ws, f"={baseline_cost_name(baseline.index)}", baseline.total_cost),
+                baseline.quarters
+            ])
+        else:
+            ws.append([baseline.name, baseline.total_effort, baseline.total_cost, baseline.quarters])
+
+    # Crea grafico a colonne
+    chart = BarChart()
+    chart.type = "col"
+    chart.style = 10
+    chart.title = "Confronto Effort per Baseline"
+    chart.y_axis.title = 'Giorni di Effort'
+    chart.x_axis.title = 'Baseline'
+
+    # Dati per il grafico
+    data = Reference(ws, min_col=2, min_row=3, max_row=3+baseline_count, max_col=2)
+    categories = Reference(ws, min_col=1, min_row=4, max_row=3+baseline_count)
+
+    chart.add_data(data, titles_from_data=True)
+    chart.set_categories(categories)
+
+    # Posiziona il grafico
+    ws.add_chart(chart, "F3")
+
+    # Secondo grafico per i costi
+    chart2 = BarChart()
+    chart2.type = "col"
+    chart2.style = 12
+    chart2.title = "Confronto Costi per Baseline"
+    chart2.y_axis.title = 'Costo (€)'
+    chart2.x_axis.title = 'Baseline'
+
+    data2 = Reference(ws, min_col=3, min_row=3, max_row=3+baseline_count, max_col=3)
+    chart2.add_data(data2, titles_from_data=True)
+    chart2.set_categories(categories)
+
+    ws.add_chart(chart2, "F18")
+
+    # Istogramma della simulazione Monte Carlo
+    if risk is not None:
+        ws.append([])
+        ws.append([])
+        header_row = 3 + baseline_count + 3
+        ws.append(["Effort (gg)"] + [baseline.name for baseline in risk.baselines])
+        edges = risk.bin_edges
+        for b, lower in enumerate(edges[:-1]):
+            label = f"{format_thousands(lower)}-{format_thousands(edges[b + 1])}"
+            ws.append([label] + [histogram[b] for histogram in risk.histograms])
+
+        chart3 = BarChart()
+        chart3.type = "col"
+        chart3.grouping = "clustered"
+        chart3.style = 10
+        chart3.title = f"Distribuzione Effort (Monte Carlo, {format_thousands(risk.trials)} prove)"
+        chart3.y_axis.title = 'Prove'
+        chart3.x_axis.title = 'Effort Totale (gg)'
+
+        last_row = header_row + len(edges) - 1
+        data3 = Reference(ws, min_col=2, max_col=1 + baseline_count, min_row=header_row, max_row=last_row)
+        chart3.add_data(data3, titles_from_data=True)
+        chart3.set_categories(Reference(ws, min_col=1, min_row=header_row + 1, max_row=last_row))
+
+        ws.add_chart(chart3, "F33")
+
+    return ws
+
+
+def _grid_range(values, fmt="{}"):
+    """Descrizione compatta dei valori di una griglia: minimo-massimo (n valori)"""
+    low, high = fmt.format(min(values)), fmt.format(max(values))
+    return f"{low}-{high} ({len(values)} valori)" if len(values) > 1 else low
+
+
+def create_sensitivity_sheet(wb, config, result):
+    """Crea il foglio Sensibilità dai risultati di ``quotation_sweep.sweep_quote``.
+
+    I numeri sono un'istantanea dell'analisi (valori fissi anche in
+    modalità formule): con tariffe diverse va rigenerato.
+    """
+    ws = create_sheet(wb, "🎯 Sensibilità")
+    spec, sweep = result.spec, result.sweep
+
+    # Formattazione colonne
+    set_column_widths(ws, [32, 18, 18, 18, 15, 18, 18])
+
+    # Titolo
+    ws.append([styled_cell(ws, f"🎯 ANALISI DI SENSIBILITÀ - {config['project_name']}", styles.SHEET_TITLE)])
+    merge_cells(ws, 'A1:G1')
+    ws.append([])
+
+    # Griglia valutata
+    ws.append([styled_cell(ws, "Combinazioni valutate:", styles.BOLD), format_thousands(sweep.combinations)])
+    ws.append([styled_cell(ws, "Durate (quarter):", styles.BOLD), _grid_range(sweep.quarters)])
+    ws.append([styled_cell(ws, "Moltiplicatori tariffe:", styles.BOLD), _grid_range(sweep.multipliers, "×{:.2f}")])
+    ws.append([styled_cell(ws, "Margini:", styles.BOLD), _grid_range(sweep.margins, "{:g}%")])
+    ws.append([styled_cell(ws, "Budget cliente (€):", styles.BOLD),
+               styled_cell(ws, spec.budget, styles.CURRENCY) if spec.budget is not None else "Non indicato"])
+    ws.append([])
+    ws.append([])
+
+    # Prezzo minimo e massimo di ogni opzione sulla griglia
+    ws.append([styled_cell(ws, "📈 INTERVALLO DI PREZZO PER OPZIONE", styles.TITLE)])
+    headers = ['Opzione', 'Prezzo Minimo (€)', 'Prezzo Nominale (€)', 'Prezzo Massimo (€)']
+    ws.append([styled_cell(ws, header, styles.QUOTATION_HEADER) for header in headers])
+    row = 11
+    for name, baseline_price, (low, high) in zip(sweep.names, result.nominal_prices, price_ranges(sweep)):
+        row += 1
+        ws.append([
+            styled_cell(ws, name, styles.BORDERED_CENTER),
+            styled_cell(ws, low, styles.BORDERED_CURRENCY),
+            styled_cell(ws, baseline_price, styles.BORDERED_CURRENCY),
+            styled_cell(ws, high, styles.BORDERED_CURRENCY)
+        ])
+
+    # Migliori opzioni entro il budget
+    if spec.budget is not None:
+        ws.append([])
+        ws.append([])
+        ws.append([styled_cell(ws, "🏆 MIGLIORI OPZIONI ENTRO IL BUDGET", styles.TITLE)])
+        row += 3 + max(1, len(result.best) + 1)
+        if result.best:
+            headers = ['Opzione', 'Durata (Q)', 'Tariffe', 'Margine %', 'Costo (€)', 'Prezzo (€)', 'Utile (€)']
+            ws.append([styled_cell(ws, header, styles.QUOTATION_HEADER) for header in headers])
+            for option in result.best:
+                ws.append([
+                    styled_cell(ws, option.name, styles.BORDERED_CENTER),
+                    styled_cell(ws, option.quarters, styles.BORDERED_CENTER),
+                    styled_cell(ws, f"×{option.multiplier:.2f}", styles.BORDERED_CENTER),
+                    styled_cell(ws, option.margin / 100, styles.BORDERED_PERCENT),
+                    styled_cell(ws, option.cost, styles.BORDERED_CURRENCY),
+                    styled_cell(ws, option.price, styles.BORDERED_CURRENCY),
+                    styled_cell(ws, option.profit, styles.BORDERED_CURRENCY)
+                ])
+        else:
+            ws.append(["Nessuna combinazione della griglia rientra nel budget"])
+
+    # Tornado: una leva alla volta attorno al punto nominale della baseline di riferimento
+    ws.append([])
+    ws.append([])
+    ws.append([styled_cell(ws, f"🌪️ SENSIBILITÀ DEL PREZZO - {result.focus_name}", styles.TITLE)])
+    ws.append([styled_cell(ws, "Prezzo nominale (€):", styles.BOLD),
+               styled_cell(ws, result.nominal_price, styles.CURRENCY)])
+    header_row = row + 5
+    headers = ['Leva', 'Prezzo Minimo (€)', 'Prezzo Massimo (€)', 'Ribasso (€)', 'Rialzo (€)']
+    ws.append([styled_cell(ws, header, styles.DASHBOARD_HEADER) for header in headers])
+    for factor in result.tornado:
+        low, high = sorted((factor.low_price, factor.high_price))
+        ws.append([
+            styled_cell(ws, factor.factor, styles.BORDERED),
+            styled_cell(ws, low, styles.BORDERED_CURRENCY),
+            styled_cell(ws, high, styles.BORDERED_CURRENCY),
+            styled_cell(ws, low - result.nominal_price, styles.BORDERED_CURRENCY),
+            styled_cell(ws, high - result.nominal_price, styles.BORDERED_CURRENCY)
+        ])
+
+    # Grafico a tornado: barre orizzontali sovrapposte, la leva più influente in alto
+    if result.tornado:
+        chart = BarChart()
+        chart.type = "bar"
+        chart.style = 10
+        chart.overlap = 100
+        chart.title = f"Sensibilità del prezzo - {result.focus_name}"
+        chart.y_axis.title = 'Variazione prezzo (€)'
+        chart.x_axis.scaling.orientation = "maxMin"
+
+        last_row = header_row + len(result.tornado)
+        chart.add_data(Reference(ws, min_col=4, max_col=5, min_row=header_row, max_row=last_row),
+                       titles_from_data=True)
+        chart.set_categories(Reference(ws, min_col=1, min_row=header_row + 1, max_row=last_row))
+        chart.width = 20
+        ws.add_chart(chart, "I3")
+
+    return ws
+
+
+def create_diagnostics_sheet(wb, tracer):
+    """Crea il foglio nascosto Diagnostica con le fasi registrate dal tracer"""
+    ws = create_sheet(wb, "Diagnostica")
+    ws.sheet_state = 'hidden'
+
+    # Formattazione colonne
+    set_column_widths(ws, [40, 15, 12, 18])
+
+    ws.append([styled_cell(ws, "🩺 DIAGNOSTICA GENERAZIONE", styles.TITLE)])
+    ws.append([f"Generato il {datetime.now().strftime('%d/%m/%Y %H:%M')}; il salvataggio non è incluso"])
+    ws.append([])
+
+    headers = ['Fase', 'Durata (ms)', 'Celle', 'Picco memoria (MB)']
+    ws.append([styled_cell(ws, header, styles.DASHBOARD_HEADER) for header in headers])
+
+    for name, depth, seconds, args in tracer.summary():
+        ws.append([
+            styled_cell(ws, "    " * depth + name, styles.BORDERED),
+            styled_cell(ws, round(seconds * 1000, 1), styles.BORDERED_CENTER),
+            styled_cell(ws, args.get('celle', ''), styles.BORDERED_CENTER),
+            styled_cell(ws, args.get('picco_mb', ''), styles.BORDERED_CENTER)
+        ])
+
+    return ws
+
+
+# Foglio nascosto con gli hash degli input di ogni foglio generato
+METADATA_SHEET = "QG_Metadati"
+METADATA_FORMAT = 1
+# Caratteri per cella del risultato della simulazione (Excel ne ammette al massimo 32.767)
+METADATA_CELL_CHARS = 32000
+
+
+def sheet_input_hashes(config, arch_data, quote_date, risk_trials, formulas=False, sweep=None):
+    """Hash degli input di ogni foglio generato, per ruolo.
+
+    Un foglio va rigenerato solo se il suo hash è cambiato; l'impronta del
+    generatore e la modalità formule sono incluse, quindi un aggiornamento
+    del codice o il cambio di modalità rigenerano tutto. Il foglio
+    Sensibilità esiste solo con una griglia ``sweep``.
+    """
+    generator = [generator_fingerprint(), formulas]
+    items = arch_data['items']
+    rates = list(build_rate_card(config['rates'], arch_data))
+    baselines = [[baseline[field] for field in BASELINE_FIELDS] for baseline in config['baseline_data']]
+    summary = {
+        'baselines': baselines,
+        'items': items,
+        'rates': rates,
+        'risk_trials': risk_trials,
+        'generator': generator
+    }
+    header = {
+        'project_name': config['project_name'],
+        'client_name': config['client_name'],
+        'quote_date': quote_date.isoformat()
+    }
+
+    hashes = {
+        'dashboard': content_hash(dict(summary, project_description=config['project_description'], **header)),
+        'configurazione': content_hash({'architecture': arch_data, 'rates': config['rates'], 'generator': generator})
+    }
+    for index, baseline in enumerate(baselines):
+        hashes[f'baseline:{index}'] = content_hash({
+            'index': index, 'baseline': baseline, 'items': items, 'rates': rates, 'generator': generator
+        })
+    hashes['quotazione'] = content_hash(dict(summary, **header))
+    hashes['grafici'] = content_hash(summary)
+    if sweep is not None:
+        hashes['sensibilita'] = content_hash(dict(summary, sweep=list(sweep), project_name=config['project_name']))
+    return hashes
+
+
+def risk_input_hash(config, arch_data, risk_trials):
+    """Hash degli input numerici della simulazione del rischio.
+
+    Nomi e descrizioni delle baseline non influiscono sui campioni, quindi
+    cambiarli non richiede di ripetere la simulazione.
+    """
+    return content_hash({
+        'baselines': [[baseline['quarters'], baseline['risk_level']] for baseline in config['baseline_data']],
+        'items': arch_data['items'],
+        'rates': list(build_rate_card(config['rates'], arch_data)),
+        'risk_trials': risk_trials,
+        'generator': generator_fingerprint()
+    })
+
+
+def create_metadata_sheet(wb, titles, hashes, risk_hash=None, risk=None):
+    """Crea il foglio nascosto con titolo e hash degli input di ogni foglio.
+
+    Il risultato della simulazione viene salvato insieme al proprio hash,
+    così l'aggiornamento incrementale può riusarlo senza ripeterla; il JSON
+    è diviso sulle colonne della riga ``'rischio'`` in parti di
+    ``METADATA_CELL_CHARS`` caratteri.
+    """
+    ws = create_sheet(wb, METADATA_SHEET)
+    ws.sheet_state = 'veryHidden'
+
+    ws.append(['formato', METADATA_FORMAT])
+    for role, title in titles.items():
+        ws.append([role, title, hashes[role]])
+    if risk is not None:
+        payload = json.dumps(risk_to_dict(risk), separators=(',', ':'))
+        parts = [payload[i:i + METADATA_CELL_CHARS] for i in range(0, len(payload), METADATA_CELL_CHARS)]
+        ws.append(['rischio', risk_hash, *parts])
+
+    return ws
+
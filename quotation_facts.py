@@ -0,0 +1,300 @@
+"""Esportazione tabellare di effort e costi per l'analisi (BI).
+
+Una riga per quotazione, baseline, voce e quarter con le colonne
+``FACT_COLUMNS``, calcolate dallo stesso modello dei fogli baseline
+(``compute_quote_model``): il costo di una cella è effort × tariffa della
+voce, come la colonna Costo del foglio.
+
+Formati, scelti dall'estensione del file:
+
+- ``.csv``: sempre disponibile;
+- ``.parquet``: con pyarrow installato (colonne di testo a dizionario);
+- ``.npz``: con NumPy, archivio di array ``.npy`` per colonna.
+
+Tutti gli scrittori ricevono le quotazioni una alla volta e scrivono a
+blocchi di ``CHUNK_ROWS`` righe, quindi la memoria non dipende dal numero
+di quotazioni. ``read_facts`` rilegge il file come dizionario di colonne.
+"""
+import csv
+import os
+import time
+from typing import NamedTuple, Tuple
+from zipfile import ZIP_DEFLATED, ZipFile
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from quotation_catalog import default_catalog
+from quotation_config import load_config, normalize_config, validate_config
+
+HAVE_PARQUET = pq is not None
+
+FACT_COLUMNS = ('quote', 'baseline', 'item', 'quarter', 'effort', 'rate', 'cost')
+TEXT_COLUMNS = ('quote', 'baseline', 'item')
+
+# Righe per blocco (row group del Parquet, array dell'archivio .npz)
+CHUNK_ROWS = 1 << 20
+
+NPZ_FORMAT = 1
+
+
+class FactsResult(NamedTuple):
+    """Esito di ``export_facts``"""
+    quotes: int
+    rows: int
+    errors: Tuple[Tuple[str, str], ...]  # (quotazione, messaggio)
+    seconds: float
+
+
+def fact_format(path):
+    """Formato (``csv``, ``parquet`` o ``npz``) dall'estensione del file; ValueError se non disponibile"""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension not in ('csv', 'parquet', 'npz'):
+        raise ValueError(f"Formato non supportato: '.{extension}' (usare .csv, .parquet o .npz)")
+    if extension == 'parquet' and not HAVE_PARQUET:
+        raise ValueError("Il formato Parquet richiede pyarrow (pip install pyarrow)")
+    if extension == 'npz' and np is None:
+        raise ValueError("Il formato .npz richiede NumPy (pip install numpy)")
+    return extension
+
+
+def fact_rows(quote, model):
+    """Righe ``FACT_COLUMNS`` di una quotazione"""
+    for baseline in model.baselines:
+        for item, efforts, rate in zip(baseline.items, baseline.effort, baseline.item_rates):
+            for quarter, effort in enumerate(efforts, 1):
+                yield quote, baseline.name, item, quarter, effort, rate, effort * rate
+
+
+class CsvFactWriter:
+    """Scrittura delle righe in un file CSV con intestazione"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(FACT_COLUMNS)
+        self.rows = 0
+
+    def write(self, quote, model):
+        before = self.rows
+        for row in fact_rows(quote, model):
+            self.writer.writerow(row)
+            self.rows += 1
+        return self.rows - before
+
+    def close(self):
+        self.file.close()
+
+
+class _ColumnarFactWriter:
+    """Accumula le righe per colonna e le scrive a blocchi.
+
+    Le colonne di testo sono codificate con un dizionario: nel blocco
+    resta il codice intero del valore.
+    """
+
+    def __init__(self):
+        self.dictionaries = {column: {} for column in TEXT_COLUMNS}
+        self.buffer = {column: [] for column in FACT_COLUMNS}
+        self.buffered = 0
+        self.rows = 0
+
+    def _code(self, column, value):
+        dictionary = self.dictionaries[column]
+        code = dictionary.get(value)
+        if code is None:
+            code = dictionary[value] = len(dictionary)
+        return code
+
+    def write(self, quote, model):
+        quote_code = self._code('quote', quote)
+        count = 0
+        for baseline in model.baselines:
+            baseline_code = self._code('baseline', baseline.name)
+            quarters = range(1, baseline.quarters + 1)
+            for item, efforts, rate in zip(baseline.items, baseline.effort, baseline.item_rates):
+                item_code = self._code('item', item)
+                n = len(efforts)
+                self.buffer['quote'].extend([quote_code] * n)
+                self.buffer['baseline'].extend([baseline_code] * n)
+                self.buffer['item'].extend([item_code] * n)
+                self.buffer['quarter'].extend(quarters[:n])
+                self.buffer['effort'].extend(efforts)
+                self.buffer['rate'].extend([rate] * n)
+                self.buffer['cost'].extend(effort * rate for effort in efforts)
+                count += n
+        self.buffered += count
+        self.rows += count
+        if self.buffered >= CHUNK_ROWS:
+            self.flush()
+        return count
+
+    def flush(self):
+        if self.buffered:
+            self._write_chunk(self.buffer)
+        self.buffer = {column: [] for column in FACT_COLUMNS}
+        self.buffered = 0
+
+    def values(self, column):
+        """Valori del dizionario di una colonna di testo, nell'ordine dei codici"""
+        return list(self.dictionaries[column])
+
+
+class NpzFactWriter(_ColumnarFactWriter):
+    """Archivio ``.npz``: un array per colonna e blocco più i dizionari"""
+
+    DTYPES = {'quote': 'int32', 'baseline': 'int32', 'item': 'int32', 'quarter': 'int16',
+              'effort': 'int32', 'rate': 'float64', 'cost': 'float64'}
+
+    def __init__(self, path):
+        super().__init__()
+        self.archive = ZipFile(path, 'w', ZIP_DEFLATED, allowZip64=True)
+        self.chunks = 0
+
+    def _save(self, name, array):
+        with self.archive.open(f"{name}.npy", 'w', force_zip64=True) as f:
+            np.lib.format.write_array(f, array, allow_pickle=False)
+
+    def _write_chunk(self, buffer):
+        for column in FACT_COLUMNS:
+            self._save(f"{column}.{self.chunks:05d}", np.asarray(buffer[column], dtype=self.DTYPES[column]))
+        self.chunks += 1
+
+    def close(self):
+        self.flush()
+        for column in TEXT_COLUMNS:
+            self._save(f"{column}.values", np.array(self.values(column), dtype=str))
+        self._save("format", np.array([NPZ_FORMAT, self.chunks, self.rows], dtype='int64'))
+        self.archive.close()
+
+
+class ParquetFactWriter(_ColumnarFactWriter):
+    """File Parquet con un row group per blocco (richiede pyarrow)"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.schema = pa.schema([
+            ('quote', pa.dictionary(pa.int32(), pa.string())),
+            ('baseline', pa.dictionary(pa.int32(), pa.string())),
+            ('item', pa.dictionary(pa.int32(), pa.string())),
+            ('quarter', pa.int16()),
+            ('effort', pa.int32()),
+            ('rate', pa.float64()),
+            ('cost', pa.float64()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def _write_chunk(self, buffer):
+        arrays = []
+        for field in self.schema:
+            if field.name in TEXT_COLUMNS:
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(buffer[field.name], type=pa.int32()),
+                    pa.array(self.values(field.name), type=pa.string())
+                ))
+            else:
+                arrays.append(pa.array(buffer[field.name], type=field.type))
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+WRITERS = {'csv': CsvFactWriter, 'parquet': ParquetFactWriter, 'npz': NpzFactWriter}
+
+
+def open_fact_writer(path):
+    """Scrittore adatto all'estensione di ``path``"""
+    return WRITERS[fact_format(path)](path)
+
+
+def export_facts(configs, output, architectures=None):
+    """Scrive in ``output`` le righe di tutte le configurazioni.
+
+    ``configs`` è un iterabile di coppie ``(quotazione, configurazione)``:
+    la prima è il valore della colonna ``quote``, la seconda la
+    configurazione o il percorso del suo file JSON. Le configurazioni non
+    valide sono saltate e riportate in ``errors``.
+    """
+    from quotation_model import compute_quote_model
+
+    start = time.perf_counter()
+    architectures = architectures or default_catalog()
+    writer = open_fact_writer(output)
+    quotes = 0
+    errors = []
+    try:
+        for quote, config in configs:
+            quote = str(quote)
+            try:
+                if isinstance(config, str):
+                    config = load_config(config)
+                config = normalize_config(config)
+                validate_config(config, architectures)
+                model = compute_quote_model(config, architectures[config['selected_architecture']])
+            except (OSError, KeyError, TypeError, ValueError, AttributeError) as e:
+                errors.append((quote, str(e)))
+                continue
+            writer.write(quote, model)
+            quotes += 1
+    finally:
+        writer.close()
+    return FactsResult(quotes, writer.rows, tuple(errors), time.perf_counter() - start)
+
+
+def _read_csv(path):
+    columns = {column: [] for column in FACT_COLUMNS}
+    converters = (str, str, str, int, int, float, float)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        if tuple(next(reader, ())) != FACT_COLUMNS:
+            raise ValueError(f"{os.path.basename(path)}: intestazione diversa da {', '.join(FACT_COLUMNS)}")
+        appends = [columns[column].append for column in FACT_COLUMNS]
+        for row in reader:
+            for append, convert, value in zip(appends, converters, row):
+                append(convert(value))
+    return columns
+
+
+def _read_npz(path):
+    with np.load(path, allow_pickle=False) as archive:
+        version, chunks, _ = archive['format']
+        if version != NPZ_FORMAT:
+            raise ValueError(f"{os.path.basename(path)}: formato {version} non supportato")
+        columns = {}
+        for column in FACT_COLUMNS:
+            parts = [archive[f"{column}.{chunk:05d}"] for chunk in range(chunks)]
+            data = np.concatenate(parts) if parts else np.zeros(0, dtype=NpzFactWriter.DTYPES[column])
+            if column in TEXT_COLUMNS:
+                data = archive[f"{column}.values"][data]
+            columns[column] = data
+    return columns
+
+
+def _read_parquet(path):
+    table = pq.read_table(path)
+    columns = {}
+    for column in FACT_COLUMNS:
+        data = table.column(column)
+        if column in TEXT_COLUMNS:
+            data = data.cast(pa.string())
+        columns[column] = data.to_numpy()
+    return columns
+
+
+def read_facts(path):
+    """Rilegge un file esportato come ``{colonna: valori}``.
+
+    Dal CSV si ottengono liste, da ``.npz`` e Parquet array NumPy (le
+    colonne di testo già decodificate).
+    """
+    return {'csv': _read_csv, 'npz': _read_npz, 'parquet': _read_parquet}[fact_format(path)](path)
@@ -0,0 +1,190 @@
+"""Formule con risultato già calcolato e nomi definiti.
+
+openpyxl scrive le formule senza risultato, per cui Excel (e chi legge i
+valori, come pandas) deve ricalcolare il workbook all'apertura.
+``formula_cell`` crea una cella che porta con sé anche il valore calcolato
+in Python: i writer di questo modulo lo scrivono accanto alla formula
+(``<f>`` e ``<v>``), sia in modalità normale che in streaming.
+
+Le tariffe e i totali delle baseline sono esposti come nomi definiti
+(``Tariffa_Developer``, ``Costo_Baseline_1``...), così le formule degli
+altri fogli non dipendono dal titolo dei fogli.
+"""
+import re
+
+from openpyxl.cell import Cell
+from openpyxl.cell._writer import write_cell, _set_attributes
+from openpyxl.comments.comment_sheet import CommentRecord
+from openpyxl.compat import safe_string
+from openpyxl.drawing.spreadsheet_drawing import SpreadsheetDrawing
+from openpyxl.utils import absolute_coordinate, quote_sheetname
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.datavalidation import DataValidation
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+from openpyxl.worksheet._writer import WorksheetWriter
+from openpyxl.writer.excel import ExcelWriter
+from openpyxl.xml.functions import Element, SubElement
+
+from quotation_xlsx import XlsxCell, XlsxSheet, XlsxWorkbook
+
+# Nomi della matrice di ripartizione voci × ruoli e della riga delle sue tariffe
+ALLOCATION_NAME = "Ripartizione"
+ALLOCATION_RATES_NAME = "Ripartizione_Tariffe"
+# Prefisso dei nomi definiti delle tariffe (``Tariffa_Developer``)
+RATE_PREFIX = "Tariffa"
+
+# calcId di Excel 2016 e successivi: con un valore più basso Excel ricalcola
+# comunque tutto il workbook all'apertura
+EXCEL_CALC_ID = 191029
+
+
+class FormulaCell(Cell):
+    """Cella con una formula e il suo risultato già calcolato"""
+
+    __slots__ = ('cached',)
+
+    def __init__(self, worksheet, formula, cached):
+        super().__init__(worksheet, column=1, row=1, value=formula)
+        self.cached = cached
+
+    def _bind_value(self, value):
+        # In streaming openpyxl riusa la cella per i valori successivi della riga
+        super()._bind_value(value)
+        self.cached = None
+
+
+def formula_cell(ws, formula, cached, style=None):
+    """Crea una cella con formula e risultato da accodare con ``ws.append``"""
+    if isinstance(ws, XlsxSheet):
+        return XlsxCell(cached, style, formula)
+    cell = FormulaCell(ws, formula, cached)
+    if style is not None:
+        cell.style = style
+    return cell
+
+
+def _write_formula_cell(xf, cell):
+    formula, attributes = _set_attributes(cell, cell.has_style)
+    if isinstance(cell.cached, str):
+        attributes['t'] = 'str'
+    el = Element('c', attributes)
+    SubElement(el, 'f').text = formula[1:]
+    SubElement(el, 'v').text = safe_string(cell.cached)
+    xf.write(el)
+
+
+class CachedValueWorksheetWriter(WorksheetWriter):
+    """``WorksheetWriter`` che scrive anche il risultato delle ``FormulaCell``"""
+
+    def write_row(self, xf, row, row_idx):
+        attrs = {'r': f"{row_idx}"}
+        attrs.update(self.ws.row_dimensions.get(row_idx, {}))
+
+        with xf.element("row", attrs):
+            for cell in row:
+                if isinstance(cell, FormulaCell) and cell.cached is not None:
+                    _write_formula_cell(xf, cell)
+                    continue
+                if cell._comment is not None:
+                    self.ws._comments.append(CommentRecord.from_cell(cell))
+                if cell._value is None and not cell.has_style and not cell._comment:
+                    continue
+                write_cell(xf, self.ws, cell, cell.has_style)
+
+
+class CachedValueWriteOnlyWorksheet(WriteOnlyWorksheet):
+    """Foglio in streaming che scrive il risultato delle ``FormulaCell``"""
+
+    def _get_writer(self):
+        if self._writer is None:
+            self._writer = CachedValueWorksheetWriter(self)
+            self._writer.write_top()
+
+
+class CachedValueExcelWriter(ExcelWriter):
+    """``ExcelWriter`` che usa ``CachedValueWorksheetWriter`` per i fogli normali"""
+
+    def write_worksheet(self, ws):
+        if self.workbook.write_only:
+            return super().write_worksheet(ws)
+
+        ws._drawing = SpreadsheetDrawing()
+        ws._drawing.charts = ws._charts
+        ws._drawing.images = ws._images
+        writer = CachedValueWorksheetWriter(ws)
+        writer.write()
+
+        ws._rels = writer._rels
+        self._archive.write(writer.out, ws.path[1:])
+        self.manifest.append(ws)
+        writer.cleanup()
+
+
+def create_sheet(wb, title, index=None):
+    """Crea un foglio che scrive il risultato delle formule anche in streaming"""
+    if isinstance(wb, XlsxWorkbook) or not wb.write_only:
+        return wb.create_sheet(title, index)
+    ws = CachedValueWriteOnlyWorksheet(parent=wb, title=title)
+    wb._add_sheet(ws, index)
+    return ws
+
+
+def defined_name(prefix, label):
+    """Nome definito valido per Excel: solo lettere, cifre e trattini bassi"""
+    return prefix + "_" + re.sub(r'\W+', '_', str(label)).strip('_')
+
+
+def add_defined_name(wb, name, ws, coordinate):
+    """Definisce ``name`` come riferimento assoluto a una cella di ``ws``"""
+    reference = f"{quote_sheetname(ws.title)}!{absolute_coordinate(coordinate)}"
+    if isinstance(wb, XlsxWorkbook):
+        wb.defined_names[name] = reference
+    else:
+        wb.defined_names[name] = DefinedName(name, attr_text=reference)
+
+
+def add_validation(ws, cell_range, validation_type, error, **kwargs):
+    """Aggiunge a ``ws`` una convalida dei dati sull'intervallo indicato"""
+    if isinstance(ws, XlsxSheet):
+        ws.add_validation(cell_range, validation_type, error, **kwargs)
+        return
+    validation = DataValidation(type=validation_type, allow_blank=False, showErrorMessage=True,
+                                errorTitle="Valore non valido", error=error, **kwargs)
+    validation.add(cell_range)
+    ws.data_validations.append(validation)
+
+
+def rate_name(role):
+    """Nome definito della tariffa di un ruolo"""
+    return defined_name(RATE_PREFIX, role)
+
+
+def rate_names(roles):
+    """Nomi definiti delle tariffe, ``{ruolo: nome}``.
+
+    Ruoli diversi possono dare lo stesso nome (``Senior Developer`` e
+    ``Senior-Developer``; Excel non distingue maiuscole e minuscole): dal
+    secondo in poi, nell'ordine di ``roles``, il nome riceve un suffisso
+    numerico.
+    """
+    names = {}
+    used = set()
+    for role in roles:
+        name = base = rate_name(role)
+        suffix = 2
+        while name.casefold() in used:
+            name = f"{base}_{suffix}"
+            suffix += 1
+        used.add(name.casefold())
+        names[role] = name
+    return names
+
+
+def baseline_effort_name(index):
+    """Nome definito dell'effort totale della baseline ``index``"""
+    return f"Effort_Baseline_{index + 1}"
+
+
+def baseline_cost_name(index):
+    """Nome definito del costo totale della baseline ``index``"""
+    return f"Costo_Baseline_{index + 1}"
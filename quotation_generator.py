@@ -1,19 +1,40 @@
+import time
+_IMPORT_START = time.perf_counter()  # Per --profile-startup
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-from openpyxl.chart import ColumnChart, Reference
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.datavalidation import DataValidation
-import os
-from datetime import datetime
+import argparse
+import copy
+import importlib
 import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+
+import quotation_config
+from quotation_architecture_picker import ArchitecturePicker
+from quotation_baseline_editor import BaselineEditor
+from quotation_catalog import default_catalog
+from quotation_changes import ChangeNotifier
+from quotation_preview import LivePreview
+
+_IMPORT_END = time.perf_counter()
+
+# Moduli caricati in background dopo l'apertura della finestra, così la
+# prima generazione non paga l'import di openpyxl e NumPy
+WARMUP_MODULES = ('quotation_engine',)
+WARMUP_DELAY_MS = 200
+
+# Moduli pesanti che non devono essere caricati prima del primo disegno
+HEAVY_MODULES = ('openpyxl', 'numpy')
 
 class QuotationGenerator:
     def __init__(self, root):
         self.root = root
         self.root.title("🚀 Generatore Quotazioni Progetti v2.0")
-        self.root.geometry("1000x700")
+        self.root.geometry("1400x750")
         self.root.configure(bg='#f0f0f0')
         
         # Configurazione stili
@@ -26,52 +47,38 @@ class QuotationGenerator:
         self.client_name = tk.StringVar(value="")
         self.project_description = tk.StringVar(value="")
         
-        # Architetture predefinite
-        self.architectures = {
-            "web-app": {
-                "name": "🌐 Web Application",
-                "description": "Frontend, Backend, Database, API, Testing",
-                "items": [
-                    "Frontend Development", "Backend Development", "Database Design",
-                    "API Development", "UI/UX Design", "Testing & QA",
-                    "DevOps & Deployment", "Project Management"
-                ]
-            },
-            "mobile-app": {
-                "name": "📱 Mobile Application", 
-                "description": "iOS, Android, Backend, API, Store Deployment",
-                "items": [
-                    "iOS Development", "Android Development", "Backend Services",
-                    "API Integration", "UI/UX Design", "Testing Mobile",
-                    "App Store Deployment", "Push Notifications", "Project Management"
-                ]
-            },
-            "enterprise": {
-                "name": "🏢 Enterprise Solution",
-                "description": "Microservizi, Integration, Security, Monitoring",
-                "items": [
-                    "Architecture Design", "Microservices Development", "Integration Layer",
-                    "Security Implementation", "Monitoring & Logging", "Data Migration",
-                    "Performance Optimization", "Documentation", "Training", "Project Management"
-                ]
-            },
-            "data-platform": {
-                "name": "📈 Data Platform",
-                "description": "ETL, Analytics, Reporting, ML Pipeline",
-                "items": [
-                    "Data Ingestion", "ETL Development", "Data Warehouse Design",
-                    "Analytics Dashboard", "ML Pipeline", "Data Governance",
-                    "Reporting Tools", "Performance Tuning", "Project Management"
-                ]
-            }
-        }
+        # Catalogo delle architetture (predefinite e cartella su disco), letto al primo uso
+        self.architectures = default_catalog()
         
         # Baseline data storage
         self.baseline_data = []
+
+        # Libreria locale delle configurazioni e id della configurazione aperta da essa
+        self.library = None
+        self.library_id = None
+
+        # Stato della generazione in background
+        self.generation_thread = None
+        self.generation_events = None
+        self.cancel_event = None
+
+        # Notifiche delle modifiche (anteprima, validazione, autosalvataggio)
+        self.changes = ChangeNotifier(self.root)
+        for key, var in (('project_name', self.project_name), ('client_name', self.client_name),
+                         ('selected_architecture', self.selected_architecture)):
+            var.trace_add('write', lambda *_, key=key: self.changes.mark_dirty((key,)))
         
         # Setup UI
         self.create_ui()
         self.update_baselines()
+
+        # Precaricamento del motore quando la finestra è già visibile
+        self.warmup_thread = None
+        self.warmup_seconds = None
+        self.root.after(WARMUP_DELAY_MS, self.start_warmup)
+
+        # Anche il catalogo viene letto dopo il primo disegno
+        self.root.after(WARMUP_DELAY_MS, self.architecture_picker.load)
         
     def setup_styles(self):
         """Configura gli stili dell'interfaccia"""
@@ -99,6 +106,11 @@ class QuotationGenerator:
         main_container = tk.Frame(self.root, bg='#f0f0f0')
         main_container.pack(fill='both', expand=True, padx=20, pady=20)
         
+        # Anteprima dal vivo, agganciata a destra
+        self.live_preview = LivePreview(main_container)
+        self.live_preview.frame.pack(side='right', fill='y', padx=(10, 0))
+        self.changes.subscribe(self.on_configuration_change)
+        
         # Canvas per scrolling
         canvas = tk.Canvas(main_container, bg='#f0f0f0')
         scrollbar = ttk.Scrollbar(main_container, orient='vertical', command=canvas.yview)
@@ -149,7 +161,10 @@ class QuotationGenerator:
         tk.Label(info_grid, text="Descrizione:", font=('Arial', 10, 'bold'), bg='white').grid(row=2, column=0, sticky='nw', pady=5)
         desc_text = tk.Text(info_grid, height=3, width=40, font=('Arial', 10))
         desc_text.grid(row=2, column=1, sticky='ew', pady=5, padx=(10, 0))
-        desc_text.bind('<KeyRelease>', lambda e: self.project_description.set(desc_text.get('1.0', 'end-1c')))
+        desc_text.bind('<KeyRelease>', lambda e: self.changes.mark_dirty(
+            ('project_description',),
+            sync=lambda: self.project_description.set(desc_text.get('1.0', 'end-1c'))
+        ))
         
         info_grid.columnconfigure(1, weight=1)
         
@@ -162,44 +177,24 @@ class QuotationGenerator:
         baseline_control.pack(fill='x', padx=20, pady=10)
         
         tk.Label(baseline_control, text="Numero di Baseline:", font=('Arial', 10, 'bold'), bg='white').pack(side='left')
-        baseline_spin = tk.Spinbox(baseline_control, from_=2, to=5, textvariable=self.baseline_count, 
+        baseline_spin = tk.Spinbox(baseline_control, from_=quotation_config.MIN_BASELINE_COUNT,
+                                  to=quotation_config.MAX_BASELINE_COUNT, textvariable=self.baseline_count,
                                   command=self.update_baselines, width=5, font=('Arial', 10))
         baseline_spin.pack(side='left', padx=(10, 0))
+        baseline_spin.bind('<Return>', lambda e: self.update_baselines())
         
-        # Container per le baseline
-        self.baseline_container = tk.Frame(section_frame, bg='white')
-        self.baseline_container.pack(fill='x', padx=20, pady=10)
+        # Editor delle baseline (pannelli riutilizzati, lista scorrevole)
+        self.baseline_editor = BaselineEditor(section_frame, quotation_config.RISK_LEVELS,
+                                              self.update_baseline_data, before_rebind=self.changes.sync)
+        self.baseline_editor.frame.pack(fill='x', padx=20, pady=10)
         
     def create_architecture_section(self, parent):
         """Sezione selezione architettura"""
         section_frame = self.create_section_frame(parent, "🏗️ Architettura di Progetto")
         
-        arch_grid = tk.Frame(section_frame, bg='white')
-        arch_grid.pack(fill='x', padx=20, pady=10)
-        
-        row = 0
-        col = 0
-        for arch_key, arch_data in self.architectures.items():
-            arch_frame = tk.Frame(arch_grid, bg='#f8f9fa', relief='ridge', bd=2)
-            arch_frame.grid(row=row, column=col, padx=5, pady=5, sticky='ew')
-            
-            radio = tk.Radiobutton(arch_frame, text=arch_data["name"], variable=self.selected_architecture,
-                                 value=arch_key, bg='#f8f9fa', font=('Arial', 10, 'bold'),
-                                 command=self.on_architecture_change)
-            radio.pack(anchor='w', padx=10, pady=5)
-            
-            desc_label = tk.Label(arch_frame, text=arch_data["description"], bg='#f8f9fa', 
-                                 font=('Arial', 9), wraplength=200, justify='left')
-            desc_label.pack(anchor='w', padx=10, pady=(0, 10))
-            
-            col += 1
-            if col > 1:
-                col = 0
-                row += 1
-                
-        # Configura il grid
-        for i in range(2):
-            arch_grid.columnconfigure(i, weight=1)
+        self.architecture_picker = ArchitecturePicker(section_frame, self.architectures, self.selected_architecture,
+                                                      command=self.on_architecture_change)
+        self.architecture_picker.frame.pack(fill='x', padx=20, pady=10)
     
     def create_rates_section(self, parent):
         """Sezione configurazione tariffe"""
@@ -209,14 +204,7 @@ class QuotationGenerator:
         rates_frame.pack(fill='x', padx=20, pady=10)
         
         # Default rates
-        self.rates = {
-            "Senior Developer": 800,
-            "Developer": 600,
-            "Junior Developer": 400,
-            "Project Manager": 900,
-            "Business Analyst": 700,
-            "QA Tester": 500
-        }
+        self.rates = dict(quotation_config.DEFAULT_RATES)
         
         self.rate_vars = {}
         
@@ -229,6 +217,7 @@ class QuotationGenerator:
             tk.Label(rates_frame, text=role, bg='white', font=('Arial', 10)).grid(row=i, column=0, sticky='w', pady=2)
             
             rate_var = tk.IntVar(value=rate)
+            rate_var.trace_add('write', lambda *_, role=role: self.changes.mark_dirty(('rates', role)))
             self.rate_vars[role] = rate_var
             rate_entry = tk.Entry(rates_frame, textvariable=rate_var, width=10, font=('Arial', 10))
             rate_entry.grid(row=i, column=1, pady=2, padx=(10, 0))
@@ -242,10 +231,10 @@ class QuotationGenerator:
         button_frame = tk.Frame(action_frame, bg='#f0f0f0')
         button_frame.pack()
         
-        generate_btn = tk.Button(button_frame, text="🚀 Genera Template Excel", 
-                               command=self.generate_excel, bg='#28a745', fg='white',
-                               font=('Arial', 12, 'bold'), padx=20, pady=10)
-        generate_btn.pack(side='left', padx=10)
+        self.generate_btn = tk.Button(button_frame, text="🚀 Genera Template Excel",
+                                      command=self.generate_excel, bg='#28a745', fg='white',
+                                      font=('Arial', 12, 'bold'), padx=20, pady=10)
+        self.generate_btn.pack(side='left', padx=10)
         
         preview_btn = tk.Button(button_frame, text="👁️ Anteprima Dati", 
                               command=self.preview_data, bg='#17a2b8', fg='white',
@@ -261,7 +250,32 @@ class QuotationGenerator:
                                    command=self.load_configuration, bg='#6c757d', fg='white',
                                    font=('Arial', 12, 'bold'), padx=20, pady=10)
         load_config_btn.pack(side='left', padx=10)
-    
+
+        library_btn = tk.Button(button_frame, text="📚 Libreria",
+                                command=self.open_library, bg='#6f42c1', fg='white',
+                                font=('Arial', 12, 'bold'), padx=20, pady=10)
+        library_btn.pack(side='left', padx=10)
+
+        # Modalità formule: tariffe, effort e margini modificabili nel file Excel
+        self.formula_mode = tk.BooleanVar(value=False)
+        tk.Checkbutton(action_frame, text="🧮 Formule Excel (tariffe e margini modificabili nel file)",
+                       variable=self.formula_mode, bg='#f0f0f0', font=('Arial', 10)).pack(pady=(10, 0))
+
+        # Avanzamento della generazione in background
+        progress_frame = tk.Frame(action_frame, bg='#f0f0f0')
+        progress_frame.pack(fill='x', pady=(15, 0))
+
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate', length=400)
+        self.progress_bar.pack(side='left', padx=10)
+
+        self.progress_label = tk.Label(progress_frame, text="", bg='#f0f0f0', font=('Arial', 10))
+        self.progress_label.pack(side='left', padx=10)
+
+        self.cancel_btn = tk.Button(progress_frame, text="⛔ Annulla", command=self.cancel_generation,
+                                    bg='#dc3545', fg='white', font=('Arial', 10, 'bold'),
+                                    state='disabled')
+        self.cancel_btn.pack(side='right', padx=10)
+
     def create_section_frame(self, parent, title):
         """Crea un frame sezione con titolo"""
         section = tk.Frame(parent, bg='#f0f0f0')
@@ -282,81 +296,76 @@ class QuotationGenerator:
         return content_frame
     
     def update_baselines(self):
-        """Aggiorna la visualizzazione delle baseline"""
-        # Pulisci container esistente
-        for widget in self.baseline_container.winfo_children():
-            widget.destroy()
-            
-        # Inizializza baseline_data se necessario
-        current_count = self.baseline_count.get()
+        """Allinea le baseline al numero richiesto e aggiorna l'editor"""
+        try:
+            requested = self.baseline_count.get()
+        except tk.TclError:
+            requested = len(self.baseline_data)  # Valore non numerico digitato
+        current_count = max(quotation_config.MIN_BASELINE_COUNT,
+                            min(requested, quotation_config.MAX_BASELINE_COUNT))
+        if current_count != requested:
+            self.baseline_count.set(current_count)
+
         while len(self.baseline_data) < current_count:
-            self.baseline_data.append({
-                'name': f'Baseline {len(self.baseline_data) + 1}',
-                'quarters': 4,
-                'description': '',
-                'risk_level': 'Medio'
-            })
+            self.baseline_data.append(quotation_config.default_baseline(len(self.baseline_data)))
         
         # Rimuovi baseline in eccesso
-        self.baseline_data = self.baseline_data[:current_count]
+        del self.baseline_data[current_count:]
         
-        # Crea UI per ogni baseline
-        for i in range(current_count):
-            baseline_frame = tk.LabelFrame(self.baseline_container, text=f"Baseline {i+1}", 
-                                         bg='white', font=('Arial', 10, 'bold'))
-            baseline_frame.pack(fill='x', pady=5)
-            
-            # Grid per i campi
-            grid = tk.Frame(baseline_frame, bg='white')
-            grid.pack(fill='x', padx=10, pady=10)
-            
-            # Nome baseline
-            tk.Label(grid, text="Nome:", bg='white', font=('Arial', 9)).grid(row=0, column=0, sticky='w')
-            name_var = tk.StringVar(value=self.baseline_data[i]['name'])
-            name_entry = tk.Entry(grid, textvariable=name_var, width=20, font=('Arial', 9))
-            name_entry.grid(row=0, column=1, padx=5)
-            name_entry.bind('<KeyRelease>', lambda e, idx=i, var=name_var: self.update_baseline_data(idx, 'name', var.get()))
-            
-            # Durata in quarters
-            tk.Label(grid, text="Durata (Q):", bg='white', font=('Arial', 9)).grid(row=0, column=2, sticky='w', padx=(20, 0))
-            quarters_var = tk.IntVar(value=self.baseline_data[i]['quarters'])
-            quarters_spin = tk.Spinbox(grid, from_=2, to=12, textvariable=quarters_var, width=5, font=('Arial', 9))
-            quarters_spin.grid(row=0, column=3, padx=5)
-            quarters_spin.bind('<KeyRelease>', lambda e, idx=i, var=quarters_var: self.update_baseline_data(idx, 'quarters', var.get()))
-            
-            # Livello di rischio
-            tk.Label(grid, text="Rischio:", bg='white', font=('Arial', 9)).grid(row=0, column=4, sticky='w', padx=(20, 0))
-            risk_var = tk.StringVar(value=self.baseline_data[i]['risk_level'])
-            risk_combo = ttk.Combobox(grid, textvariable=risk_var, values=['Basso', 'Medio', 'Alto', 'Molto Alto'], 
-                                    width=10, font=('Arial', 9), state='readonly')
-            risk_combo.grid(row=0, column=5, padx=5)
-            risk_combo.bind('<<ComboboxSelected>>', lambda e, idx=i, var=risk_var: self.update_baseline_data(idx, 'risk_level', var.get()))
-            
-            # Descrizione
-            tk.Label(grid, text="Descrizione:", bg='white', font=('Arial', 9)).grid(row=1, column=0, sticky='nw', pady=(10, 0))
-            desc_text = tk.Text(grid, height=2, width=60, font=('Arial', 9))
-            desc_text.grid(row=1, column=1, columnspan=5, sticky='ew', pady=(10, 0), padx=5)
-            desc_text.insert('1.0', self.baseline_data[i]['description'])
-            desc_text.bind('<KeyRelease>', lambda e, idx=i, text=desc_text: self.update_baseline_data(idx, 'description', text.get('1.0', 'end-1c')))
-            
-            grid.columnconfigure(1, weight=1)
+        self.baseline_editor.set_baselines(self.baseline_data)
+        self.changes.mark_dirty(('baseline_data',))
     
     def update_baseline_data(self, index, field, value):
-        """Aggiorna i dati di una baseline"""
-        if index < len(self.baseline_data):
-            self.baseline_data[index][field] = value
+        """Aggiorna i dati di una baseline e segnala la modifica"""
+        if index >= len(self.baseline_data):
+            return
+        baseline = self.baseline_data[index]
+        key = ('baseline_data', index, field)
+        if callable(value):
+            # Lettura differita (descrizione): il testo viene copiato una volta sola
+            self.changes.mark_dirty(key, sync=lambda: baseline.__setitem__(field, value()))
+        else:
+            baseline[field] = value
+            self.changes.mark_dirty(key)
+    
+    def current_architecture(self):
+        """Architettura selezionata; ``None`` se assente dal catalogo o non leggibile"""
+        try:
+            return self.architectures.get(self.selected_architecture.get())
+        except (OSError, ValueError):
+            return None
+
+    def on_configuration_change(self, dirty):
+        """Aggiorna l'anteprima dal vivo con le sole baseline modificate"""
+        arch_data = self.current_architecture()
+        if arch_data is not None:
+            self.live_preview.refresh(self.baseline_data, arch_data, dirty, self.current_rates())
+
+    def current_rates(self):
+        """Tariffe inserite; quelle non valide durante la digitazione restano di default"""
+        rates = dict(quotation_config.DEFAULT_RATES)
+        for role, var in self.rate_vars.items():
+            try:
+                rates[role] = var.get()
+            except tk.TclError:
+                pass
+        return rates
     
     def on_architecture_change(self):
         """Callback per cambio architettura"""
-        # Qui puoi aggiungere logica per aggiornare preview o altro
+        # Gli iscritti alle modifiche vengono avvisati tramite la variabile
         pass
     
     def preview_data(self):
         """Mostra anteprima dei dati configurati"""
+        self.changes.sync()
         preview_window = tk.Toplevel(self.root)
         preview_window.title("📋 Anteprima Configurazione")
         preview_window.geometry("600x500")
         preview_window.configure(bg='white')
+
+        tk.Button(preview_window, text="🌐 Anteprima Quotazione nel Browser", command=self.open_html_preview,
+                  bg='#17a2b8', fg='white', font=('Arial', 10, 'bold')).pack(side='bottom', pady=(0, 15))
         
         # Testo con scroll
         text_frame = tk.Frame(preview_window, bg='white')
@@ -388,16 +397,22 @@ class QuotationGenerator:
   • Descrizione: {baseline['description'] or 'Non specificata'}
 """
         
-        arch_data = self.architectures[self.selected_architecture.get()]
-        preview_content += f"""
+        arch_data = self.current_architecture()
+        if arch_data is None:
+            preview_content += f"""
+🏗️ ARCHITETTURA SELEZIONATA:
+• ⚠️ '{self.selected_architecture.get()}' non presente nel catalogo
+"""
+        else:
+            preview_content += f"""
 🏗️ ARCHITETTURA SELEZIONATA:
 • {arch_data['name']}
 • {arch_data['description']}
 
 📋 VOCI DI PROGETTO:
 """
-        for i, item in enumerate(arch_data['items'], 1):
-            preview_content += f"  {i}. {item}\n"
+            for i, item in enumerate(arch_data['items'], 1):
+                preview_content += f"  {i}. {item}\n"
         
         preview_content += f"""
 💰 TARIFFE CONFIGURATE:
@@ -411,9 +426,34 @@ class QuotationGenerator:
         text_widget.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
     
-    def save_configuration(self):
-        """Salva la configurazione in un file JSON"""
-        config = {
+    def open_html_preview(self):
+        """Apre nel browser Dashboard, Quotazione e Grafici senza generare il file Excel"""
+        # Import differiti: il renderer carica NumPy per la simulazione del rischio
+        import pathlib
+        import tempfile
+        import webbrowser
+        from quotation_html import render_html
+
+        try:
+            page = render_html(copy.deepcopy(self.get_configuration()), self.architectures)
+        except (KeyError, TypeError, ValueError) as e:
+            messagebox.showerror("Errore", str(e))
+            return
+
+        # Un solo file per sessione, sovrascritto a ogni anteprima
+        path = os.path.join(tempfile.gettempdir(), f"anteprima_quotazione_{os.getpid()}.html")
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(page)
+        except OSError as e:
+            messagebox.showerror("Errore", f"Impossibile scrivere l'anteprima:\n{e}")
+            return
+        webbrowser.open(pathlib.Path(path).as_uri())
+
+    def get_configuration(self):
+        """Restituisce la configurazione corrente come dizionario"""
+        self.changes.sync()
+        return {
             'project_name': self.project_name.get(),
             'client_name': self.client_name.get(),
             'project_description': self.project_description.get(),
@@ -422,6 +462,10 @@ class QuotationGenerator:
             'baseline_data': self.baseline_data,
             'rates': {role: var.get() for role, var in self.rate_vars.items()}
         }
+    
+    def save_configuration(self):
+        """Salva la configurazione in un file JSON"""
+        config = self.get_configuration()
         
         filename = filedialog.asksaveasfilename(
             defaultextension=".json",
@@ -449,528 +493,230 @@ class QuotationGenerator:
                 with open(filename, 'r', encoding='utf-8') as f:
                     config = json.load(f)
                 
-                # Aggiorna le variabili
-                self.project_name.set(config.get('project_name', ''))
-                self.client_name.set(config.get('client_name', ''))
-                self.project_description.set(config.get('project_description', ''))
-                self.baseline_count.set(config.get('baseline_count', 3))
-                self.selected_architecture.set(config.get('selected_architecture', 'enterprise'))
-                self.baseline_data = config.get('baseline_data', [])
-                
-                # Aggiorna tariffe
-                rates_config = config.get('rates', {})
-                for role, var in self.rate_vars.items():
-                    var.set(rates_config.get(role, self.rates[role]))
-                
-                # Ricarica UI
-                self.update_baselines()
+                self.apply_configuration(config)
+                self.library_id = None
                 
                 messagebox.showinfo("Successo", "Configurazione caricata con successo!")
                 
             except Exception as e:
                 messagebox.showerror("Errore", f"Errore durante il caricamento: {str(e)}")
+
+    def apply_configuration(self, config):
+        """Mostra nell'interfaccia una configurazione salvata"""
+        # Aggiorna le variabili
+        self.project_name.set(config.get('project_name', ''))
+        self.client_name.set(config.get('client_name', ''))
+        self.project_description.set(config.get('project_description', ''))
+        self.baseline_count.set(config.get('baseline_count', 3))
+        self.selected_architecture.set(config.get('selected_architecture', 'enterprise'))
+        self.baseline_data = config.get('baseline_data', [])
+        
+        # Aggiorna tariffe
+        rates_config = config.get('rates', {})
+        for role, var in self.rate_vars.items():
+            var.set(rates_config.get(role, self.rates[role]))
+        
+        # Ricarica UI
+        self.update_baselines()
+
+    def open_library(self):
+        """Apre la libreria delle configurazioni (il database viene aperto al primo uso)"""
+        from quotation_library import QuoteLibrary
+        from quotation_library_window import LibraryWindow
+
+        if self.library is None:
+            try:
+                self.library = QuoteLibrary()
+            except Exception as e:
+                messagebox.showerror("Errore", f"Impossibile aprire la libreria: {str(e)}")
+                return
+
+        def on_open(quote_id, config):
+            self.apply_configuration(config)
+            self.library_id = quote_id
+
+        def on_saved(quote_id):
+            self.library_id = quote_id
+
+        LibraryWindow(self.root, self.library, on_open,
+                      lambda: (self.library_id, self.get_configuration()), on_saved)
     
+    def start_warmup(self):
+        """Avvia il precaricamento dei moduli del motore in un thread"""
+        if self.warmup_thread is None:
+            self.warmup_thread = threading.Thread(target=self._warmup, daemon=True)
+            self.warmup_thread.start()
+
+    def _warmup(self):
+        start = time.perf_counter()
+        for name in WARMUP_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                return  # L'errore verrà mostrato alla generazione
+        self.warmup_seconds = time.perf_counter() - start
+
     def generate_excel(self):
-        """Genera il file Excel completo"""
+        """Genera il file Excel completo in un thread separato"""
+        if self.generation_thread is not None:
+            return  # Generazione già in corso
+
         if not self.project_name.get().strip():
             messagebox.showerror("Errore", "Il nome del progetto è obbligatorio!")
             return
         
+        config = copy.deepcopy(self.get_configuration())
+        
         # Chiedi dove salvare il file
         filename = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
             filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
             title="Salva Template Excel",
-            initialname=f"Quotazione_{self.project_name.get().replace(' ', '_')}.xlsx"
+            initialfile=quotation_config.default_filename(config)
         )
         
         if not filename:
             return
-        
+
+        self.cancel_event = threading.Event()
+        self.generation_events = queue.Queue()
+        self.generate_btn.config(state='disabled')
+        self.cancel_btn.config(state='normal')
+        self.progress_bar['value'] = 0
+        self.progress_label.config(text="Avvio generazione...")
+
+        self.generation_thread = threading.Thread(
+            target=self._run_generation, args=(config, filename, self.formula_mode.get()), daemon=True
+        )
+        self.generation_thread.start()
+        self.root.after(50, self._poll_generation)
+
+    def _run_generation(self, config, filename, formulas=False):
+        """Corpo del thread di generazione: comunica con la UI solo tramite la coda"""
+        events = self.generation_events
+
+        def progress(done, total, message):
+            events.put(('progress', done, total, message))
+
         try:
-            # Crea il workbook
-            wb = openpyxl.Workbook()
-            
-            # Rimuovi il foglio default
-            wb.remove(wb.active)
-            
-            # Crea i fogli
-            self.create_dashboard_sheet(wb)
-            self.create_configuration_sheet(wb)
-            
-            # Crea fogli baseline
-            for i, baseline in enumerate(self.baseline_data):
-                self.create_baseline_sheet(wb, i, baseline)
-            
-            self.create_quotation_sheet(wb)
-            self.create_charts_sheet(wb)
-            
-            # Salva il file
-            wb.save(filename)
-            
-            messagebox.showinfo("Successo!", 
-                              f"Template Excel generato con successo!\n\nFile salvato: {filename}\n\n"
-                              f"Il template include:\n"
-                              f"• Dashboard esecutiva\n"
-                              f"• {len(self.baseline_data)} baseline configurate\n"
-                              f"• Calcoli automatici\n"
-                              f"• Grafici dinamici\n"
-                              f"• Formule Excel avanzate")
-            
+            # Il motore (openpyxl, NumPy) viene caricato solo alla prima generazione
+            import quotation_engine
+        except ImportError as e:
+            events.put(('error', str(e)))
+            return
+
+        try:
+            quotation_engine.generate_quotation(
+                config, filename, progress=progress, cancel_event=self.cancel_event, formulas=formulas
+            )
+            events.put(('done', filename, len(config['baseline_data'])))
+        except quotation_engine.GenerationCancelled:
+            events.put(('cancelled',))
         except Exception as e:
-            messagebox.showerror("Errore", f"Errore durante la generazione del file Excel:\n{str(e)}")
-    
-    def create_dashboard_sheet(self, wb):
-        """Crea il foglio Dashboard"""
-        ws = wb.create_sheet("📊 Dashboard", 0)
-        
-        # Stili
-        header_font = Font(bold=True, size=14, color="FFFFFF")
-        header_fill = PatternFill(start_color="2C3E50", end_color="2C3E50", fill_type="solid")
-        title_font = Font(bold=True, size=16)
-        border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                       top=Side(style='thin'), bottom=Side(style='thin'))
-        
-        # Titolo
-        ws['A1'] = f"🚀 DASHBOARD PROGETTO: {self.project_name.get()}"
-        ws['A1'].font = Font(bold=True, size=18)
-        ws.merge_cells('A1:F1')
-        
-        # Informazioni progetto
-        row = 3
-        ws[f'A{row}'] = "📋 INFORMAZIONI PROGETTO"
-        ws[f'A{row}'].font = title_font
-        
-        row += 1
-        ws[f'A{row}'] = "Cliente:"
-        ws[f'B{row}'] = self.client_name.get() or "Non specificato"
-        ws[f'A{row}'].font = Font(bold=True)
-        
-        row += 1
-        ws[f'A{row}'] = "Data Creazione:"
-        ws[f'B{row}'] = datetime.now().strftime("%d/%m/%Y")
-        ws[f'A{row}'].font = Font(bold=True)
-        
-        row += 1
-        ws[f'A{row}'] = "Baseline Configurate:"
-        ws[f'B{row}'] = len(self.baseline_data)
-        ws[f'A{row}'].font = Font(bold=True)
-        
-        # Tabella confronto baseline
-        row += 3
-        ws[f'A{row}'] = "📊 CONFRONTO BASELINE"
-        ws[f'A{row}'].font = title_font
-        
-        row += 1
-        headers = ['Baseline', 'Durata (Q)', 'Effort Totale (gg)', 'Costo Stimato (€)', 'Livello Rischio']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=row, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Dati baseline
-        for i, baseline in enumerate(self.baseline_data):
-            row += 1
-            effort_total = 120 + (i * 40)  # Formula esempio
-            cost = effort_total * 600  # Tariffa media
-            
-            data = [
-                baseline['name'],
-                baseline['quarters'],
-                effort_total,
-                cost,
-                baseline['risk_level']
-            ]
-            
-            for col, value in enumerate(data, 1):
-                cell = ws.cell(row=row, column=col, value=value)
-                cell.border = border
-                if col == 3:  # Costo
-                    cell.number_format = '€#,##0'
-                cell.alignment = Alignment(horizontal='center')
-        
-        # Formattazione colonne
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 20
-        ws.column_dimensions['D'].width = 20
-        ws.column_dimensions['E'].width = 15
-    
-    def create_configuration_sheet(self, wb):
-        """Crea il foglio Configurazione"""
-        ws = wb.create_sheet("⚙️ Configurazione")
-        
-        # Stili
-        header_font = Font(bold=True, size=12)
-        title_font = Font(bold=True, size=14)
-        
-        # Titolo
-        ws['A1'] = "⚙️ CONFIGURAZIONE PROGETTO"
-        ws['A1'].font = Font(bold=True, size=16)
-        
-        row = 3
-        
-        # Architettura selezionata
-        ws[f'A{row}'] = "🏗️ ARCHITETTURA PROGETTO"
-        ws[f'A{row}'].font = title_font
-        row += 1
-        
-        arch_data = self.architectures[self.selected_architecture.get()]
-        ws[f'A{row}'] = "Tipo:"
-        ws[f'B{row}'] = arch_data['name']
-        ws[f'A{row}'].font = header_font
-        row += 1
-        
-        ws[f'A{row}'] = "Descrizione:"
-        ws[f'B{row}'] = arch_data['description']
-        ws[f'A{row}'].font = header_font
-        row += 2
-        
-        # Voci di progetto
-        ws[f'A{row}'] = "📋 VOCI DI PROGETTO"
-        ws[f'A{row}'].font = title_font
-        row += 1
-        
-        for i, item in enumerate(arch_data['items'], 1):
-            ws[f'A{row}'] = f"{i}."
-            ws[f'B{row}'] = item
-            row += 1
-        
-        row += 1
-        
-        # Tariffe
-        ws[f'A{row}'] = "💰 TARIFFE CONFIGURATE"
-        ws[f'A{row}'].font = title_font
-        row += 1
-        
-        ws[f'A{row}'] = "Ruolo"
-        ws[f'B{row}'] = "Tariffa/giorno (€)"
-        ws[f'A{row}'].font = header_font
-        ws[f'B{row}'].font = header_font
-        row += 1
-        
-        for role, rate_var in self.rate_vars.items():
-            ws[f'A{row}'] = role
-            ws[f'B{row}'] = rate_var.get()
-            ws[f'B{row}'].number_format = '€#,##0'
-            row += 1
-        
-        # Formattazione colonne
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 30
-    
-    def create_baseline_sheet(self, wb, index, baseline):
-        """Crea un foglio per una baseline specifica"""
-        ws = wb.create_sheet(f"📈 {baseline['name']}")
-        
-        # Stili
-        header_font = Font(bold=True, size=12, color="FFFFFF")
-        header_fill = PatternFill(start_color="3498DB", end_color="3498DB", fill_type="solid")
-        total_font = Font(bold=True)
-        total_fill = PatternFill(start_color="E8E8E8", end_color="E8E8E8", fill_type="solid")
-        border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                       top=Side(style='thin'), bottom=Side(style='thin'))
-        
-        # Titolo
-        ws['A1'] = f"📈 {baseline['name']} - DETTAGLIO EFFORT"
-        ws['A1'].font = Font(bold=True, size=16)
-        ws.merge_cells('A1:H1')
-        
-        # Informazioni baseline
-        ws['A3'] = f"Durata: {baseline['quarters']} quarters"
-        ws['A4'] = f"Livello Rischio: {baseline['risk_level']}"
-        ws['A5'] = f"Descrizione: {baseline['description']}"
-        
-        # Headers tabella
-        row = 7
-        headers = ['Voce di Progetto']
-        
-        # Aggiungi colonne per ogni quarter
-        for q in range(1, baseline['quarters'] + 1):
-            headers.append(f'Q{q} (gg)')
-        
-        headers.extend(['Totale (gg)', 'Tariffa Media (€)', 'Costo Totale (€)'])
-        
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=row, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Dati progetto
-        arch_data = self.architectures[self.selected_architecture.get()]
-        project_items = arch_data['items']
-        
-        total_effort = 0
-        total_cost = 0
-        
-        for item_index, item in enumerate(project_items):
-            row += 1
-            ws.cell(row=row, column=1, value=item).border = border
-            
-            # Calcola effort per quarter (simulato)
-            item_total_effort = 0
-            quarters_effort = []
-            
-            base_effort = 5 + (index * 2)  # Effort base crescente per baseline
-            for q in range(baseline['quarters']):
-                # Distribuzione effort simulata
-                if q == 0:  # Q1 - più effort per analisi/setup
-                    effort = base_effort + (item_index % 3) * 2
-                elif q == baseline['quarters'] - 1:  # Ultimo quarter - meno effort
-                    effort = max(2, base_effort - 2)
-                else:  # Quarter intermedi
-                    effort = base_effort + (item_index % 4)
-                
-                quarters_effort.append(effort)
-                item_total_effort += effort
-                
-                # Inserisci valore nella cella
-                cell = ws.cell(row=row, column=q+2, value=effort)
-                cell.border = border
-                cell.alignment = Alignment(horizontal='center')
-            
-            # Totale effort per item
-            cell = ws.cell(row=row, column=baseline['quarters']+2, value=item_total_effort)
-            cell.border = border
-            cell.font = total_font
-            cell.alignment = Alignment(horizontal='center')
-            
-            # Tariffa media (simulata in base al tipo di lavoro)
-            avg_rate = 600 + (item_index % 3) * 100  # Tariffa variabile
-            cell = ws.cell(row=row, column=baseline['quarters']+3, value=avg_rate)
-            cell.border = border
-            cell.number_format = '€#,##0'
-            cell.alignment = Alignment(horizontal='center')
-            
-            # Costo totale
-            item_cost = item_total_effort * avg_rate
-            cell = ws.cell(row=row, column=baseline['quarters']+4, value=item_cost)
-            cell.border = border
-            cell.number_format = '€#,##0'
-            cell.alignment = Alignment(horizontal='center')
-            
-            total_effort += item_total_effort
-            total_cost += item_cost
-        
-        # Riga totali
-        row += 1
-        cell = ws.cell(row=row, column=1, value="TOTALE")
-        cell.font = total_font
-        cell.fill = total_fill
-        cell.border = border
-        
-        # Totali per quarter
-        for q in range(baseline['quarters']):
-            # Formula per sommare la colonna
-            start_row = 8
-            end_row = row - 1
-            col_letter = get_column_letter(q + 2)
-            formula = f"=SUM({col_letter}{start_row}:{col_letter}{end_row})"
-            
-            cell = ws.cell(row=row, column=q+2, value=formula)
-            cell.font = total_font
-            cell.fill = total_fill
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Totale effort
-        cell = ws.cell(row=row, column=baseline['quarters']+2, value=total_effort)
-        cell.font = total_font
-        cell.fill = total_fill
-        cell.border = border
-        cell.alignment = Alignment(horizontal='center')
-        
-        # Media tariffe
-        avg_total_rate = total_cost / total_effort if total_effort > 0 else 0
-        cell = ws.cell(row=row, column=baseline['quarters']+3, value=avg_total_rate)
-        cell.font = total_font
-        cell.fill = total_fill
-        cell.border = border
-        cell.number_format = '€#,##0'
-        cell.alignment = Alignment(horizontal='center')
-        
-        # Totale costo
-        cell = ws.cell(row=row, column=baseline['quarters']+4, value=total_cost)
-        cell.font = total_font
-        cell.fill = total_fill
-        cell.border = border
-        cell.number_format = '€#,##0'
-        cell.alignment = Alignment(horizontal='center')
-        
-        # Formattazione colonne
-        ws.column_dimensions['A'].width = 25
-        for q in range(baseline['quarters']):
-            ws.column_dimensions[get_column_letter(q+2)].width = 12
-        ws.column_dimensions[get_column_letter(baseline['quarters']+2)].width = 15
-        ws.column_dimensions[get_column_letter(baseline['quarters']+3)].width = 18
-        ws.column_dimensions[get_column_letter(baseline['quarters']+4)].width = 18
-    
-    def create_quotation_sheet(self, wb):
-        """Crea il foglio Quotazione finale"""
-        ws = wb.create_sheet("💰 Quotazione")
-        
-        # Stili
-        header_font = Font(bold=True, size=14, color="FFFFFF")
-        header_fill = PatternFill(start_color="27AE60", end_color="27AE60", fill_type="solid")
-        title_font = Font(bold=True, size=16)
-        border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                       top=Side(style='thin'), bottom=Side(style='thin'))
-        
-        # Titolo
-        ws['A1'] = f"💰 QUOTAZIONE FINALE - {self.project_name.get()}"
-        ws['A1'].font = Font(bold=True, size=18)
-        ws.merge_cells('A1:F1')
-        
-        # Informazioni cliente
-        row = 3
-        ws[f'A{row}'] = "Cliente:"
-        ws[f'B{row}'] = self.client_name.get() or "Non specificato"
-        ws[f'A{row}'].font = Font(bold=True)
-        
-        row += 1
-        ws[f'A{row}'] = "Data Quotazione:"
-        ws[f'B{row}'] = datetime.now().strftime("%d/%m/%Y")
-        ws[f'A{row}'].font = Font(bold=True)
-        
-        row += 1
-        ws[f'A{row}'] = "Validità Offerta:"
-        ws[f'B{row}'] = "30 giorni"
-        ws[f'A{row}'].font = Font(bold=True)
-        
-        # Tabella opzioni
-        row += 3
-        ws[f'A{row}'] = "🎯 OPZIONI DI PROGETTO"
-        ws[f'A{row}'].font = title_font
-        
-        row += 1
-        headers = ['Opzione', 'Descrizione', 'Durata', 'Effort (gg)', 'Costo Base (€)', 'Margine %', 'Prezzo Finale (€)']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=row, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Opzioni baseline
-        for i, baseline in enumerate(self.baseline_data):
-            row += 1
-            effort = 120 + (i * 40)
-            base_cost = effort * 600
-            margin = 20 + (i * 5)  # Margine crescente
-            final_price = base_cost * (1 + margin/100)
-            
-            data = [
-                baseline['name'],
-                baseline['description'] or 'Scenario standard',
-                f"{baseline['quarters']} quarters",
-                effort,
-                base_cost,
-                f"{margin}%",
-                final_price
-            ]
-            
-            for col, value in enumerate(data, 1):
-                cell = ws.cell(row=row, column=col, value=value)
-                cell.border = border
-                if col in [5, 7]:  # Colonne costi
-                    cell.number_format = '€#,##0'
-                cell.alignment = Alignment(horizontal='center')
-        
-        # Termini e condizioni
-        row += 3
-        ws[f'A{row}'] = "📋 TERMINI E CONDIZIONI"
-        ws[f'A{row}'].font = title_font
-        
-        terms = [
-            "• Prezzi espressi in Euro, IVA esclusa",
-            "• Pagamenti: 30% anticipo, 40% SAL intermedio, 30% a consegna",
-            "• Validità offerta: 30 giorni dalla data di emissione", 
-            "• Eventuali modifiche ai requisiti comporteranno rinegoziazione",
-            "• Include training del team cliente (8 ore)",
-            "• Supporto post-go-live: 3 mesi inclusi",
-            "• Documentazione tecnica completa inclusa"
-        ]
-        
-        for term in terms:
-            row += 1
-            ws[f'A{row}'] = term
-            ws.merge_cells(f'A{row}:G{row}')
-        
-        # Formattazione colonne
-        column_widths = [15, 30, 12, 12, 15, 10, 18]
-        for i, width in enumerate(column_widths, 1):
-            ws.column_dimensions[get_column_letter(i)].width = width
-    
-    def create_charts_sheet(self, wb):
-        """Crea il foglio con i grafici"""
-        ws = wb.create_sheet("📊 Grafici")
-        
-        # Titolo
-        ws['A1'] = "📊 ANALISI GRAFICHE BASELINE"
-        ws['A1'].font = Font(bold=True, size=16)
-        
-        # Crea grafico comparativo baseline
-        row = 3
-        ws[f'A{row}'] = "Baseline"
-        ws[f'B{row}'] = "Effort Totale (gg)"
-        ws[f'C{row}'] = "Costo (€)"
-        ws[f'D{row}'] = "Durata (Q)"
-        
-        # Dati per il grafico
-        for i, baseline in enumerate(self.baseline_data):
-            row += 1
-            effort = 120 + (i * 40)
-            cost = effort * 600
-            
-            ws[f'A{row}'] = baseline['name']
-            ws[f'B{row}'] = effort
-            ws[f'C{row}'] = cost
-            ws[f'D{row}'] = baseline['quarters']
-        
-        # Crea grafico a colonne
-        chart = ColumnChart()
-        chart.type = "col"
-        chart.style = 10
-        chart.title = "Confronto Effort per Baseline"
-        chart.y_axis.title = 'Giorni di Effort'
-        chart.x_axis.title = 'Baseline'
-        
-        # Dati per il grafico
-        data = Reference(ws, min_col=2, min_row=3, max_row=3+len(self.baseline_data), max_col=2)
-        categories = Reference(ws, min_col=1, min_row=4, max_row=3+len(self.baseline_data))
-        
-        chart.add_data(data, titles_from_data=True)
-        chart.set_categories(categories)
-        
-        # Posiziona il grafico
-        ws.add_chart(chart, "F3")
-        
-        # Secondo grafico per i costi
-        chart2 = ColumnChart()
-        chart2.type = "col"
-        chart2.style = 12
-        chart2.title = "Confronto Costi per Baseline"
-        chart2.y_axis.title = 'Costo (€)'
-        chart2.x_axis.title = 'Baseline'
-        
-        data2 = Reference(ws, min_col=3, min_row=3, max_row=3+len(self.baseline_data), max_col=3)
-        chart2.add_data(data2, titles_from_data=True)
-        chart2.set_categories(categories)
-        
-        ws.add_chart(chart2, "F18")
-        
-        # Formattazione
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 15
-        ws.column_dimensions['D'].width = 12
-
-def main():
+            events.put(('error', str(e)))
+
+    def _poll_generation(self):
+        """Aggiorna la UI con gli eventi del thread di generazione"""
+        while True:
+            try:
+                event = self.generation_events.get_nowait()
+            except queue.Empty:
+                break
+
+            kind = event[0]
+            if kind == 'progress':
+                _, done, total, message = event
+                self.progress_bar['maximum'] = total
+                self.progress_bar['value'] = done
+                self.progress_label.config(text=message)
+                continue
+
+            self._reset_generation_ui()
+            if kind == 'done':
+                _, filename, baseline_count = event
+                messagebox.showinfo("Successo!", 
+                                  f"Template Excel generato con successo!\n\nFile salvato: {filename}\n\n"
+                                  f"Il template include:\n"
+                                  f"• Dashboard esecutiva\n"
+                                  f"• {baseline_count} baseline configurate\n"
+                                  f"• Calcoli automatici\n"
+                                  f"• Grafici dinamici\n"
+                                  f"• Formule Excel avanzate")
+            elif kind == 'cancelled':
+                self.progress_label.config(text="Generazione annullata")
+            else:
+                messagebox.showerror("Errore", f"Errore durante la generazione del file Excel:\n{event[1]}")
+            return
+
+        self.root.after(50, self._poll_generation)
+
+    def cancel_generation(self):
+        """Richiede l'annullamento della generazione in corso"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_btn.config(state='disabled')
+            self.progress_label.config(text="Annullamento in corso...")
+
+    def _reset_generation_ui(self):
+        """Riporta i controlli allo stato di riposo"""
+        self.generation_thread = None
+        self.cancel_event = None
+        self.generate_btn.config(state='normal')
+        self.cancel_btn.config(state='disabled')
+        self.progress_bar['value'] = 0
+        self.progress_label.config(text="")
+
+def format_startup_profile(timings, heavy_loaded):
+    """Testo del rapporto di --profile-startup"""
+    def ms(seconds):
+        return "-" if seconds is None else f"{seconds * 1000:.0f} ms"
+
+    lines = ["⏱️ Profilo di avvio"]
+    lines += [f"  {label:<28}{ms(seconds):>10}" for label, seconds in timings]
+    lines.append(f"  Moduli pesanti al primo disegno: {', '.join(heavy_loaded) or 'nessuno'}")
+    return "\n".join(lines)
+
+
+def profile_startup(root, app, ui_start, ui_end):
+    """Misura il primo disegno e il warm-up, poi stampa il rapporto"""
+    root.update()  # Mappa la finestra ed esegue il primo disegno
+    painted = time.perf_counter()
+    heavy_loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    app.start_warmup()
+    app.warmup_thread.join()
+
+    report = format_startup_profile([
+        ("Import moduli", _IMPORT_END - _IMPORT_START),
+        ("Costruzione interfaccia", ui_end - ui_start),
+        ("Primo disegno", painted - ui_end),
+        ("Totale fino al primo disegno", painted - _IMPORT_START),
+        ("Warm-up motore (background)", app.warmup_seconds)
+    ], heavy_loaded)
+
+    if sys.stdout is not None:
+        print(report)
+    else:
+        # Eseguibile senza console
+        messagebox.showinfo("Profilo di avvio", report)
+    root.destroy()
+
+
+def main(argv=None):
     """Funzione principale"""
+    parser = argparse.ArgumentParser(description="Generatore Quotazioni Progetti")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="misura i tempi di import e del primo disegno, poi esce")
+    parser.add_argument('--serve', nargs='?', type=int, const=8765, default=None, metavar='PORTA',
+                        help="avvia il servizio HTTP delle quotazioni senza interfaccia (default: porta 8765)")
+    args = parser.parse_args(argv)
+
+    if args.serve is not None:
+        from quotation_service import serve
+        serve(port=args.serve)
+        return
+
+    ui_start = time.perf_counter()
     root = tk.Tk()
     app = QuotationGenerator(root)
     
@@ -987,8 +733,14 @@ def main():
     x = (root.winfo_screenwidth() // 2) - (root.winfo_width() // 2)
     y = (root.winfo_screenheight() // 2) - (root.winfo_height() // 2)
     root.geometry(f"+{x}+{y}")
+    ui_end = time.perf_counter()
+
+    if args.profile_startup:
+        profile_startup(root, app, ui_start, ui_end)
+        return
     
     root.mainloop()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,252 @@
+"""Anteprima HTML della quotazione, senza generare il file Excel.
+
+Riproduce il contenuto dei fogli Dashboard, Quotazione e Grafici (con
+grafici a colonne in SVG al posto dei grafici di Excel) in un'unica pagina
+autonoma, da aprire nel browser. I numeri arrivano dallo stesso modello
+(``compute_quote_model``) e dalla stessa simulazione del rischio usati dal
+motore, quindi coincidono con quelli del file generato con la stessa data
+e lo stesso numero di prove.
+
+Il modulo non importa openpyxl: la pagina si genera in pochi millisecondi
+più il tempo della simulazione Monte Carlo (``risk_trials=0`` per ometterla).
+"""
+import math
+from datetime import date
+from html import escape
+
+from quotation_catalog import default_catalog
+from quotation_config import (
+    OFFER_VALIDITY, QUOTATION_TERMS, format_thousands, normalize_config, validate_config
+)
+from quotation_model import compute_quote_model
+from quotation_risk import DEFAULT_TRIALS, PERCENTILES, simulate_quote_risk
+
+# Colori delle intestazioni come negli stili dei fogli (quotation_styles)
+DASHBOARD_COLOR = "#2C3E50"
+QUOTATION_COLOR = "#27AE60"
+
+# Colori delle serie dei grafici
+PALETTE = ("#4472C4", "#ED7D31", "#A5A5A5", "#FFC000", "#5B9BD5", "#70AD47",
+           "#264478", "#9E480E", "#636363", "#997300")
+
+STYLESHEET = """
+body { font-family: Calibri, Arial, sans-serif; color: #222; margin: 24px auto; max-width: 1100px; }
+section { margin-bottom: 48px; }
+h1 { font-size: 24px; border-bottom: 2px solid #ccc; padding-bottom: 6px; }
+h2 { font-size: 19px; margin-top: 28px; }
+table { border-collapse: collapse; margin: 8px 0; }
+table.info td { padding: 2px 16px 2px 0; }
+table.info td:first-child { font-weight: bold; }
+table.grid th, table.grid td { border: 1px solid #444; padding: 4px 10px; text-align: center; }
+table.grid th { color: #fff; font-size: 15px; }
+table.grid td.number { text-align: right; }
+ul.terms { list-style: none; padding-left: 0; }
+svg { display: block; margin: 12px 0 28px; }
+svg text { font-family: Calibri, Arial, sans-serif; fill: #333; }
+"""
+
+
+def _euro(value):
+    return f"€{format_thousands(value)}"
+
+
+def _table(headers, rows, color, numeric=()):
+    """Tabella con intestazione colorata; ``numeric`` sono le colonne allineate a destra"""
+    parts = ['<table class="grid"><tr>']
+    parts.extend(f'<th style="background:{color}">{escape(header)}</th>' for header in headers)
+    parts.append('</tr>')
+    for row in rows:
+        parts.append('<tr>')
+        parts.extend(f'<td class="number">{escape(str(value))}</td>' if column in numeric
+                     else f'<td>{escape(str(value))}</td>' for column, value in enumerate(row))
+        parts.append('</tr>')
+    parts.append('</table>')
+    return "".join(parts)
+
+
+def _info_table(rows):
+    cells = "".join(f"<tr><td>{escape(label)}</td><td>{escape(str(value))}</td></tr>" for label, value in rows)
+    return f'<table class="info">{cells}</table>'
+
+
+def _risk_table(risk, color):
+    headers = ['Baseline']
+    headers.extend(f'Effort P{p} (gg)' for p in PERCENTILES)
+    headers.extend(f'Costo P{p} (€)' for p in PERCENTILES)
+    rows = [
+        [baseline.name] + [format_thousands(value) for value in baseline.effort]
+        + [_euro(value) for value in baseline.cost]
+        for baseline in risk.baselines
+    ]
+    return (f"<h2>🎲 ANALISI RISCHIO (Monte Carlo, {format_thousands(risk.trials)} prove)</h2>"
+            + _table(headers, rows, color, numeric=range(1, len(headers))))
+
+
+def _nice_step(maximum, ticks=5):
+    """Passo "tondo" (1, 2, 2,5 o 5 × 10^n) per circa ``ticks`` linee dell'asse"""
+    if maximum <= 0:
+        return 1
+    raw = maximum / ticks
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for factor in (1, 2, 2.5, 5, 10):
+        if raw <= factor * magnitude:
+            return factor * magnitude
+    return 10 * magnitude
+
+
+def svg_bar_chart(title, categories, series, y_title='', x_title='', value_format=format_thousands,
+                  width=760, height=340):
+    """Grafico a colonne raggruppate in SVG.
+
+    ``series`` è una lista di coppie ``(nome, valori)`` con un valore per
+    categoria; con più serie viene aggiunta la legenda.
+    """
+    rotate = len(categories) > 8
+    left, right, top = 80, 20, 44
+    bottom = 90 if rotate else 56
+    legend = len(series) > 1
+    if legend:
+        bottom += 24
+    plot_width, plot_height = width - left - right, height - top - bottom
+
+    maximum = max((value for _, values in series for value in values), default=0)
+    step = _nice_step(maximum)
+    top_value = step * max(1, math.ceil(maximum / step))
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}" role="img" aria-label="{escape(title)}">',
+             f'<text x="{width / 2:.0f}" y="24" text-anchor="middle" font-size="16" '
+             f'font-weight="bold">{escape(title)}</text>']
+
+    # Griglia ed etichette dell'asse verticale
+    tick = 0
+    while tick <= top_value + step / 2:
+        y = top + plot_height - tick / top_value * plot_height
+        parts.append(f'<line x1="{left}" y1="{y:.1f}" x2="{left + plot_width}" y2="{y:.1f}" stroke="#ddd"/>')
+        parts.append(f'<text x="{left - 6}" y="{y + 4:.1f}" text-anchor="end" font-size="11">'
+                     f'{escape(value_format(tick))}</text>')
+        tick += step
+    parts.append(f'<line x1="{left}" y1="{top + plot_height}" x2="{left + plot_width}" '
+                 f'y2="{top + plot_height}" stroke="#888"/>')
+
+    # Colonne: un gruppo per categoria, una colonna per serie
+    group = plot_width / max(1, len(categories))
+    bar = group * 0.8 / max(1, len(series))
+    for c, category in enumerate(categories):
+        x0 = left + c * group + group * 0.1
+        for s, (name, values) in enumerate(series):
+            value = values[c]
+            bar_height = value / top_value * plot_height if top_value else 0
+            parts.append(f'<rect x="{x0 + s * bar:.1f}" y="{top + plot_height - bar_height:.1f}" '
+                         f'width="{max(bar - 1, 0.5):.1f}" height="{bar_height:.1f}" '
+                         f'fill="{PALETTE[s % len(PALETTE)]}"><title>{escape(str(category))} – '
+                         f'{escape(name)}: {escape(value_format(value))}</title></rect>')
+        x = left + (c + 0.5) * group
+        y = top + plot_height + 16
+        if rotate:
+            parts.append(f'<text x="{x:.1f}" y="{y}" text-anchor="end" font-size="10" '
+                         f'transform="rotate(-40 {x:.1f} {y})">{escape(str(category))}</text>')
+        else:
+            parts.append(f'<text x="{x:.1f}" y="{y}" text-anchor="middle" font-size="11">'
+                         f'{escape(str(category))}</text>')
+
+    # Titoli degli assi e legenda
+    if y_title:
+        y = top + plot_height / 2
+        parts.append(f'<text x="16" y="{y:.1f}" text-anchor="middle" font-size="12" '
+                     f'transform="rotate(-90 16 {y:.1f})">{escape(y_title)}</text>')
+    if x_title:
+        parts.append(f'<text x="{left + plot_width / 2:.1f}" y="{height - (30 if legend else 8)}" '
+                     f'text-anchor="middle" font-size="12">{escape(x_title)}</text>')
+    if legend:
+        x = left
+        for s, (name, _) in enumerate(series):
+            parts.append(f'<rect x="{x}" y="{height - 16}" width="10" height="10" '
+                         f'fill="{PALETTE[s % len(PALETTE)]}"/>')
+            parts.append(f'<text x="{x + 14}" y="{height - 7}" font-size="11">{escape(name)}</text>')
+            x += 24 + 7 * len(name)
+
+    parts.append('</svg>')
+    return "".join(parts)
+
+
+def _dashboard_section(config, model, risk, quote_date):
+    parts = [f"<section id=\"dashboard\"><h1>🚀 DASHBOARD PROGETTO: {escape(config['project_name'])}</h1>",
+             "<h2>📋 INFORMAZIONI PROGETTO</h2>",
+             _info_table([("Cliente:", config['client_name'] or "Non specificato"),
+                          ("Data Creazione:", quote_date.strftime("%d/%m/%Y")),
+                          ("Baseline Configurate:", len(model.baselines))]),
+             "<h2>📊 CONFRONTO BASELINE</h2>"]
+    rows = [(b.name, b.quarters, format_thousands(b.total_effort), _euro(b.total_cost), b.risk_level)
+            for b in model.baselines]
+    parts.append(_table(['Baseline', 'Durata (Q)', 'Effort Totale (gg)', 'Costo Stimato (€)', 'Livello Rischio'],
+                        rows, DASHBOARD_COLOR))
+    if risk is not None:
+        parts.append(_risk_table(risk, DASHBOARD_COLOR))
+    parts.append("</section>")
+    return "".join(parts)
+
+
+def _quotation_section(config, model, risk, quote_date):
+    parts = [f"<section id=\"quotazione\"><h1>💰 QUOTAZIONE FINALE - {escape(config['project_name'])}</h1>",
+             _info_table([("Cliente:", config['client_name'] or "Non specificato"),
+                          ("Data Quotazione:", quote_date.strftime("%d/%m/%Y")),
+                          ("Validità Offerta:", OFFER_VALIDITY)]),
+             "<h2>🎯 OPZIONI DI PROGETTO</h2>"]
+    rows = [(b.name, b.description or 'Scenario standard', f"{b.quarters} quarters",
+             format_thousands(b.total_effort), _euro(b.total_cost), f"{b.margin}%", _euro(b.final_price))
+            for b in model.baselines]
+    parts.append(_table(['Opzione', 'Descrizione', 'Durata', 'Effort (gg)', 'Costo Base (€)', 'Margine %',
+                         'Prezzo Finale (€)'], rows, QUOTATION_COLOR, numeric=(4, 6)))
+    if risk is not None:
+        parts.append(_risk_table(risk, QUOTATION_COLOR))
+    parts.append("<h2>📋 TERMINI E CONDIZIONI</h2><ul class=\"terms\">")
+    parts.extend(f"<li>{escape(term)}</li>" for term in QUOTATION_TERMS)
+    parts.append("</ul></section>")
+    return "".join(parts)
+
+
+def _charts_section(model, risk):
+    names = [b.name for b in model.baselines]
+    parts = ["<section id=\"grafici\"><h1>📊 ANALISI GRAFICHE BASELINE</h1>",
+             svg_bar_chart("Confronto Effort per Baseline", names,
+                           [("Effort Totale (gg)", [b.total_effort for b in model.baselines])],
+                           'Giorni di Effort', 'Baseline'),
+             svg_bar_chart("Confronto Costi per Baseline", names,
+                           [("Costo (€)", [b.total_cost for b in model.baselines])],
+                           'Costo (€)', 'Baseline', value_format=_euro)]
+    if risk is not None:
+        edges = risk.bin_edges
+        labels = [f"{format_thousands(lower)}-{format_thousands(edges[b + 1])}" for b, lower in enumerate(edges[:-1])]
+        parts.append(svg_bar_chart(
+            f"Distribuzione Effort (Monte Carlo, {format_thousands(risk.trials)} prove)", labels,
+            [(baseline.name, histogram) for baseline, histogram in zip(risk.baselines, risk.histograms)],
+            'Prove', 'Effort Totale (gg)'
+        ))
+    parts.append("</section>")
+    return "".join(parts)
+
+
+def render_html(config, architectures=None, risk_trials=DEFAULT_TRIALS, quote_date=None):
+    """Pagina HTML con Dashboard, Quotazione e Grafici della configurazione.
+
+    Gli argomenti hanno lo stesso significato che in
+    ``quotation_engine.build_workbook``; la configurazione viene
+    normalizzata e validata (ValueError se non valida).
+    """
+    architectures = architectures or default_catalog()
+    quote_date = quote_date or date.today()
+    config = normalize_config(config)
+    validate_config(config, architectures)
+    model = compute_quote_model(config, architectures[config['selected_architecture']])
+    risk = simulate_quote_risk(model, trials=risk_trials) if risk_trials else None
+
+    return "".join([
+        '<!DOCTYPE html>\n<html lang="it"><head><meta charset="utf-8">',
+        f"<title>Quotazione - {escape(config['project_name'])}</title>",
+        f"<style>{STYLESHEET}</style></head><body>",
+        _dashboard_section(config, model, risk, quote_date),
+        _quotation_section(config, model, risk, quote_date),
+        _charts_section(model, risk),
+        "</body></html>\n"
+    ])
@@ -0,0 +1,331 @@
+"""Libreria locale delle configurazioni, su database SQLite.
+
+Ogni configurazione viene salvata normalizzata insieme ai totali calcolati
+dal modello (effort, costo, prezzo minimo e massimo delle baseline), così
+l'elenco si ordina e si filtra senza ricalcolare nulla. Ci sono indici su
+cliente, progetto, architettura e data di aggiornamento; nome progetto,
+cliente e descrizioni (del progetto e delle baseline) sono indicizzati per
+la ricerca a testo libero con FTS5 (con ``LIKE`` se SQLite non ha FTS5).
+
+Una configurazione identica a una già presente (stesso hash del
+contenuto) non viene duplicata: importare di nuovo la stessa cartella
+aggiorna solo la data.
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+from quotation_cache import content_hash
+from quotation_catalog import default_catalog
+from quotation_config import normalize_config, validate_config
+
+# Percorso del database: variabile d'ambiente o cartella dell'utente
+LIBRARY_ENV = "QG_LIBRERIA"
+DEFAULT_LIBRARY_PATH = os.path.join(os.path.expanduser("~"), ".generatore_quotazioni", "libreria.sqlite3")
+
+SCHEMA_VERSION = 1
+PAGE_SIZE = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    id INTEGER PRIMARY KEY,
+    config_hash TEXT NOT NULL UNIQUE,
+    project_name TEXT NOT NULL,
+    client_name TEXT NOT NULL,
+    architecture TEXT NOT NULL,
+    description TEXT NOT NULL,
+    baseline_count INTEGER NOT NULL,
+    total_effort INTEGER,
+    total_cost REAL,
+    min_price REAL,
+    max_price REAL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    source TEXT,
+    config TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS quotes_client ON quotes (client_name COLLATE NOCASE, updated_at);
+CREATE INDEX IF NOT EXISTS quotes_project ON quotes (project_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS quotes_architecture ON quotes (architecture, updated_at);
+CREATE INDEX IF NOT EXISTS quotes_updated ON quotes (updated_at);
+"""
+
+# Indice a testo libero sincronizzato con la tabella tramite trigger
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS quotes_fts USING fts5(
+    project_name, client_name, description,
+    content='quotes', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS quotes_fts_insert AFTER INSERT ON quotes BEGIN
+    INSERT INTO quotes_fts (rowid, project_name, client_name, description)
+    VALUES (new.id, new.project_name, new.client_name, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS quotes_fts_delete AFTER DELETE ON quotes BEGIN
+    INSERT INTO quotes_fts (quotes_fts, rowid, project_name, client_name, description)
+    VALUES ('delete', old.id, old.project_name, old.client_name, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS quotes_fts_update AFTER UPDATE OF project_name, client_name, description ON quotes BEGIN
+    INSERT INTO quotes_fts (quotes_fts, rowid, project_name, client_name, description)
+    VALUES ('delete', old.id, old.project_name, old.client_name, old.description);
+    INSERT INTO quotes_fts (rowid, project_name, client_name, description)
+    VALUES (new.id, new.project_name, new.client_name, new.description);
+END;
+"""
+
+_LIST_COLUMNS = ("id, project_name, client_name, architecture, baseline_count, total_effort, total_cost, "
+                 "min_price, max_price, created_at, updated_at, source")
+
+
+class LibraryEntry(NamedTuple):
+    """Riga dell'elenco: tutto tranne la configurazione completa"""
+    id: int
+    project_name: str
+    client_name: str
+    architecture: str
+    baseline_count: int
+    total_effort: Optional[int]  # None se l'architettura non è nel catalogo
+    total_cost: Optional[float]
+    min_price: Optional[float]
+    max_price: Optional[float]
+    created_at: str
+    updated_at: str
+    source: Optional[str]
+
+
+class LibraryPage(NamedTuple):
+    """Pagina di risultati di ``QuoteLibrary.search``"""
+    entries: Tuple[LibraryEntry, ...]
+    total: int
+    offset: int
+
+
+class ImportResult(NamedTuple):
+    """Esito di ``QuoteLibrary.import_directory``"""
+    imported: int
+    duplicates: int
+    errors: Tuple[Tuple[str, str], ...]  # (file, messaggio)
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _search_text(config):
+    """Testo indicizzato per la ricerca: descrizione del progetto e delle baseline"""
+    parts = [config['project_description']]
+    for baseline in config['baseline_data']:
+        parts.extend((baseline['name'], baseline['description']))
+    return "\n".join(part for part in parts if part)
+
+
+def quote_totals(config, architectures=None):
+    """Effort, costo e prezzi minimo e massimo della configurazione normalizzata.
+
+    Restituisce ``None`` per tutti i valori se l'architettura non è nel
+    catalogo o la configurazione non è generabile.
+    """
+    from quotation_model import compute_quote_model
+
+    architectures = architectures or default_catalog()
+    try:
+        validate_config(config, architectures)
+        model = compute_quote_model(config, architectures[config['selected_architecture']])
+    except (KeyError, ValueError):
+        return None, None, None, None
+    prices = [baseline.final_price for baseline in model.baselines]
+    return model.total_effort, model.total_cost, min(prices, default=None), max(prices, default=None)
+
+
+def _fts_query(text):
+    """Query FTS5: ogni parola come prefisso, tutte obbligatorie"""
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in text.split())
+
+
+class QuoteLibrary:
+    """Libreria delle configurazioni nel database ``path``"""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get(LIBRARY_ENV) or DEFAULT_LIBRARY_PATH
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(_SCHEMA)
+        try:
+            self.connection.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False  # SQLite compilato senza FTS5
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # --- Scrittura ------------------------------------------------------
+
+    def _save(self, config, source, quote_id, timestamp, architectures):
+        config = normalize_config(config)
+        config_hash = content_hash(config)
+        existing = self.connection.execute("SELECT id FROM quotes WHERE config_hash = ?", (config_hash,)).fetchone()
+        if existing is not None and existing[0] != quote_id:
+            # Contenuto già presente: si aggiorna solo la data
+            self.connection.execute("UPDATE quotes SET updated_at = ? WHERE id = ?", (timestamp, existing[0]))
+            return existing[0], False
+
+        effort, cost, min_price, max_price = quote_totals(config, architectures)
+        values = {
+            'config_hash': config_hash,
+            'project_name': config['project_name'],
+            'client_name': config['client_name'],
+            'architecture': config['selected_architecture'],
+            'description': _search_text(config),
+            'baseline_count': config['baseline_count'],
+            'total_effort': effort,
+            'total_cost': cost,
+            'min_price': min_price,
+            'max_price': max_price,
+            'updated_at': timestamp,
+            'source': source,
+            'config': json.dumps(config, ensure_ascii=False)
+        }
+
+        if quote_id is not None:
+            assignments = ", ".join(f"{column} = :{column}" for column in values)
+            cursor = self.connection.execute(f"UPDATE quotes SET {assignments} WHERE id = :id",
+                                             dict(values, id=quote_id))
+            if cursor.rowcount:
+                return quote_id, True
+
+        values['created_at'] = timestamp
+        columns = ", ".join(values)
+        placeholders = ", ".join(f":{column}" for column in values)
+        cursor = self.connection.execute(f"INSERT INTO quotes ({columns}) VALUES ({placeholders})", values)
+        return cursor.lastrowid, True
+
+    def save(self, config, source=None, quote_id=None, architectures=None):
+        """Salva una configurazione e ne restituisce l'id.
+
+        Con ``quote_id`` la configurazione sostituisce quella salvata con
+        quell'id (se esiste ancora); se la stessa configurazione è già nella
+        libreria viene restituito l'id esistente.
+        """
+        with self.connection:
+            quote_id, _ = self._save(config, source, quote_id, _now(), architectures)
+        return quote_id
+
+    def import_directory(self, directory, architectures=None):
+        """Importa tutti i file JSON di configurazione di una cartella (e sottocartelle).
+
+        I file che non sono configurazioni (JSON non valido o senza
+        ``project_name``) vengono segnalati in ``errors``. La data dei file
+        importati è quella di ultima modifica del file.
+        """
+        imported = duplicates = 0
+        errors = []
+        with self.connection:
+            for folder, _, names in os.walk(directory):
+                for name in sorted(names):
+                    if not name.lower().endswith('.json'):
+                        continue
+                    path = os.path.join(folder, name)
+                    try:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            config = json.load(f)
+                        if not isinstance(config, dict) or 'project_name' not in config:
+                            raise ValueError("non è una configurazione di quotazione")
+                        timestamp = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds')
+                        _, inserted = self._save(config, path, None, timestamp, architectures)
+                    except (OSError, ValueError, TypeError, AttributeError) as e:
+                        errors.append((path, str(e)))
+                        continue
+                    if inserted:
+                        imported += 1
+                    else:
+                        duplicates += 1
+        return ImportResult(imported, duplicates, tuple(errors))
+
+    def delete(self, quote_id):
+        """Elimina una configurazione dalla libreria"""
+        with self.connection:
+            self.connection.execute("DELETE FROM quotes WHERE id = ?", (quote_id,))
+
+    # --- Lettura --------------------------------------------------------
+
+    def load(self, quote_id):
+        """Configurazione salvata con ``quote_id``; KeyError se non esiste"""
+        row = self.connection.execute("SELECT config FROM quotes WHERE id = ?", (quote_id,)).fetchone()
+        if row is None:
+            raise KeyError(quote_id)
+        return json.loads(row[0])
+
+    def _where(self, text, client, architecture, since, until):
+        clauses = []
+        params = []
+        if text and text.strip():
+            if self.fts:
+                clauses.append("id IN (SELECT rowid FROM quotes_fts WHERE quotes_fts MATCH ?)")
+                params.append(_fts_query(text))
+            else:
+                for word in text.split():
+                    clauses.append("(project_name LIKE ? OR client_name LIKE ? OR description LIKE ?)")
+                    params.extend([f"%{word}%"] * 3)
+        if client:
+            clauses.append("client_name = ? COLLATE NOCASE")
+            params.append(client)
+        if architecture:
+            clauses.append("architecture = ?")
+            params.append(architecture)
+        if since:
+            clauses.append("updated_at >= ?")
+            params.append(since.isoformat())
+        if until:
+            clauses.append("updated_at < ?")
+            params.append(until.isoformat())
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def search(self, text='', client=None, architecture=None, since=None, until=None,
+               limit=PAGE_SIZE, offset=0):
+        """Pagina di configurazioni dalla più recente.
+
+        ``text`` cerca parole (anche iniziali di parola) in progetto,
+        cliente e descrizioni; ``since``/``until`` (``date`` o
+        ``datetime``) filtrano sulla data di aggiornamento.
+        """
+        where, params = self._where(text, client, architecture, since, until)
+        total = self.connection.execute(f"SELECT COUNT(*) FROM quotes{where}", params).fetchone()[0]
+        rows = self.connection.execute(
+            f"SELECT {_LIST_COLUMNS} FROM quotes{where} ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return LibraryPage(tuple(LibraryEntry(*row) for row in rows), total, offset)
+
+    def configs(self, text='', client=None, architecture=None, since=None, until=None):
+        """Coppie ``(id, configurazione)`` di tutti i risultati di una ricerca, lette man mano"""
+        where, params = self._where(text, client, architecture, since, until)
+        rows = self.connection.execute(f"SELECT id, config FROM quotes{where} ORDER BY updated_at DESC, id DESC",
+                                       params)
+        for quote_id, config in rows:
+            yield quote_id, json.loads(config)
+
+    def clients(self):
+        """Clienti presenti nella libreria, in ordine alfabetico"""
+        rows = self.connection.execute(
+            "SELECT DISTINCT client_name FROM quotes WHERE client_name != '' ORDER BY client_name COLLATE NOCASE"
+        )
+        return [row[0] for row in rows]
+
+    def architectures(self):
+        """Chiavi delle architetture usate nella libreria"""
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT architecture FROM quotes ORDER BY 1")]
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM quotes").fetchone()[0]
@@ -0,0 +1,338 @@
+"""Finestra della libreria delle configurazioni.
+
+L'elenco mostra una pagina di ``PAGE_SIZE`` configurazioni alla volta: la
+ricerca, i filtri e il conteggio sono eseguiti da SQLite sugli indici,
+quindi la finestra resta reattiva anche con migliaia di quotazioni.
+"""
+import queue
+import threading
+import tkinter as tk
+from datetime import date
+from tkinter import ttk, messagebox, filedialog
+
+from quotation_config import format_thousands
+from quotation_library import PAGE_SIZE
+
+ALL_VALUES = "Tutti"
+
+# Attesa dopo l'ultimo tasto prima di rieseguire la ricerca
+SEARCH_DELAY_MS = 250
+
+COLUMNS = (
+    ('project', "Progetto", 220),
+    ('client', "Cliente", 150),
+    ('architecture', "Architettura", 110),
+    ('baselines', "Baseline", 70),
+    ('cost', "Costo", 110),
+    ('prices', "Prezzi", 190),
+    ('updated', "Aggiornata", 130),
+)
+
+
+def _euro(value):
+    return "—" if value is None else f"€ {format_thousands(value)}"
+
+
+def _parse_date(text):
+    """Data ``AAAA-MM-GG`` facoltativa; ValueError se non valida"""
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Data non valida: {text} (formato AAAA-MM-GG)") from None
+
+
+class LibraryWindow:
+    """Ricerca, apertura e salvataggio delle configurazioni nella libreria.
+
+    ``on_open(quote_id, config)`` carica una configurazione nell'interfaccia,
+    ``get_configuration()`` restituisce ``(quote_id, config)`` della
+    configurazione corrente da salvare (``quote_id`` None se è nuova) e
+    ``on_saved(quote_id)`` riceve l'id con cui è stata salvata.
+    """
+
+    def __init__(self, parent, library, on_open, get_configuration, on_saved):
+        self.library = library
+        self.on_open = on_open
+        self.get_configuration = get_configuration
+        self.on_saved = on_saved
+        self.offset = 0
+        self.total = 0
+        self.pending_search = None
+        self.export_events = None
+
+        self.parent = parent
+        self.window = tk.Toplevel(parent)
+        self.window.title("📚 Libreria Configurazioni")
+        self.window.geometry("1050x600")
+        self.window.configure(bg='white')
+
+        # Ricerca e filtri
+        filters = tk.Frame(self.window, bg='white')
+        filters.pack(fill='x', padx=15, pady=(15, 5))
+        tk.Label(filters, text="🔍 Cerca:", bg='white', font=('Arial', 10, 'bold')).pack(side='left')
+        self.query = tk.StringVar()
+        tk.Entry(filters, textvariable=self.query, width=30, font=('Arial', 10)).pack(side='left', padx=(10, 0))
+
+        tk.Label(filters, text="Cliente:", bg='white', font=('Arial', 10, 'bold')).pack(side='left', padx=(15, 0))
+        self.client = tk.StringVar(value=ALL_VALUES)
+        self.client_combo = ttk.Combobox(filters, textvariable=self.client, width=20, font=('Arial', 10),
+                                         state='readonly')
+        self.client_combo.pack(side='left', padx=(10, 0))
+
+        tk.Label(filters, text="Architettura:", bg='white', font=('Arial', 10, 'bold')).pack(side='left',
+                                                                                        padx=(15, 0))
+        self.architecture = tk.StringVar(value=ALL_VALUES)
+        self.architecture_combo = ttk.Combobox(filters, textvariable=self.architecture, width=15,
+                                               font=('Arial', 10), state='readonly')
+        self.architecture_combo.pack(side='left', padx=(10, 0))
+
+        dates = tk.Frame(self.window, bg='white')
+        dates.pack(fill='x', padx=15, pady=5)
+        tk.Label(dates, text="Dal (AAAA-MM-GG):", bg='white', font=('Arial', 10, 'bold')).pack(side='left')
+        self.since = tk.StringVar()
+        tk.Entry(dates, textvariable=self.since, width=12, font=('Arial', 10)).pack(side='left', padx=(10, 0))
+        tk.Label(dates, text="Al:", bg='white', font=('Arial', 10, 'bold')).pack(side='left', padx=(15, 0))
+        self.until = tk.StringVar()
+        tk.Entry(dates, textvariable=self.until, width=12, font=('Arial', 10)).pack(side='left', padx=(10, 0))
+        self.status_label = tk.Label(dates, text="", bg='white', font=('Arial', 9))
+        self.status_label.pack(side='right')
+
+        # Elenco paginato
+        body = tk.Frame(self.window, bg='white')
+        body.pack(fill='both', expand=True, padx=15, pady=5)
+        self.tree = ttk.Treeview(body, columns=[key for key, _, _ in COLUMNS], show='headings',
+                                 selectmode='browse')
+        for key, title, width in COLUMNS:
+            self.tree.heading(key, text=title)
+            self.tree.column(key, width=width, anchor='w')
+        scrollbar = ttk.Scrollbar(body, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        self.tree.bind('<Double-1>', lambda event: self.open_selected())
+
+        # Pagine e azioni
+        actions = tk.Frame(self.window, bg='white')
+        actions.pack(fill='x', padx=15, pady=(5, 15))
+        self.prev_btn = tk.Button(actions, text="◀", command=lambda: self.show_page(self.offset - PAGE_SIZE),
+                                  font=('Arial', 10, 'bold'))
+        self.prev_btn.pack(side='left')
+        self.page_label = tk.Label(actions, text="", bg='white', font=('Arial', 10))
+        self.page_label.pack(side='left', padx=10)
+        self.next_btn = tk.Button(actions, text="▶", command=lambda: self.show_page(self.offset + PAGE_SIZE),
+                                  font=('Arial', 10, 'bold'))
+        self.next_btn.pack(side='left')
+
+        tk.Button(actions, text="🗑️ Elimina", command=self.delete_selected, bg='#dc3545', fg='white',
+                  font=('Arial', 10, 'bold'), padx=10).pack(side='right', padx=5)
+        self.export_btn = tk.Button(actions, text="📦 Esporta ZIP", command=self.export_zip, bg='#17a2b8',
+                                    fg='white', font=('Arial', 10, 'bold'), padx=10)
+        self.export_btn.pack(side='right', padx=5)
+        tk.Button(actions, text="📥 Importa Cartella", command=self.import_directory, bg='#6c757d', fg='white',
+                  font=('Arial', 10, 'bold'), padx=10).pack(side='right', padx=5)
+        tk.Button(actions, text="💾 Salva Corrente", command=self.save_current, bg='#ffc107', fg='black',
+                  font=('Arial', 10, 'bold'), padx=10).pack(side='right', padx=5)
+        tk.Button(actions, text="📂 Apri", command=self.open_selected, bg='#28a745', fg='white',
+                  font=('Arial', 10, 'bold'), padx=10).pack(side='right', padx=5)
+
+        for var in (self.query, self.since, self.until):
+            var.trace_add('write', lambda *_: self.schedule_search())
+        for var in (self.client, self.architecture):
+            var.trace_add('write', lambda *_: self.show_page(0))
+
+        self.reload_filters()
+        self.show_page(0)
+
+    def reload_filters(self):
+        """Aggiorna i valori dei filtri cliente e architettura"""
+        self.client_combo.config(values=[ALL_VALUES] + self.library.clients())
+        self.architecture_combo.config(values=[ALL_VALUES] + self.library.architectures())
+
+    def schedule_search(self):
+        """Riesegue la ricerca quando l'utente smette di scrivere"""
+        if self.pending_search is not None:
+            self.window.after_cancel(self.pending_search)
+        self.pending_search = self.window.after(SEARCH_DELAY_MS, lambda: self.show_page(0))
+
+    def filters(self):
+        """Filtri correnti come argomenti di ``QuoteLibrary.search``; ValueError se le date non sono valide"""
+        since = _parse_date(self.since.get())
+        until = _parse_date(self.until.get())
+        client = self.client.get()
+        architecture = self.architecture.get()
+        return {
+            'text': self.query.get(),
+            'client': None if client == ALL_VALUES else client,
+            'architecture': None if architecture == ALL_VALUES else architecture,
+            'since': since,
+            'until': date.fromordinal(until.toordinal() + 1) if until else None  # giorno incluso
+        }
+
+    def show_page(self, offset):
+        """Mostra la pagina che inizia da ``offset`` con i filtri correnti"""
+        self.pending_search = None
+        try:
+            filters = self.filters()
+        except ValueError as e:
+            self.status_label.config(text=f"⚠️ {e}")
+            return
+        page = self.library.search(offset=max(0, offset), **filters)
+        if not page.entries and page.offset > 0:
+            # Pagina svuotata da un'eliminazione: si torna all'ultima
+            return self.show_page((page.total - 1) // PAGE_SIZE * PAGE_SIZE if page.total else 0)
+        self.offset = page.offset
+        self.total = page.total
+
+        self.tree.delete(*self.tree.get_children())
+        for entry in page.entries:
+            prices = "—" if entry.min_price is None else f"{_euro(entry.min_price)} – {_euro(entry.max_price)}"
+            self.tree.insert('', 'end', iid=str(entry.id), values=(
+                entry.project_name, entry.client_name, entry.architecture, entry.baseline_count,
+                _euro(entry.total_cost), prices, entry.updated_at.replace('T', ' ')[:16]
+            ))
+
+        last = self.offset + len(page.entries)
+        self.page_label.config(text=f"{self.offset + 1 if page.entries else 0}–{last} di {self.total}")
+        self.prev_btn.config(state='normal' if self.offset > 0 else 'disabled')
+        self.next_btn.config(state='normal' if last < self.total else 'disabled')
+        self.status_label.config(text=f"{len(self.library)} configurazioni nella libreria")
+
+    def selected_id(self):
+        selection = self.tree.selection()
+        return int(selection[0]) if selection else None
+
+    def open_selected(self):
+        """Carica nell'interfaccia la configurazione selezionata"""
+        quote_id = self.selected_id()
+        if quote_id is None:
+            messagebox.showwarning("Libreria", "Seleziona una configurazione!", parent=self.window)
+            return
+        try:
+            config = self.library.load(quote_id)
+        except KeyError:
+            messagebox.showerror("Errore", "La configurazione non è più nella libreria", parent=self.window)
+            self.show_page(self.offset)
+            return
+        self.on_open(quote_id, config)
+        self.window.destroy()
+
+    def save_current(self):
+        """Salva la configurazione corrente (sostituisce quella aperta dalla libreria)"""
+        quote_id, config = self.get_configuration()
+        try:
+            quote_id = self.library.save(config, quote_id=quote_id)
+        except Exception as e:
+            messagebox.showerror("Errore", f"Errore durante il salvataggio: {str(e)}", parent=self.window)
+            return
+        self.on_saved(quote_id)
+        self.reload_filters()
+        self.show_page(0)
+        if self.tree.exists(str(quote_id)):
+            self.tree.selection_set(str(quote_id))
+
+    def import_directory(self):
+        """Importa i file JSON di configurazione di una cartella"""
+        directory = filedialog.askdirectory(title="Importa Configurazioni", parent=self.window)
+        if not directory:
+            return
+        self.window.config(cursor='watch')
+        self.window.update_idletasks()
+        try:
+            result = self.library.import_directory(directory)
+        finally:
+            self.window.config(cursor='')
+        message = f"✅ {result.imported} configurazioni importate, {result.duplicates} già presenti"
+        if result.errors:
+            message += f"\n⚠️ {len(result.errors)} file ignorati:\n" + "\n".join(
+                f"• {path}: {error}" for path, error in result.errors[:10]
+            )
+        messagebox.showinfo("Importazione completata", message, parent=self.window)
+        self.reload_filters()
+        self.show_page(0)
+
+    def delete_selected(self):
+        """Elimina la configurazione selezionata dopo conferma"""
+        quote_id = self.selected_id()
+        if quote_id is None:
+            return
+        name = self.tree.item(str(quote_id), 'values')[0]
+        if messagebox.askyesno("Conferma", f"Eliminare '{name}' dalla libreria?", parent=self.window):
+            self.library.delete(quote_id)
+            self.reload_filters()
+            self.show_page(self.offset)
+
+    def export_zip(self):
+        """Genera in un archivio ZIP tutte le configurazioni dei risultati correnti"""
+        if self.export_events is not None:
+            return
+        try:
+            filters = self.filters()
+        except ValueError as e:
+            messagebox.showerror("Errore", str(e), parent=self.window)
+            return
+        if not self.total:
+            messagebox.showwarning("Libreria", "Nessuna configurazione da esportare!", parent=self.window)
+            return
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".zip",
+            filetypes=[("Archivi ZIP", "*.zip"), ("All files", "*.*")],
+            title="Esporta Quotazioni",
+            parent=self.window
+        )
+        if not filename:
+            return
+
+        # Le configurazioni sono lette qui: la connessione SQLite appartiene a questo thread
+        configs = [(f"libreria #{quote_id}", config) for quote_id, config in self.library.configs(**filters)]
+        self.export_events = queue.Queue()
+        self.export_btn.config(state='disabled')
+        threading.Thread(target=self._run_export, args=(configs, filename, self.export_events),
+                         daemon=True).start()
+        # Attesa sulla finestra principale: l'esportazione continua anche se la libreria viene chiusa
+        self.parent.after(100, self._poll_export)
+
+    @staticmethod
+    def _run_export(configs, filename, events):
+        from quotation_bundle import export_bundle
+
+        def progress(done, total, message):
+            events.put(('progress', done, total, message))
+
+        try:
+            result = export_bundle(configs, filename, total=len(configs), progress=progress)
+        except Exception as e:
+            events.put(('error', str(e)))
+        else:
+            events.put(('done', filename, result))
+
+    def _poll_export(self):
+        """Mostra l'avanzamento dell'esportazione"""
+        while True:
+            try:
+                event = self.export_events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == 'progress':
+                _, done, total, message = event
+                if self.window.winfo_exists():
+                    self.status_label.config(text=f"📦 {min(done + 1, total)}/{total} {message}")
+                continue
+
+            self.export_events = None
+            if self.window.winfo_exists():
+                self.export_btn.config(state='normal')
+                self.status_label.config(text="")
+            if event[0] == 'done':
+                _, filename, result = event
+                message = (f"✅ {result.written} quotazioni esportate in {result.seconds:.1f} s\n\n"
+                           f"File salvato: {filename}")
+                if result.errors:
+                    message += f"\n\n⚠️ {len(result.errors)} non generate (vedi manifest.csv)"
+                messagebox.showinfo("Esportazione completata", message)
+            else:
+                messagebox.showerror("Errore", f"Errore durante l'esportazione:\n{event[1]}")
+            return
+        self.parent.after(100, self._poll_export)
@@ -0,0 +1,152 @@
+"""Modello numerico della quotazione, calcolato una sola volta per generazione.
+
+Tutti i fogli (dashboard, baseline, quotazione, grafici) leggono i numeri
+da qui, così i totali sono coerenti ovunque.
+"""
+import functools
+from dataclasses import dataclass
+from typing import Tuple
+
+from quotation_config import DEFAULT_RATES, allocation_matrix, blended_rate, item_allocation
+from quotation_effort import RateCard, compute_effort_batch
+
+
+# Campi della baseline che entrano nel modello (e nella chiave della cache)
+BASELINE_FIELDS = ('name', 'quarters', 'risk_level', 'description')
+
+
+@dataclass(frozen=True)
+class BaselineModel:
+    """Numeri di una singola baseline"""
+    index: int
+    name: str
+    quarters: int
+    risk_level: str
+    description: str
+    items: Tuple[str, ...]
+    effort: Tuple[Tuple[int, ...], ...]  # voci × quarter (giorni)
+    item_totals: Tuple[int, ...]
+    quarter_totals: Tuple[int, ...]
+    item_rates: Tuple[float, ...]
+    item_costs: Tuple[float, ...]
+    total_effort: int
+    total_cost: float
+    margin: float  # percentuale
+    final_price: float
+    roles: Tuple[str, ...] = ()
+    role_rates: Tuple[float, ...] = ()
+    role_effort: Tuple[Tuple[float, ...], ...] = ()  # ruoli × quarter (giorni)
+    role_costs: Tuple[Tuple[float, ...], ...] = ()  # ruoli × quarter (€)
+
+    @property
+    def average_rate(self):
+        """Tariffa media ponderata sull'effort"""
+        return self.total_cost / self.total_effort if self.total_effort > 0 else 0
+
+
+@dataclass(frozen=True)
+class QuoteModel:
+    """Numeri di tutte le baseline di una quotazione"""
+    baselines: Tuple[BaselineModel, ...]
+
+    @property
+    def total_effort(self):
+        return sum(b.total_effort for b in self.baselines)
+
+    @property
+    def total_cost(self):
+        return sum(b.total_cost for b in self.baselines)
+
+
+def baseline_margin(baseline_index):
+    """Margine percentuale della baseline (crescente)"""
+    return 20 + (baseline_index * 5)
+
+
+def build_rate_card(rates, arch_data):
+    """Tariffe per ruolo e matrice di ripartizione delle voci dell'architettura"""
+    roles = tuple(rates)
+    return RateCard(
+        roles=roles,
+        rates=tuple(rates[role] for role in roles),
+        allocation=allocation_matrix(arch_data, roles),
+        item_rates=tuple(
+            blended_rate(item_allocation(arch_data, i), rates) for i in range(len(arch_data['items']))
+        )
+    )
+
+
+def build_baseline_model(index, baseline, items, effort, rate_card=None):
+    """Compone il modello di una baseline a partire dall'effort calcolato"""
+    total_cost = sum(effort.item_costs)
+    margin = baseline_margin(index)
+
+    return BaselineModel(
+        index=index,
+        name=baseline['name'],
+        quarters=baseline['quarters'],
+        risk_level=baseline['risk_level'],
+        description=baseline['description'],
+        items=tuple(items),
+        effort=effort.effort,
+        item_totals=effort.item_totals,
+        quarter_totals=effort.quarter_totals,
+        item_rates=effort.item_rates,
+        item_costs=effort.item_costs,
+        total_effort=sum(effort.item_totals),
+        total_cost=total_cost,
+        margin=margin,
+        final_price=total_cost * (1 + margin / 100),
+        roles=rate_card.roles if rate_card else (),
+        role_rates=rate_card.rates if rate_card else (),
+        role_effort=effort.role_effort,
+        role_costs=effort.role_costs
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_model(baselines, items, rate_card):
+    baselines = [dict(baseline) for baseline in baselines]
+    efforts = compute_effort_batch(
+        range(len(baselines)), [baseline['quarters'] for baseline in baselines], len(items),
+        rate_card=rate_card
+    )
+    return QuoteModel(baselines=tuple(
+        build_baseline_model(index, baseline, items, effort, rate_card)
+        for index, (baseline, effort) in enumerate(zip(baselines, efforts))
+    ))
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_baseline_model(index, baseline, items, rate_card):
+    baseline = dict(baseline)
+    effort = compute_effort_batch([index], [baseline['quarters']], len(items), rate_card=rate_card)[0]
+    return build_baseline_model(index, baseline, items, effort, rate_card)
+
+
+def compute_baseline_model(index, baseline, arch_data, rates=None):
+    """Modello di una sola baseline, memorizzato sugli input.
+
+    Usato dall'anteprima dal vivo: quando cambia un campo si ricalcola solo
+    la baseline interessata. I numeri coincidono con quelli di
+    ``compute_quote_model`` con le stesse tariffe (default: ``DEFAULT_RATES``).
+    """
+    key = tuple((field, baseline[field]) for field in BASELINE_FIELDS)
+    items = tuple(arch_data['items'])
+    return _cached_baseline_model(index, key, items, build_rate_card(rates or DEFAULT_RATES, arch_data))
+
+
+def compute_quote_model(config, arch_data):
+    """Restituisce il modello della quotazione, memorizzato sugli input.
+
+    La chiave della cache contiene solo ciò che influisce sui numeri
+    (baseline, voci dell'architettura, tariffe e ripartizione tra i ruoli),
+    quindi rigenerare con un nome progetto o cliente diverso riusa il
+    modello già calcolato.
+    """
+    baselines = tuple(
+        tuple((field, baseline[field]) for field in BASELINE_FIELDS)
+        for baseline in config['baseline_data']
+    )
+    items = tuple(arch_data['items'])
+    return _cached_model(baselines, items, build_rate_card(config['rates'], arch_data))
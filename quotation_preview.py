@@ -0,0 +1,111 @@
+"""Anteprima dal vivo dei numeri della quotazione.
+
+Il pannello mostra per ogni baseline effort, costo, margine e prezzo come
+nella tabella del foglio Quotazione. A ogni notifica di modifica vengono
+ricalcolate e ridisegnate solo le righe delle baseline interessate; i
+modelli delle baseline invariate arrivano dalla cache di
+``quotation_model.compute_baseline_model``.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+from quotation_config import format_thousands
+
+COLUMNS = (
+    ('name', "Opzione", 130),
+    ('quarters', "Durata", 60),
+    ('effort', "Effort (gg)", 80),
+    ('cost', "Costo (€)", 90),
+    ('margin', "Margine", 60),
+    ('price', "Prezzo (€)", 90)
+)
+
+# Modifiche che cambiano i numeri di tutte le baseline (oltre alle tariffe)
+GLOBAL_KEYS = {('selected_architecture',), ('baseline_data',)}
+
+
+def _euro(value):
+    return f"€{format_thousands(value)}"
+
+
+class LivePreview:
+    """Tabella riassuntiva aggiornata in modo incrementale"""
+
+    def __init__(self, parent):
+        self.frame = tk.Frame(parent, bg='white', relief='ridge', bd=1)
+
+        tk.Label(self.frame, text="📈 Anteprima Quotazione", font=('Arial', 12, 'bold'),
+                 fg='white', bg='#34495e').pack(fill='x', ipady=8)
+
+        self.tree = ttk.Treeview(self.frame, columns=[c[0] for c in COLUMNS], show='headings', height=15)
+        for key, heading, width in COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor='w' if key == 'name' else 'e', stretch=key == 'name')
+        self.tree.pack(fill='both', expand=True, padx=5, pady=5)
+
+        self.summary_label = tk.Label(self.frame, text="", bg='white', font=('Arial', 9), justify='left')
+        self.summary_label.pack(anchor='w', padx=10, pady=(0, 10))
+
+        self.models = []
+
+    def refresh(self, baselines, arch_data, dirty=None, rates=None):
+        """Aggiorna le righe toccate da ``dirty`` (tutte se ``None``)"""
+        if dirty is None or dirty & GLOBAL_KEYS or any(key[0] == 'rates' for key in dirty):
+            changed = range(len(baselines))
+        else:
+            changed = sorted({key[1] for key in dirty
+                              if key[0] == 'baseline_data' and len(key) > 1 and key[1] < len(baselines)})
+
+        # Allinea il numero di righe
+        del self.models[len(baselines):]
+        while len(self.models) < len(baselines):
+            self.models.append(None)
+        for iid in self.tree.get_children():
+            if int(iid) >= len(baselines):
+                self.tree.delete(iid)
+
+        for index in changed:
+            self.models[index] = self._baseline_model(index, baselines[index], arch_data, rates)
+            values = self._row_values(baselines[index], self.models[index])
+            if self.tree.exists(str(index)):
+                self.tree.item(str(index), values=values)
+            else:
+                self.tree.insert('', index, iid=str(index), values=values)
+
+        self._refresh_summary()
+
+    def _baseline_model(self, index, baseline, arch_data, rates):
+        # Import differito: il modello carica NumPy, non necessario per il primo disegno
+        from quotation_model import compute_baseline_model
+        try:
+            if int(baseline['quarters']) < 1:
+                return None
+            return compute_baseline_model(index, baseline, arch_data, rates)
+        except (TypeError, ValueError, KeyError):
+            # Valore non valido durante la digitazione, o ripartizione su un ruolo senza tariffa
+            return None
+
+    def _row_values(self, baseline, model):
+        if model is None:
+            return (baseline['name'], "—", "—", "—", "—", "—")
+        return (
+            model.name,
+            f"{model.quarters} Q",
+            format_thousands(model.total_effort),
+            _euro(model.total_cost),
+            f"{model.margin}%",
+            _euro(model.final_price)
+        )
+
+    def _refresh_summary(self):
+        models = [model for model in self.models if model is not None]
+        if not models:
+            self.summary_label.config(text="")
+            return
+
+        cheapest = min(models, key=lambda model: model.final_price)
+        dearest = max(models, key=lambda model: model.final_price)
+        self.summary_label.config(
+            text=f"Opzione più economica: {cheapest.name} ({_euro(cheapest.final_price)})\n"
+                 f"Opzione più costosa: {dearest.name} ({_euro(dearest.final_price)})"
+        )
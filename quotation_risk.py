@@ -0,0 +1,190 @@
+"""Simulazione Monte Carlo dell'incertezza sull'effort in base al livello di rischio.
+
+Ogni voce di progetto riceve in ogni prova un moltiplicatore di effort
+estratto da una distribuzione triangolare che dipende dal livello di
+rischio della baseline. Dalle prove si ricavano i percentili P50/P80/P95
+di effort e costo e un istogramma dell'effort totale.
+
+Con NumPy le prove sono vettoriali e le baseline vengono simulate in
+parallelo su più thread (la generazione casuale e i prodotti matriciali di
+NumPy rilasciano il GIL); senza NumPy si usa ``random`` con meno prove.
+"""
+import math
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Tuple
+
+from quotation_effort import np, HAVE_NUMPY
+
+# Moltiplicatori dell'effort (minimo, più probabile, massimo) per livello di rischio
+RISK_PROFILES = {
+    'Basso': (0.95, 1.0, 1.15),
+    'Medio': (0.9, 1.05, 1.35),
+    'Alto': (0.9, 1.15, 1.7),
+    'Molto Alto': (0.9, 1.3, 2.2)
+}
+
+PERCENTILES = (50, 80, 95)
+DEFAULT_TRIALS = 50000 if HAVE_NUMPY else 5000
+DEFAULT_SEED = 12345
+HISTOGRAM_BINS = 20
+
+# Numero massimo di estrazioni per blocco, per limitare la memoria con molte voci
+MAX_DRAWS_PER_CHUNK = 2000000
+
+
+class BaselineRisk(NamedTuple):
+    """Percentili di effort e costo di una baseline"""
+    name: str
+    risk_level: str
+    effort: Tuple[float, ...]  # un valore per ogni elemento di PERCENTILES
+    cost: Tuple[float, ...]
+
+
+class QuoteRisk(NamedTuple):
+    """Risultato della simulazione di tutte le baseline"""
+    trials: int
+    baselines: Tuple[BaselineRisk, ...]
+    bin_edges: Tuple[float, ...]  # estremi comuni a tutte le baseline
+    histograms: Tuple[Tuple[int, ...], ...]  # conteggi per baseline
+
+
+def _simulate_numpy(item_totals, item_costs, profile, trials, seed):
+    rng = np.random.default_rng(seed)
+    efforts = np.asarray(item_totals, dtype=float)
+    costs = np.asarray(item_costs, dtype=float)
+    effort_samples = np.zeros(trials)
+    cost_samples = np.zeros(trials)
+    if not len(efforts):
+        return effort_samples, cost_samples
+
+    low, mode, high = profile
+    chunk = max(1, MAX_DRAWS_PER_CHUNK // len(efforts))
+    for start in range(0, trials, chunk):
+        stop = min(trials, start + chunk)
+        multipliers = rng.triangular(low, mode, high, size=(stop - start, len(efforts)))
+        effort_samples[start:stop] = multipliers @ efforts
+        cost_samples[start:stop] = multipliers @ costs
+    return effort_samples, cost_samples
+
+
+def _simulate_python(item_totals, item_costs, profile, trials, seed):
+    rng = random.Random(seed)
+    low, mode, high = profile
+    effort_samples = []
+    cost_samples = []
+    for _ in range(trials):
+        effort = cost = 0.0
+        for item_total, item_cost in zip(item_totals, item_costs):
+            multiplier = rng.triangular(low, high, mode)
+            effort += item_total * multiplier
+            cost += item_cost * multiplier
+        effort_samples.append(effort)
+        cost_samples.append(cost)
+    return effort_samples, cost_samples
+
+
+def _percentiles(samples):
+    """Percentili con interpolazione lineare (come ``numpy.percentile``)"""
+    if HAVE_NUMPY and not isinstance(samples, list):
+        return tuple(float(v) for v in np.percentile(samples, PERCENTILES))
+    ordered = sorted(samples)
+    values = []
+    for p in PERCENTILES:
+        position = (len(ordered) - 1) * p / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        values.append(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower))
+    return tuple(values)
+
+
+def _bounds(samples):
+    if HAVE_NUMPY and not isinstance(samples, list):
+        return float(samples.min()), float(samples.max())
+    return min(samples), max(samples)
+
+
+def _histogram(samples, edges):
+    if HAVE_NUMPY and not isinstance(samples, list):
+        return tuple(int(c) for c in np.histogram(samples, bins=edges)[0])
+    counts = [0] * (len(edges) - 1)
+    low, high = edges[0], edges[-1]
+    width = (high - low) / (len(edges) - 1)
+    for value in samples:
+        index = int((value - low) / width) if width > 0 else 0
+        counts[min(max(index, 0), len(counts) - 1)] += 1
+    return tuple(counts)
+
+
+def simulate_quote_risk(model, trials=DEFAULT_TRIALS, seed=DEFAULT_SEED, use_numpy=None, workers=None):
+    """Simula tutte le baseline del modello e restituisce un ``QuoteRisk``.
+
+    Il seme fisso rende la simulazione ripetibile: la stessa configurazione
+    produce sempre gli stessi percentili.
+    """
+    if use_numpy is None:
+        use_numpy = HAVE_NUMPY
+    simulate = _simulate_numpy if use_numpy else _simulate_python
+
+    seeds = [seed + baseline.index for baseline in model.baselines]
+    jobs = [
+        (baseline.item_totals, baseline.item_costs,
+         RISK_PROFILES.get(baseline.risk_level, RISK_PROFILES['Medio']), trials, baseline_seed)
+        for baseline, baseline_seed in zip(model.baselines, seeds)
+    ]
+
+    if use_numpy and len(jobs) > 1:
+        workers = workers or min(len(jobs), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            samples = list(executor.map(lambda job: simulate(*job), jobs))
+    else:
+        samples = [simulate(*job) for job in jobs]
+
+    # Estremi dell'istogramma comuni a tutte le baseline, per confrontarle
+    bounds = [_bounds(effort) for effort, _ in samples]
+    low = min((lower for lower, _ in bounds), default=0.0)
+    high = max((upper for _, upper in bounds), default=0.0)
+    if high <= low:
+        high = low + 1
+    step = (high - low) / HISTOGRAM_BINS
+    edges = tuple(low + step * i for i in range(HISTOGRAM_BINS)) + (high,)
+
+    return QuoteRisk(
+        trials=trials,
+        baselines=tuple(
+            BaselineRisk(
+                name=baseline.name,
+                risk_level=baseline.risk_level,
+                effort=_percentiles(effort),
+                cost=_percentiles(cost)
+            )
+            for baseline, (effort, cost) in zip(model.baselines, samples)
+        ),
+        bin_edges=edges,
+        histograms=tuple(_histogram(effort, edges) for effort, _ in samples)
+    )
+
+
+def risk_to_dict(risk):
+    """Rappresentazione JSON di un ``QuoteRisk``"""
+    return {
+        'trials': risk.trials,
+        'baselines': [list(baseline) for baseline in risk.baselines],
+        'bin_edges': list(risk.bin_edges),
+        'histograms': [list(histogram) for histogram in risk.histograms]
+    }
+
+
+def risk_from_dict(data):
+    """Ricostruisce un ``QuoteRisk`` da ``risk_to_dict``"""
+    return QuoteRisk(
+        trials=data['trials'],
+        baselines=tuple(
+            BaselineRisk(name, risk_level, tuple(effort), tuple(cost))
+            for name, risk_level, effort, cost in data['baselines']
+        ),
+        bin_edges=tuple(data['bin_edges']),
+        histograms=tuple(tuple(histogram) for histogram in data['histograms'])
+    )
+
@@ -0,0 +1,402 @@
+"""Servizio HTTP locale per generare quotazioni da altri programmi (es. il CRM).
+
+Solo libreria standard: il server è ``asyncio`` e i file Excel vengono
+generati in un ``ProcessPoolExecutor``, quindi una quotazione lenta occupa
+un solo processo e non blocca le altre richieste né il server.
+
+- ``POST /quote`` con la configurazione JSON (lo stesso formato di
+  **💾 Salva Configurazione**) restituisce il file xlsx. Opzioni nella
+  query string: ``formulas=1``, ``streaming=1``, ``date=AAAA-MM-GG``.
+- ``GET /metrics``: richieste, errori, coda, throughput e latenze (JSON).
+- ``GET /health``: stato del servizio.
+
+Al più ``workers`` quotazioni sono in generazione e ``queue_size`` in
+attesa di un processo libero; oltre il limite la richiesta riceve ``503`` con ``Retry-After``.
+Una richiesta che supera ``timeout`` secondi (attesa compresa) riceve
+``504``; il processo che la stava generando non può essere interrotto,
+quindi il suo posto nel pool si libera solo quando termina.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from urllib.parse import parse_qs, quote as url_quote, urlsplit
+
+from quotation_cache import OutputCache, DEFAULT_MAX_BYTES
+from quotation_catalog import default_catalog
+from quotation_config import default_filename, normalize_config, validate_config
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_TIMEOUT = 120.0
+
+# Limiti della richiesta HTTP
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 4 * 1024 * 1024
+READ_TIMEOUT = 10.0
+
+CHUNK_SIZE = 64 * 1024
+
+# Latenze conservate per i percentili e finestra del throughput
+LATENCY_WINDOW = 1000
+THROUGHPUT_SECONDS = 60.0
+
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 408: "Request Timeout",
+    411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable", 504: "Gateway Timeout"
+}
+
+_TRUE = ('1', 'true', 'si', 'sì', 'yes')
+
+
+class HTTPError(Exception):
+    """Errore da restituire al client con codice ``status``"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _warmup():
+    """Inizializzazione dei processi: il motore è già importato alla prima richiesta"""
+    import quotation_engine  # noqa: F401
+
+    # Ctrl+C arriva a tutti i processi: il pool viene chiuso dal processo principale
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def render_quote(config, filename, write_only=False, formulas=False, quote_date=None, cache_dir=None,
+                 cache_bytes=DEFAULT_MAX_BYTES):
+    """Genera la quotazione nel processo di lavoro; restituisce i secondi impiegati"""
+    import quotation_engine
+
+    start = time.perf_counter()
+    cache = OutputCache(cache_dir, cache_bytes) if cache_dir else None
+    quotation_engine.generate_quotation(config, filename, write_only=write_only, quote_date=quote_date,
+                                        cache=cache, formulas=formulas)
+    return time.perf_counter() - start
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ServiceMetrics:
+    """Contatori e latenze delle richieste di generazione"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.invalid = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)  # (istante, attesa, generazione, totale)
+
+    def record(self, queued, rendering, total):
+        self.completed += 1
+        self.latencies.append((time.monotonic(), queued, rendering, total))
+
+    def snapshot(self, queued, running, workers, queue_size):
+        """Metriche correnti come dizionario JSON"""
+        now = time.monotonic()
+        recent = sum(1 for finished, *_ in self.latencies if now - finished <= THROUGHPUT_SECONDS)
+
+        def summary(position):
+            ordered = sorted(sample[position] for sample in self.latencies)
+            return {
+                'p50_ms': _ms(_percentile(ordered, 0.50)),
+                'p95_ms': _ms(_percentile(ordered, 0.95)),
+                'p99_ms': _ms(_percentile(ordered, 0.99)),
+                'max_ms': _ms(ordered[-1] if ordered else None)
+            }
+
+        return {
+            'uptime_s': round(now - self.started, 1),
+            'workers': workers,
+            'queue_size': queue_size,
+            'running': running,
+            'queued': queued,
+            'requests': self.requests,
+            'invalid': self.invalid,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            'throughput_per_min': round(recent * 60.0 / min(THROUGHPUT_SECONDS, max(now - self.started, 1e-9)), 2),
+            'latency': {'queue': summary(1), 'render': summary(2), 'total': summary(3)}
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class QuoteService:
+    """Server HTTP con coda limitata davanti a un pool di processi"""
+
+    def __init__(self, workers=None, queue_size=DEFAULT_QUEUE_SIZE, timeout=DEFAULT_TIMEOUT, cache_dir=None,
+                 cache_bytes=DEFAULT_MAX_BYTES):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.cache_bytes = cache_bytes
+        self.metrics = ServiceMetrics()
+        self.waiting = 0  # richieste in attesa di un processo libero
+        self.running = 0  # generazioni in corso, comprese quelle scadute
+        self.pool = None
+        self.slots = None
+        self.server = None
+        self.work_dir = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Avvia pool e server; ``port=0`` sceglie una porta libera"""
+        # Processi avviati con "spawn" (come su Windows) e tutti prima di accettare
+        # connessioni: con "fork" erediterebbero i socket dei client aperti
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_warmup)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, os.getpid) for _ in range(self.workers)))
+        self.slots = asyncio.Semaphore(self.workers)
+        self.work_dir = tempfile.mkdtemp(prefix="quotazioni_")
+        self.server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        try:
+            if self.server is not None:
+                self.server.close()
+                await self.server.wait_closed()
+            if self.pool is not None:
+                self.pool.shutdown(wait=True, cancel_futures=True)
+        finally:
+            if self.work_dir is not None:
+                shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    # --- HTTP -----------------------------------------------------------
+
+    async def _read_request(self, reader):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), READ_TIMEOUT)
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "Intestazioni troppo lunghe") from None
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "Richiesta incompleta") from None
+        lines = head.decode('latin-1').split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Riga di richiesta non valida") from None
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        body = b""
+        if method == 'POST':
+            if 'content-length' not in headers:
+                raise HTTPError(411, "Content-Length obbligatorio")
+            try:
+                length = int(headers['content-length'])
+            except ValueError:
+                raise HTTPError(400, "Content-Length non valido") from None
+            if length > MAX_BODY_BYTES:
+                raise HTTPError(413, f"Configurazione oltre {MAX_BODY_BYTES // 1024} KB")
+            try:
+                body = await asyncio.wait_for(reader.readexactly(length), READ_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                raise HTTPError(408, "Corpo della richiesta incompleto") from None
+        return method, target, body
+
+    async def _send(self, writer, status, body=b"", content_type="application/json; charset=utf-8",
+                    headers=None):
+        head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}", "Connection: close"]
+        head.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+    async def _send_json(self, writer, status, payload, headers=None):
+        await self._send(writer, status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), headers=headers)
+
+    async def _send_file(self, writer, path, download_name):
+        size = os.path.getsize(path)
+        fallback = download_name.encode('ascii', 'replace').decode('ascii').replace('"', '_')
+        head = ["HTTP/1.1 200 OK", f"Content-Type: {XLSX_TYPE}", f"Content-Length: {size}",
+                f"Content-Disposition: attachment; filename=\"{fallback}\"; filename*=UTF-8''{url_quote(download_name)}",
+                "Connection: close"]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1'))
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+
+    async def handle(self, reader, writer):
+        """Gestisce una connessione: una richiesta, poi chiusura"""
+        try:
+            try:
+                method, target, body = await self._read_request(reader)
+                url = urlsplit(target)
+                if url.path == '/quote':
+                    if method != 'POST':
+                        raise HTTPError(405, "Usare POST", {'Allow': 'POST'})
+                    await self.quote(writer, body, parse_qs(url.query))
+                elif url.path in ('/metrics', '/health'):
+                    if method != 'GET':
+                        raise HTTPError(405, "Usare GET", {'Allow': 'GET'})
+                    if url.path == '/metrics':
+                        await self._send_json(writer, 200, self.metrics.snapshot(
+                            self.waiting, self.running, self.workers, self.queue_size))
+                    else:
+                        await self._send_json(writer, 200, {'status': 'ok'})
+                else:
+                    raise HTTPError(404, f"Percorso sconosciuto: {url.path}")
+            except HTTPError as e:
+                await self._send_json(writer, e.status, {'error': str(e)}, e.headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Client disconnesso
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    # --- Generazione ----------------------------------------------------
+
+    def _parse_quote(self, body, query):
+        """Configurazione normalizzata e opzioni di generazione, HTTPError 400 se non valide"""
+        try:
+            config = json.loads(body.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise HTTPError(400, f"JSON non valido: {e}") from None
+        if not isinstance(config, dict):
+            raise HTTPError(400, "La configurazione deve essere un oggetto JSON")
+        try:
+            config = normalize_config(config)
+            validate_config(config, default_catalog())
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise HTTPError(400, str(e)) from None
+
+        def flag(name):
+            return query.get(name, [''])[-1].lower() in _TRUE
+
+        quote_date = None
+        if 'date' in query:
+            try:
+                quote_date = date.fromisoformat(query['date'][-1])
+            except ValueError:
+                raise HTTPError(400, f"Data non valida: {query['date'][-1]} (formato AAAA-MM-GG)") from None
+        return config, {'write_only': flag('streaming'), 'formulas': flag('formulas'), 'quote_date': quote_date}
+
+    async def _render(self, config, filename, options):
+        """Attende un processo libero e genera il file; restituisce (attesa, generazione)"""
+        loop = asyncio.get_running_loop()
+        if self.waiting >= self.queue_size:
+            self.metrics.rejected += 1
+            raise HTTPError(503, "Coda piena, riprovare più tardi", {'Retry-After': '5'})
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - queued_at
+        try:
+            future = self.pool.submit(render_quote, config, filename, cache_dir=self.cache_dir,
+                                      cache_bytes=self.cache_bytes, **options)
+        except BaseException:
+            self.slots.release()
+            raise
+        self.running += 1
+
+        def finished(_):
+            # Il posto si libera quando il processo termina, anche dopo un timeout
+            loop.call_soon_threadsafe(self._release)
+
+        future.add_done_callback(finished)
+        try:
+            seconds = await asyncio.shield(asyncio.wrap_future(future))
+        except asyncio.CancelledError:
+            future.add_done_callback(lambda _: _remove(filename))
+            raise
+        return waited, seconds
+
+    def _release(self):
+        self.running -= 1
+        self.slots.release()
+
+    async def quote(self, writer, body, query):
+        """``POST /quote``: genera e restituisce la quotazione"""
+        self.metrics.requests += 1
+        try:
+            config, options = self._parse_quote(body, query)
+        except HTTPError:
+            self.metrics.invalid += 1
+            raise
+        start = time.perf_counter()
+        filename = os.path.join(self.work_dir, f"{uuid.uuid4().hex}.xlsx")
+        try:
+            waited, seconds = await asyncio.wait_for(self._render(config, filename, options), self.timeout)
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            raise HTTPError(504, f"Quotazione non generata entro {self.timeout:g} s") from None
+        except HTTPError:
+            raise
+        except Exception as e:
+            self.metrics.failed += 1
+            raise HTTPError(500, f"Errore durante la generazione: {e}") from None
+
+        try:
+            await self._send_file(writer, filename, default_filename(config))
+        finally:
+            _remove(filename)
+        self.metrics.record(waited, seconds, time.perf_counter() - start)
+
+
+async def _serve(host, port, **options):
+    service = QuoteService(**options)
+    address = await service.start(host, port)
+    print(f"🌐 Servizio quotazioni su http://{address[0]}:{address[1]} "
+          f"({service.workers} processi, coda {service.queue_size}, timeout {service.timeout:g} s)")
+    print("   POST /quote · GET /metrics · GET /health — Ctrl+C per terminare")
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, **options):
+    """Avvia il servizio e resta in ascolto fino a Ctrl+C"""
+    try:
+        asyncio.run(_serve(host, port, **options))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,85 @@
+"""Registro degli stili con nome condivisi da tutti i fogli.
+
+Gli stili vengono registrati una sola volta per workbook come ``NamedStyle``
+di openpyxl: applicare uno stile a una cella è quindi una sola assegnazione
+(``cell.style = nome``) e ``styles.xml`` contiene un'unica voce per stile.
+"""
+from openpyxl.styles import NamedStyle, Font, PatternFill, Border, Side, Alignment
+from openpyxl.styles.fonts import DEFAULT_FONT
+
+CURRENCY_FORMAT = '€#,##0'
+NUMBER_FORMAT = '#,##0'
+PERCENT_FORMAT = '0%'
+
+# Nomi degli stili (prefisso "QG" per non collidere con gli stili predefiniti di Excel)
+SHEET_TITLE = "QG Titolo Foglio"
+TITLE = "QG Titolo"
+SECTION = "QG Sezione"
+LABEL = "QG Etichetta"
+BOLD = "QG Grassetto"
+CURRENCY = "QG Valuta"
+DASHBOARD_HEADER = "QG Intestazione Dashboard"
+BASELINE_HEADER = "QG Intestazione Baseline"
+QUOTATION_HEADER = "QG Intestazione Quotazione"
+BORDERED = "QG Bordato"
+BORDERED_CENTER = "QG Bordato Centrato"
+BORDERED_CURRENCY = "QG Bordato Valuta"
+BORDERED_NUMBER = "QG Bordato Numero"
+BORDERED_BOLD = "QG Bordato Grassetto"
+BORDERED_PERCENT = "QG Bordato Percentuale"
+TOTAL = "QG Totale"
+TOTAL_CENTER = "QG Totale Centrato"
+TOTAL_CURRENCY = "QG Totale Valuta"
+
+
+def _font(**attributes):
+    """Font del workbook di default con gli attributi indicati"""
+    base = dict(name=DEFAULT_FONT.name, family=DEFAULT_FONT.family, scheme=DEFAULT_FONT.scheme,
+                size=DEFAULT_FONT.sz, color=DEFAULT_FONT.color)
+    base.update(attributes)
+    return Font(**base)
+
+
+def _solid_fill(color):
+    return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+
+_THIN = Side(style='thin')
+_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+_CENTER = Alignment(horizontal='center')
+_TOTAL_FILL = _solid_fill("E8E8E8")
+_BOLD = _font(bold=True)
+
+# Definizione di ogni stile: attributi passati a NamedStyle
+STYLE_DEFINITIONS = {
+    SHEET_TITLE: dict(font=_font(bold=True, size=18)),
+    TITLE: dict(font=_font(bold=True, size=16)),
+    SECTION: dict(font=_font(bold=True, size=14)),
+    LABEL: dict(font=_font(bold=True, size=12)),
+    BOLD: dict(font=_BOLD),
+    CURRENCY: dict(font=_font(), number_format=CURRENCY_FORMAT),
+    DASHBOARD_HEADER: dict(font=_font(bold=True, size=14, color="FFFFFF"), fill=_solid_fill("2C3E50"),
+                           border=_BORDER, alignment=_CENTER),
+    BASELINE_HEADER: dict(font=_font(bold=True, size=12, color="FFFFFF"), fill=_solid_fill("3498DB"),
+                          border=_BORDER, alignment=_CENTER),
+    QUOTATION_HEADER: dict(font=_font(bold=True, size=14, color="FFFFFF"), fill=_solid_fill("27AE60"),
+                           border=_BORDER, alignment=_CENTER),
+    BORDERED: dict(font=_font(), border=_BORDER),
+    BORDERED_CENTER: dict(font=_font(), border=_BORDER, alignment=_CENTER),
+    BORDERED_CURRENCY: dict(font=_font(), border=_BORDER, alignment=_CENTER, number_format=CURRENCY_FORMAT),
+    BORDERED_NUMBER: dict(font=_font(), border=_BORDER, alignment=_CENTER, number_format=NUMBER_FORMAT),
+    BORDERED_BOLD: dict(font=_BOLD, border=_BORDER, alignment=_CENTER),
+    BORDERED_PERCENT: dict(font=_font(), border=_BORDER, alignment=_CENTER, number_format=PERCENT_FORMAT),
+    TOTAL: dict(font=_BOLD, fill=_TOTAL_FILL, border=_BORDER),
+    TOTAL_CENTER: dict(font=_BOLD, fill=_TOTAL_FILL, border=_BORDER, alignment=_CENTER),
+    TOTAL_CURRENCY: dict(font=_BOLD, fill=_TOTAL_FILL, border=_BORDER, alignment=_CENTER,
+                         number_format=CURRENCY_FORMAT),
+}
+
+
+def register_styles(wb):
+    """Registra nel workbook tutti gli stili del registro (una sola volta)"""
+    existing = set(wb.named_styles)
+    for name, attributes in STYLE_DEFINITIONS.items():
+        if name not in existing:
+            wb.add_named_style(NamedStyle(name=name, **attributes))
@@ -0,0 +1,331 @@
+"""Esplorazione dei prezzi: griglia di scenari e analisi di sensibilità.
+
+Per ogni baseline il prezzo dipende da tre leve: durata in quarter,
+moltiplicatore delle tariffe e margine. Il costo a tariffe nominali viene
+calcolato una sola volta per ogni coppia baseline × durata; il prezzo di
+tutte le combinazioni è poi il prodotto esterno
+
+    prezzo[b, q, k, m] = costo[b, q] × moltiplicatore[k] × (1 + margine[m] / 100)
+
+che con NumPy è un'unica operazione vettoriale anche con 10^5-10^6
+combinazioni. Senza NumPy si usa l'implementazione in puro Python, che
+produce gli stessi numeri in tempi più lunghi.
+
+L'analisi di sensibilità (grafico a tornado) varia una leva alla volta
+attorno al punto nominale di una baseline: margine, tariffa di ogni ruolo,
+tutte le tariffe insieme e durata.
+"""
+import heapq
+import math
+from typing import NamedTuple, Optional, Tuple
+
+from quotation_effort import np, HAVE_NUMPY, effort_tensor, item_effort
+from quotation_model import build_rate_card, compute_quote_model
+
+DEFAULT_MARGINS = tuple(range(0, 61))  # percentuali
+DEFAULT_RATE_MULTIPLIERS = tuple(round(0.8 + 0.01 * k, 2) for k in range(41))
+DEFAULT_TOP_OPTIONS = 10
+
+# Variazioni delle leve nel grafico a tornado
+TORNADO_MARGIN_POINTS = 10
+TORNADO_RATE_CHANGE = 0.2
+TORNADO_QUARTERS = 1
+
+# Elementi massimi del tensore dell'effort per blocco, per limitare la memoria
+MAX_TENSOR_CELLS = 4000000
+
+
+class SweepSpec(NamedTuple):
+    """Griglia degli scenari da valutare"""
+    margins: Tuple[float, ...] = DEFAULT_MARGINS
+    multipliers: Tuple[float, ...] = DEFAULT_RATE_MULTIPLIERS
+    quarters: Optional[Tuple[int, ...]] = None  # default: durate delle baseline ±2
+    budget: Optional[float] = None
+    top: int = DEFAULT_TOP_OPTIONS
+    focus: int = 0  # baseline del grafico a tornado
+
+
+class PriceSweep(NamedTuple):
+    """Costi e prezzi di tutte le combinazioni della griglia"""
+    names: Tuple[str, ...]
+    quarters: Tuple[int, ...]
+    multipliers: Tuple[float, ...]
+    margins: Tuple[float, ...]
+    costs: object  # baseline × durata (€, tariffe nominali)
+    prices: object  # baseline × durata × moltiplicatore × margine (€)
+
+    @property
+    def combinations(self):
+        return len(self.names) * len(self.quarters) * len(self.multipliers) * len(self.margins)
+
+
+class SweepOption(NamedTuple):
+    """Una combinazione della griglia"""
+    baseline: int
+    name: str
+    quarters: int
+    multiplier: float
+    margin: float
+    cost: float  # alle tariffe moltiplicate
+    price: float
+
+    @property
+    def profit(self):
+        return self.price - self.cost
+
+
+class Sensitivity(NamedTuple):
+    """Effetto di una leva sul prezzo della baseline di riferimento"""
+    factor: str
+    low_price: float
+    high_price: float
+
+    @property
+    def swing(self):
+        return abs(self.high_price - self.low_price)
+
+
+class SweepResult(NamedTuple):
+    """Risultato completo dell'analisi, usato dal foglio Sensibilità"""
+    spec: SweepSpec
+    sweep: PriceSweep
+    best: Tuple[SweepOption, ...]  # vuoto senza budget
+    nominal_prices: Tuple[float, ...]  # prezzo di ogni baseline con durata, tariffe e margine nominali
+    focus_name: str
+    nominal_price: float
+    tornado: Tuple[Sensitivity, ...]  # ordinato per ampiezza decrescente
+
+
+def default_quarters(config):
+    """Durate da esplorare: dalla più corta meno 2 alla più lunga più 2"""
+    durations = [baseline['quarters'] for baseline in config['baseline_data']]
+    return tuple(range(max(1, min(durations) - 2), max(durations) + 3))
+
+
+def _item_totals_numpy(pairs, item_count):
+    """Effort totale per voce di ogni coppia (baseline, durata): coppie × voci"""
+    totals = np.zeros((len(pairs), item_count), dtype=np.int64)
+    if not pairs:
+        return totals
+    longest = max(quarters for _, quarters in pairs)
+    chunk = max(1, MAX_TENSOR_CELLS // max(1, item_count * longest))
+    for start in range(0, len(pairs), chunk):
+        block = pairs[start:start + chunk]
+        grid = effort_tensor([b for b, _ in block], [q for _, q in block], item_count)
+        totals[start:start + len(block)] = grid.sum(axis=2)
+    return totals
+
+
+def _item_totals_python(pairs, item_count):
+    return [[sum(item_effort(b, i, quarters)) for i in range(item_count)] for b, quarters in pairs]
+
+
+def duration_costs(baseline_indices, quarters, rate_card, use_numpy=None):
+    """Costo totale e per ruolo delle baseline indicate per ogni durata.
+
+    Restituisce ``(costi, costi_ruolo)``: baseline × durata e baseline ×
+    durata × ruolo. Il costo totale è calcolato come nel modello
+    (effort per voce × tariffa pesata), quindi coincide con
+    ``BaselineModel.total_cost`` alla durata della baseline.
+    """
+    if use_numpy is None:
+        use_numpy = HAVE_NUMPY
+    item_count = len(rate_card.item_rates)
+    baseline_count = len(baseline_indices)
+    pairs = [(b, q) for b in baseline_indices for q in quarters]
+
+    if use_numpy:
+        totals = _item_totals_numpy(pairs, item_count)
+        costs = totals @ np.asarray(rate_card.item_rates, dtype=np.float64)
+        allocation = np.asarray(rate_card.allocation, dtype=np.float64).reshape(item_count, len(rate_card.roles))
+        role_costs = (totals.astype(np.float64) @ allocation) / 100 * np.asarray(rate_card.rates, dtype=np.float64)
+        shape = (baseline_count, len(quarters))
+        return costs.reshape(shape), role_costs.reshape(shape + (len(rate_card.roles),))
+
+    totals = _item_totals_python(pairs, item_count)
+    costs = [sum(total * rate for total, rate in zip(row, rate_card.item_rates)) for row in totals]
+    role_costs = []
+    for row in totals:
+        accumulated = [0] * len(rate_card.roles)
+        for total, shares in zip(row, rate_card.allocation):
+            for r, share in enumerate(shares):
+                accumulated[r] += total * share
+        role_costs.append([value / 100 * rate for value, rate in zip(accumulated, rate_card.rates)])
+    n = len(quarters)
+    return ([costs[b * n:(b + 1) * n] for b in range(baseline_count)],
+            [role_costs[b * n:(b + 1) * n] for b in range(baseline_count)])
+
+
+def price_grid(costs, multipliers, margins, use_numpy=None):
+    """Prezzi baseline × durata × moltiplicatore × margine"""
+    if use_numpy is None:
+        use_numpy = HAVE_NUMPY
+    if use_numpy:
+        markup = 1 + np.asarray(margins, dtype=np.float64) / 100
+        return (np.asarray(costs, dtype=np.float64)[:, :, None, None]
+                * np.asarray(multipliers, dtype=np.float64)[None, None, :, None]
+                * markup[None, None, None, :])
+    markups = [1 + margin / 100 for margin in margins]
+    return [
+        [[[cost * multiplier * markup for markup in markups] for multiplier in multipliers] for cost in row]
+        for row in costs
+    ]
+
+
+def best_options(sweep, budget, limit=DEFAULT_TOP_OPTIONS):
+    """Opzioni con prezzo entro ``budget`` e utile più alto.
+
+    Per ogni coppia baseline × durata si sceglie la combinazione di
+    moltiplicatore e margine con l'utile più alto (prezzo meno costo alle
+    tariffe moltiplicate); le coppie vengono poi ordinate per utile, a
+    parità di utile dal prezzo più basso.
+    """
+    shape = (len(sweep.names), len(sweep.quarters), len(sweep.multipliers), len(sweep.margins))
+    if not all(shape) or limit <= 0:
+        return ()
+
+    if HAVE_NUMPY and not isinstance(sweep.prices, list):
+        markups = 1 + np.asarray(sweep.margins, dtype=np.float64) / 100
+        profits = np.where(sweep.prices <= budget, sweep.prices - sweep.prices / markups, -np.inf)
+        profits = profits.reshape(shape[0] * shape[1], -1)
+        prices = sweep.prices.reshape(profits.shape)
+        best = profits.argmax(axis=1)
+        pair_profits = profits[np.arange(len(best)), best]
+        pair_prices = prices[np.arange(len(best)), best]
+        candidates = np.flatnonzero(np.isfinite(pair_profits))
+        order = np.lexsort((candidates, pair_prices[candidates], -pair_profits[candidates]))[:limit]
+        chosen = [
+            divmod(int(pair), shape[1]) + divmod(int(best[pair]), shape[3])
+            for pair in candidates[order]
+        ]
+    else:
+        markups = [1 + margin / 100 for margin in sweep.margins]
+        ranked = []
+        for b, rows in enumerate(sweep.prices):
+            for q, by_multiplier in enumerate(rows):
+                pair_best = None
+                for k, by_margin in enumerate(by_multiplier):
+                    for m, price in enumerate(by_margin):
+                        profit = price - price / markups[m]
+                        if price <= budget and (pair_best is None or profit > pair_best[0]):
+                            pair_best = (profit, price, (b, q, k, m))
+                if pair_best is not None:
+                    profit, price, index = pair_best
+                    ranked.append((-profit, price, index))
+        chosen = [index for _, _, index in heapq.nsmallest(limit, ranked)]
+
+    options = []
+    for b, q, k, m in chosen:
+        b, q, k, m = int(b), int(q), int(k), int(m)
+        price = float(sweep.prices[b][q][k][m])
+        options.append(SweepOption(
+            baseline=b,
+            name=sweep.names[b],
+            quarters=sweep.quarters[q],
+            multiplier=sweep.multipliers[k],
+            margin=sweep.margins[m],
+            cost=float(sweep.costs[b][q]) * sweep.multipliers[k],
+            price=price
+        ))
+    return tuple(options)
+
+
+def tornado(baseline, rate_card, use_numpy=None):
+    """Sensibilità del prezzo di una baseline a ogni leva, dalla più influente"""
+    markup = 1 + baseline.margin / 100
+    low_margin = max(0, baseline.margin - TORNADO_MARGIN_POINTS)
+    durations = (max(1, baseline.quarters - TORNADO_QUARTERS), baseline.quarters,
+                 baseline.quarters + TORNADO_QUARTERS)
+
+    costs, role_costs = duration_costs([baseline.index], durations, rate_card, use_numpy)
+    costs = [float(cost) for cost in costs[0]]
+    nominal_roles = [float(cost) for cost in role_costs[0][1]]
+    cost = costs[1]
+
+    factors = [
+        Sensitivity(f"Margine ±{TORNADO_MARGIN_POINTS} punti",
+                    cost * (1 + low_margin / 100), cost * (1 + (baseline.margin + TORNADO_MARGIN_POINTS) / 100)),
+        Sensitivity(f"Tutte le tariffe ±{TORNADO_RATE_CHANGE:.0%}",
+                    cost * (1 - TORNADO_RATE_CHANGE) * markup, cost * (1 + TORNADO_RATE_CHANGE) * markup),
+        Sensitivity(f"Durata ±{TORNADO_QUARTERS} quarter", costs[0] * markup, costs[2] * markup)
+    ]
+    for role, role_cost in zip(rate_card.roles, nominal_roles):
+        if role_cost:
+            delta = role_cost * TORNADO_RATE_CHANGE
+            factors.append(Sensitivity(f"Tariffa {role} ±{TORNADO_RATE_CHANGE:.0%}",
+                                       (cost - delta) * markup, (cost + delta) * markup))
+    return tuple(sorted(factors, key=lambda factor: -factor.swing))
+
+
+def sweep_quote(config, arch_data, spec=None, model=None, use_numpy=None):
+    """Valuta tutta la griglia di ``spec`` per la configurazione normalizzata.
+
+    Restituisce uno ``SweepResult`` con i prezzi di tutte le combinazioni,
+    le migliori opzioni entro il budget (se indicato) e il tornado della
+    baseline ``spec.focus``.
+    """
+    spec = spec or SweepSpec()
+    model = model or compute_quote_model(config, arch_data)
+    rate_card = build_rate_card(config['rates'], arch_data)
+    quarters = tuple(spec.quarters or default_quarters(config))
+    if not 0 <= spec.focus < len(model.baselines):
+        raise ValueError(f"Baseline di riferimento non valida: {spec.focus + 1}")
+    if not quarters or min(quarters) < 1:
+        raise ValueError("Le durate della griglia devono essere di almeno un quarter")
+    if not spec.margins or min(spec.margins) < 0:
+        raise ValueError("I margini della griglia devono essere percentuali non negative")
+    if not spec.multipliers or min(spec.multipliers) <= 0:
+        raise ValueError("I moltiplicatori delle tariffe devono essere positivi")
+
+    costs, _ = duration_costs(range(len(model.baselines)), quarters, rate_card, use_numpy)
+    sweep = PriceSweep(
+        names=tuple(baseline.name for baseline in model.baselines),
+        quarters=quarters,
+        multipliers=tuple(spec.multipliers),
+        margins=tuple(spec.margins),
+        costs=costs,
+        prices=price_grid(costs, spec.multipliers, spec.margins, use_numpy)
+    )
+
+    focus = model.baselines[spec.focus]
+    return SweepResult(
+        spec=spec._replace(quarters=quarters),
+        sweep=sweep,
+        best=best_options(sweep, spec.budget, spec.top) if spec.budget is not None else (),
+        nominal_prices=tuple(baseline.final_price for baseline in model.baselines),
+        focus_name=focus.name,
+        nominal_price=focus.final_price,
+        tornado=tornado(focus, rate_card, use_numpy)
+    )
+
+
+def price_ranges(sweep):
+    """Prezzo minimo e massimo di ogni baseline su tutta la griglia"""
+    if HAVE_NUMPY and not isinstance(sweep.prices, list):
+        flat = sweep.prices.reshape(len(sweep.names), -1)
+        return tuple(zip(flat.min(axis=1).tolist(), flat.max(axis=1).tolist()))
+    ranges = []
+    for rows in sweep.prices:
+        values = [price for by_multiplier in rows for by_margin in by_multiplier for price in by_margin]
+        ranges.append((min(values), max(values)))
+    return tuple(ranges)
+
+
+def parse_grid(text, kind=float):
+    """Valori di una griglia da ``"min:max:passo"`` (estremi inclusi) o ``"a,b,c"``"""
+    try:
+        if ':' in text:
+            parts = [kind(part) for part in text.split(':')]
+            if len(parts) not in (2, 3):
+                raise ValueError
+            low, high = parts[:2]
+            step = parts[2] if len(parts) == 3 else kind(1)
+            if step <= 0 or high < low:
+                raise ValueError
+            # Tolleranza sugli errori di arrotondamento, senza superare il massimo
+            count = int(math.floor((high - low) / step + 1e-9)) + 1
+            return tuple(kind(round(low + i * step, 10)) for i in range(count))
+        return tuple(kind(part) for part in text.split(','))
+    except ValueError:
+        raise ValueError(f"Griglia non valida: '{text}' (usare min:max:passo oppure valori separati da virgole)") \
+            from None
@@ -0,0 +1,143 @@
+"""Strumentazione della generazione: intervalli temporizzati ed export Chrome trace.
+
+Ogni fase della generazione (calcolo, singoli fogli, fasi del salvataggio)
+viene registrata come intervallo con durata, argomenti (celle, stili...) e,
+se richiesto, picco di memoria Python. Il risultato si apre con
+``chrome://tracing`` o https://ui.perfetto.dev.
+
+Quando la strumentazione è disattivata si usa ``NULL_TRACER``, i cui metodi
+non fanno nulla: il costo è una chiamata di funzione per fase.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Span:
+    """Intervallo registrato dal ``Tracer``"""
+
+    __slots__ = ('name', 'category', 'start', 'end', 'depth', 'thread', 'args')
+
+    def __init__(self, name, category, start, depth, thread, args):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.end = None
+        self.depth = depth
+        self.thread = thread
+        self.args = args
+
+    @property
+    def seconds(self):
+        return (self.end - self.start) / 1e9 if self.end is not None else 0.0
+
+
+class Tracer:
+    """Registra intervalli annidati e li esporta in formato Chrome trace.
+
+    Con ``memory=True`` durante la traccia è attivo ``tracemalloc`` e ogni
+    intervallo di primo livello riporta il picco di memoria Python
+    (``picco_mb``); tracemalloc rallenta l'esecuzione, quindi i tempi vanno
+    letti con cautela.
+    """
+
+    enabled = True
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.spans = []
+        self.origin = time.perf_counter_ns()
+        self._depth = 0
+        self._started_tracemalloc = False
+
+    def start(self):
+        """Avvia la misura della memoria, se richiesta"""
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        return self
+
+    def stop(self):
+        """Ferma la misura della memoria avviata da ``start``"""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def span(self, name, category='generazione', **args):
+        """Registra il blocco ``with`` come intervallo"""
+        top_level = self._depth == 0
+        if top_level and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+        span = Span(name, category, time.perf_counter_ns(), self._depth, threading.get_ident(), args)
+        self.spans.append(span)
+        self._depth += 1
+        try:
+            yield span
+        finally:
+            self._depth -= 1
+            span.end = time.perf_counter_ns()
+            if top_level and tracemalloc.is_tracing():
+                span.args['picco_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+
+    def annotate(self, **args):
+        """Aggiunge argomenti all'ultimo intervallo di primo livello"""
+        for span in reversed(self.spans):
+            if span.depth == 0:
+                span.args.update(args)
+                return
+
+    def summary(self):
+        """Righe (nome, livello, secondi, argomenti) degli intervalli conclusi"""
+        return [(span.name, span.depth, span.seconds, dict(span.args)) for span in self.spans if span.end is not None]
+
+    def to_chrome_trace(self):
+        """Dizionario nel formato JSON di Chrome trace (eventi completi ``X``)"""
+        pid = os.getpid()
+        events = [
+            {
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': (span.start - self.origin) / 1000,  # microsecondi
+                'dur': (span.end - span.start) / 1000,
+                'pid': pid,
+                'tid': span.thread,
+                'args': span.args
+            }
+            for span in self.spans if span.end is not None
+        ]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        """Scrive la traccia in formato Chrome trace"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        return path
+
+
+class NullTracer:
+    """Tracer disattivato: nessuna registrazione e costo trascurabile"""
+
+    enabled = False
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def span(self, name, category='generazione', **args):
+        return _NULL_CONTEXT
+
+    def annotate(self, **args):
+        pass
+
+
+NULL_TRACER = NullTracer()
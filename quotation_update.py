@@ -0,0 +1,195 @@
+"""Aggiornamento incrementale di una quotazione già generata.
+
+Il file generato contiene il foglio nascosto ``QG_Metadati`` con titolo e
+hash degli input di ogni foglio. L'aggiornamento ricalcola gli hash dalla
+nuova configurazione e rigenera solo i fogli cambiati, nella stessa
+posizione; gli altri fogli (comprese le modifiche manuali e i fogli
+aggiunti dall'utente) vengono salvati così come sono.
+
+Le modifiche manuali ai fogli rigenerati vanno perse. openpyxl non
+conserva il risultato delle formule dei fogli letti, quindi il file
+aggiornato chiede a Excel di ricalcolare all'apertura.
+"""
+import json
+from datetime import date
+from zipfile import BadZipFile
+
+import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
+
+import quotation_styles as styles
+from quotation_catalog import default_catalog
+from quotation_config import normalize_config, validate_config
+from quotation_engine import (
+    DEFAULT_TRIALS, METADATA_SHEET, METADATA_FORMAT, create_dashboard_sheet, create_configuration_sheet,
+    create_baseline_sheet, create_quotation_sheet, create_charts_sheet, create_sensitivity_sheet,
+    create_metadata_sheet, sheet_input_hashes, risk_input_hash, save_workbook
+)
+from quotation_formulas import (
+    ALLOCATION_NAME, ALLOCATION_RATES_NAME, RATE_PREFIX, baseline_effort_name, baseline_cost_name
+)
+from quotation_model import compute_quote_model
+from quotation_risk import simulate_quote_risk, risk_from_dict
+from quotation_sweep import sweep_quote
+from quotation_trace import NULL_TRACER
+
+
+def read_metadata(wb):
+    """Restituisce ``{ruolo: (titolo, hash)}`` dal foglio dei metadati.
+
+    La riga ``'rischio'`` contiene invece l'hash degli input della
+    simulazione e il suo risultato in JSON (ricomposto dalle colonne in cui
+    è diviso).
+
+    Solleva ValueError se il file non è stato generato da questa versione
+    del generatore (metadati assenti o di un altro formato).
+    """
+    if METADATA_SHEET not in wb.sheetnames:
+        raise ValueError("Il file non contiene i metadati per l'aggiornamento: rigenerarlo completamente")
+
+    rows = list(wb[METADATA_SHEET].iter_rows(values_only=True))
+    if not rows or rows[0][:2] != ('formato', METADATA_FORMAT):
+        raise ValueError("Formato dei metadati non supportato: rigenerare il file completamente")
+    metadata = {}
+    for row in rows[1:]:
+        if row[0] == 'rischio':
+            metadata[row[0]] = (row[1], ''.join(part for part in row[2:] if part))
+        else:
+            metadata[row[0]] = (row[1], row[2])
+    return metadata
+
+
+def _replace_sheet(wb, old_title, position, build):
+    """Sostituisce un foglio con quello creato da ``build`` nella stessa posizione"""
+    if old_title in wb.sheetnames:
+        old = wb[old_title]
+        position = wb.index(old)
+        wb.remove(old)
+    ws = build()
+    wb.move_sheet(ws, offset=position - wb.index(ws))
+    return ws
+
+
+def _sheet_defined_names(wb, role):
+    """Nomi definiti creati dal foglio con ruolo ``role``"""
+    if role == 'configurazione':
+        return [name for name in wb.defined_names
+                if name.startswith(RATE_PREFIX + "_") or name in (ALLOCATION_NAME, ALLOCATION_RATES_NAME)]
+    if role.startswith('baseline:'):
+        index = int(role.split(':')[1])
+        return [baseline_effort_name(index), baseline_cost_name(index)]
+    return []
+
+
+def _temporary_title(wb):
+    """Titolo libero per un foglio che sta per essere sostituito"""
+    index = 1
+    while f"QG_Sostituzione_{index}" in wb.sheetnames:
+        index += 1
+    return f"QG_Sostituzione_{index}"
+
+
+def update_quotation(filename, config, architectures=None, output=None, quote_date=None,
+                     risk_trials=DEFAULT_TRIALS, tracer=NULL_TRACER, formulas=False, sweep=None):
+    """Aggiorna ``filename`` con la nuova configurazione.
+
+    Scrive in ``output`` (default: lo stesso file) e restituisce la lista
+    dei ruoli dei fogli rigenerati (``'dashboard'``, ``'baseline:0'``...);
+    se non è cambiato nulla il file non viene riscritto. ``formulas`` è la
+    modalità di ``build_workbook``: se diversa da quella del file, tutti i
+    fogli vengono rigenerati. Il foglio Sensibilità viene mantenuto solo se
+    è indicata la griglia ``sweep``.
+    """
+    architectures = architectures or default_catalog()
+    quote_date = quote_date or date.today()
+    config = normalize_config(config)
+    validate_config(config, architectures)
+    arch_data = architectures[config['selected_architecture']]
+
+    with tracer.span("Lettura workbook", category='aggiornamento'):
+        try:
+            wb = openpyxl.load_workbook(filename)
+        except (InvalidFileException, BadZipFile) as e:
+            raise ValueError(f"{filename} non è un file Excel valido: {e}") from e
+    stored = read_metadata(wb)
+    hashes = sheet_input_hashes(config, arch_data, quote_date, risk_trials, formulas, sweep)
+
+    # Rigenera anche i fogli che l'utente ha eliminato o rinominato
+    stored_risk = stored.pop('rischio', None)
+    changed = [
+        role for role, value in hashes.items()
+        if stored.get(role, (None, None))[1] != value or stored[role][0] not in wb.sheetnames
+    ]
+    removed = [role for role in stored if role not in hashes]
+    if not changed and not removed:
+        if output and output != filename:
+            save_workbook(wb, output)
+        return []
+
+    with tracer.span("Calcolo effort e simulazione rischio", category='aggiornamento'):
+        model = compute_quote_model(config, arch_data)
+        risk_hash = risk_input_hash(config, arch_data, risk_trials)
+        risk = None
+        if risk_trials and stored_risk is not None and stored_risk[0] == risk_hash:
+            # Stessi input numerici: si riusa la simulazione salvata con i nomi attuali
+            risk = risk_from_dict(json.loads(stored_risk[1]))
+            risk = risk._replace(baselines=tuple(
+                baseline_risk._replace(name=baseline.name)
+                for baseline_risk, baseline in zip(risk.baselines, model.baselines)
+            ))
+        elif risk_trials:
+            risk = simulate_quote_risk(model, trials=risk_trials)
+
+    styles.register_styles(wb)
+
+    for role in removed:
+        title = stored[role][0]
+        if title in wb.sheetnames:
+            wb.remove(wb[title])
+        for name in _sheet_defined_names(wb, role):
+            wb.defined_names.pop(name, None)
+
+    builders = {
+        'dashboard': lambda: create_dashboard_sheet(wb, config, model, risk, quote_date, formulas),
+        'configurazione': lambda: create_configuration_sheet(wb, config, arch_data, formulas),
+        'quotazione': lambda: create_quotation_sheet(wb, config, model, risk, quote_date, formulas),
+        'grafici': lambda: create_charts_sheet(wb, model, risk, formulas),
+        'sensibilita': lambda: create_sensitivity_sheet(wb, config, sweep_quote(config, arch_data, sweep, model))
+    }
+    for baseline in model.baselines:
+        builders[f'baseline:{baseline.index}'] = \
+            lambda baseline=baseline: create_baseline_sheet(wb, baseline, formulas)
+
+    # Nomi temporanei ai fogli da rigenerare: se le baseline si scambiano i nomi,
+    # il nuovo foglio non deve trovare il titolo ancora occupato dal vecchio.
+    # Anche i loro nomi definiti vengono tolti: il nuovo foglio crea quelli
+    # della configurazione e della modalità attuali
+    old_titles = {}
+    for role in changed:
+        for name in _sheet_defined_names(wb, role):
+            wb.defined_names.pop(name, None)
+        old_title = stored.get(role, (None, None))[0]
+        if old_title in wb.sheetnames:
+            wb[old_title].title = old_titles[role] = _temporary_title(wb)
+
+    # I ruoli sono nell'ordine dei fogli: un foglio nuovo va dopo il precedente
+    titles = {}
+    position = 0
+    for role in hashes:
+        old_title = old_titles.get(role, stored.get(role, (None, None))[0])
+        if role in changed:
+            with tracer.span(f"Foglio {role}", category='aggiornamento'):
+                ws = _replace_sheet(wb, old_title, position, builders[role])
+        else:
+            ws = wb[old_title]
+        titles[role] = ws.title
+        position = wb.index(ws) + 1
+
+    wb.remove(wb[METADATA_SHEET])
+    create_metadata_sheet(wb, titles, hashes, risk_hash, risk)
+    wb.active = 0
+    wb.calculation.fullCalcOnLoad = True
+
+    with tracer.span("Salvataggio file", category='aggiornamento'):
+        save_workbook(wb, output or filename, tracer)
+    return changed
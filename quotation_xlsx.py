@@ -0,0 +1,408 @@
+"""Scrittura diretta del formato xlsx (SpreadsheetML), senza il modello a oggetti di openpyxl.
+
+È il backend ``direct`` di ``quotation_engine.build_workbook``. I fogli
+offrono le operazioni usate dai costruttori dei fogli tramite gli helper
+del motore (righe accodate, celle con stile e formula, unioni, convalide,
+larghezze delle colonne e grafici) e ogni riga diventa subito XML: non
+esiste un oggetto per cella. L'XML dei fogli resta in memoria fino a
+``SPOOL_BYTES`` e poi passa in un file temporaneo, quindi la memoria non
+cresce con il numero di voci.
+
+Le parti fisse (workbook, relazioni, tipi di contenuto, proprietà) sono
+modelli di testo; ``styles.xml`` è generato una volta per processo dal
+registro di ``quotation_styles`` con lo stesso serializzatore di openpyxl,
+per cui gli stili coincidono con quelli del backend openpyxl. I grafici
+(pochi per file) sono gli stessi oggetti ``BarChart`` di openpyxl e
+vengono serializzati con il loro metodo.
+"""
+import functools
+import math
+import numbers
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import NamedTuple
+from zipfile import ZipFile, ZIP_DEFLATED
+
+import openpyxl
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles.stylesheet import write_stylesheet
+from openpyxl.utils import coordinate_to_tuple, get_column_letter
+from openpyxl.utils.exceptions import IllegalCharacterError
+from openpyxl.workbook.child import INVALID_TITLE_REGEX, avoid_duplicate_name
+from openpyxl.writer.theme import theme_xml
+from openpyxl.xml.functions import tostring
+
+import quotation_styles as styles
+from quotation_trace import NULL_TRACER
+
+# XML di un foglio tenuto in memoria prima di passare a un file temporaneo
+SPOOL_BYTES = 4 * 1024 * 1024
+# Righe convertite in XML e accumulate prima di ogni scrittura
+FLUSH_ROWS = 512
+# Valore di errore scritto al posto di NaN e infiniti, che lo SpreadsheetML non ammette
+NON_FINITE_ERROR = "#NUM!"
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPE = "application/vnd.openxmlformats-officedocument"
+
+# Centimetri -> EMU (unità delle dimensioni nei disegni)
+EMU_PER_CM = 360000
+
+APP_XML = ('<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+           '<Application>Microsoft Excel</Application></Properties>')
+
+CORE_XML = ('<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"><dc:creator>Generatore Quotazioni</dc:creator>'
+            '<dcterms:created xsi:type="dcterms:W3CDTF">{now}</dcterms:created>'
+            '<dcterms:modified xsi:type="dcterms:W3CDTF">{now}</dcterms:modified></cp:coreProperties>')
+
+ROOT_RELS_XML = (
+    f'<Relationships xmlns="{PACKAGE_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    f'<Relationship Id="rId2" Type="{PACKAGE_REL_NS}/metadata/core-properties" Target="docProps/core.xml"/>'
+    f'<Relationship Id="rId3" Type="{REL_NS}/extended-properties" Target="docProps/app.xml"/>'
+    '</Relationships>'
+)
+
+SHEET_HEADER = (f'<worksheet xmlns="{MAIN_NS}" xmlns:r="{REL_NS}"><sheetPr><outlinePr summaryBelow="1" '
+                'summaryRight="1"/></sheetPr><sheetViews><sheetView workbookViewId="0"/></sheetViews>'
+                '<sheetFormatPr baseColWidth="8" defaultRowHeight="15"/>')
+PAGE_MARGINS = '<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/>'
+
+DRAWING_HEADER = ('<xdr:wsDr xmlns:xdr="http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing" '
+                  'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+                  'xmlns:c="http://schemas.openxmlformats.org/drawingml/2006/chart" '
+                  f'xmlns:r="{REL_NS}">')
+CHART_ANCHOR = (
+    '<xdr:oneCellAnchor><xdr:from><xdr:col>{col}</xdr:col><xdr:colOff>0</xdr:colOff><xdr:row>{row}</xdr:row>'
+    '<xdr:rowOff>0</xdr:rowOff></xdr:from><xdr:ext cx="{cx}" cy="{cy}"/><xdr:graphicFrame macro="">'
+    '<xdr:nvGraphicFramePr><xdr:cNvPr id="{id}" name="Grafico {id}"/><xdr:cNvGraphicFramePr/>'
+    '</xdr:nvGraphicFramePr><xdr:xfrm><a:off x="0" y="0"/><a:ext cx="0" cy="0"/></xdr:xfrm><a:graphic>'
+    '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/chart"><c:chart r:id="rId{id}"/>'
+    '</a:graphicData></a:graphic></xdr:graphicFrame><xdr:clientData/></xdr:oneCellAnchor>'
+)
+
+# Lettere delle prime colonne, calcolate una volta
+_LETTERS = [get_column_letter(i) for i in range(1, 703)]
+
+
+def _column_letter(index):
+    """Lettera della colonna con indice ``index`` (da 0)"""
+    return _LETTERS[index] if index < len(_LETTERS) else get_column_letter(index + 1)
+
+
+def _finite(value):
+    """Vero se ``value`` si può scrivere come numero nel foglio"""
+    return isinstance(value, numbers.Integral) or math.isfinite(value)
+
+
+def _escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _attribute(text):
+    return _escape(str(text)).replace('"', '&quot;')
+
+
+@functools.lru_cache(maxsize=1)
+def compiled_styles():
+    """``styles.xml`` del registro degli stili e indice di ogni stile nominato.
+
+    Generato una volta per processo registrando gli stili in un workbook
+    openpyxl vuoto: gli indici sono quelli che openpyxl assegnerebbe.
+    """
+    wb = openpyxl.Workbook()
+    styles.register_styles(wb)
+    cell = wb.active.cell(1, 1)
+    ids = {}
+    for name in styles.STYLE_DEFINITIONS:
+        cell.style = name
+        ids[name] = cell.style_id
+    return tostring(write_stylesheet(wb)), ids
+
+
+class XlsxCell(NamedTuple):
+    """Cella da accodare con ``XlsxSheet.append``: valore, stile nominato ed eventuale formula"""
+    value: object
+    style: str = None
+    formula: str = None  # con "=" iniziale; ``value`` è il risultato già calcolato
+
+
+class XlsxSheet:
+    """Foglio scritto in streaming: le righe si possono solo accodare"""
+
+    def __init__(self, workbook, title):
+        self.parent = workbook
+        self.title = title
+        self.sheet_state = 'visible'
+        self.widths = []
+        self.merged_cells = []
+        self.validations = []
+        self._charts = []  # (grafico, cella di ancoraggio)
+        self.cells = 0
+        self.row_count = 0
+        self._rows = []
+        self._data = tempfile.SpooledTemporaryFile(SPOOL_BYTES)
+
+    def set_column_widths(self, widths):
+        """Larghezze delle colonne a partire dalla A"""
+        self.widths = list(widths)
+
+    def merge_cells(self, range_string):
+        self.merged_cells.append(range_string)
+
+    def add_validation(self, cell_range, validation_type, error, **kwargs):
+        """Convalida dei dati con gli stessi argomenti di ``quotation_formulas.add_validation``"""
+        self.validations.append((cell_range, validation_type, error, kwargs))
+
+    def add_chart(self, chart, anchor):
+        self._charts.append((chart, anchor))
+
+    def append(self, values):
+        """Accoda una riga di valori o ``XlsxCell``"""
+        self.row_count += 1
+        row = self.row_count
+        parts = []
+        for column, value in enumerate(values):
+            if type(value) is XlsxCell:
+                value, style, formula = value
+            else:
+                style = formula = None
+            ref = f'{_column_letter(column)}{row}'
+            s = f' s="{self.parent.style_ids[style]}"' if style else ''
+
+            if formula is not None:
+                if value is None:
+                    parts.append(f'<c r="{ref}"{s}><f>{_escape(formula[1:])}</f></c>')
+                elif isinstance(value, str):
+                    parts.append(f'<c r="{ref}"{s} t="str"><f>{_escape(formula[1:])}</f>'
+                                 f'<v>{_escape(value)}</v></c>')
+                elif not _finite(value):
+                    parts.append(f'<c r="{ref}"{s} t="e"><f>{_escape(formula[1:])}</f>'
+                                 f'<v>{NON_FINITE_ERROR}</v></c>')
+                else:
+                    parts.append(f'<c r="{ref}"{s}><f>{_escape(formula[1:])}</f><v>{self._number(value)}</v></c>')
+            elif value is None:
+                if not s:
+                    continue
+                parts.append(f'<c r="{ref}"{s}/>')
+            elif type(value) is str:
+                parts.append(f'<c r="{ref}"{s} t="s"><v>{self.parent.shared_string(value)}</v></c>')
+            elif type(value) is bool:
+                parts.append(f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, numbers.Number) and not _finite(value):
+                parts.append(f'<c r="{ref}"{s} t="e"><v>{NON_FINITE_ERROR}</v></c>')
+            elif isinstance(value, numbers.Number):
+                parts.append(f'<c r="{ref}"{s}><v>{self._number(value)}</v></c>')
+            else:
+                parts.append(f'<c r="{ref}"{s} t="s"><v>{self.parent.shared_string(str(value))}</v></c>')
+            self.cells += 1
+
+        if parts:
+            self._rows.append(f'<row r="{row}">{"".join(parts)}</row>')
+            if len(self._rows) >= FLUSH_ROWS:
+                self._flush()
+
+    @staticmethod
+    def _number(value):
+        # Stessa precisione di openpyxl (16 cifre significative)
+        if type(value) is int:
+            return str(value)
+        if isinstance(value, numbers.Integral):
+            return str(int(value))
+        return "%.16g" % value
+
+    def _flush(self):
+        self._data.write("".join(self._rows).encode('utf-8'))
+        self._rows = []
+
+    def _validation_xml(self, cell_range, validation_type, error, options):
+        attributes = {'type': validation_type, 'allowBlank': '0', 'showErrorMessage': '1',
+                      'errorTitle': "Valore non valido", 'error': error, 'sqref': cell_range}
+        if 'operator' in options:
+            attributes['operator'] = options['operator']
+        formulas = "".join(f"<{key}>{_escape(str(options[key]))}</{key}>"
+                           for key in ('formula1', 'formula2') if key in options)
+        text = " ".join(f'{key}="{_attribute(value)}"' for key, value in attributes.items())
+        return f"<dataValidation {text}>{formulas}</dataValidation>"
+
+    def write(self, archive, path):
+        """Scrive il foglio nell'archivio; con grafici il disegno ha relazione ``rId1``"""
+        self._flush()
+        header = [SHEET_HEADER]
+        if self.widths:
+            header.append('<cols>')
+            header.extend(f'<col min="{i}" max="{i}" width="{width}" customWidth="1"/>'
+                          for i, width in enumerate(self.widths, 1))
+            header.append('</cols>')
+        header.append('<sheetData>')
+
+        footer = ['</sheetData>']
+        if self.merged_cells:
+            footer.append(f'<mergeCells count="{len(self.merged_cells)}">')
+            footer.extend(f'<mergeCell ref="{ref}"/>' for ref in self.merged_cells)
+            footer.append('</mergeCells>')
+        if self.validations:
+            footer.append(f'<dataValidations count="{len(self.validations)}">')
+            footer.extend(self._validation_xml(*validation) for validation in self.validations)
+            footer.append('</dataValidations>')
+        footer.append(PAGE_MARGINS)
+        if self._charts:
+            footer.append('<drawing r:id="rId1"/>')
+        footer.append('</worksheet>')
+
+        with archive.open(path, 'w', force_zip64=True) as f:
+            f.write("".join(header).encode('utf-8'))
+            self._data.seek(0)
+            shutil.copyfileobj(self._data, f)
+            f.write("".join(footer).encode('utf-8'))
+        self._data.close()
+
+
+class XlsxWorkbook:
+    """Workbook scritto direttamente in SpreadsheetML.
+
+    ``calc_id`` è il ``calcId`` dichiarato nel workbook: con quello di
+    Excel 2016 e successivi le formule con risultato non vengono
+    ricalcolate all'apertura.
+    """
+
+    def __init__(self, calc_id=None):
+        self.calc_id = calc_id
+        self.sheets = []
+        self.defined_names = {}
+        self.strings = {}
+        self.style_ids = compiled_styles()[1]
+
+    @property
+    def sheetnames(self):
+        return [ws.title for ws in self.sheets]
+
+    def create_sheet(self, title, index=None):
+        """Nuovo foglio; titoli non validi o duplicati come in openpyxl"""
+        match = INVALID_TITLE_REGEX.search(title)
+        if match:
+            raise ValueError(f"Invalid character {match.group(0)} found in sheet title")
+        ws = XlsxSheet(self, avoid_duplicate_name(self.sheetnames, title))
+        if index is None:
+            self.sheets.append(ws)
+        else:
+            self.sheets.insert(index, ws)
+        return ws
+
+    def shared_string(self, text):
+        """Indice di ``text`` nella tabella delle stringhe condivise"""
+        index = self.strings.get(text)
+        if index is None:
+            if ILLEGAL_CHARACTERS_RE.search(text):
+                raise IllegalCharacterError(f"{text} cannot be used in worksheets.")
+            index = self.strings[text] = len(self.strings)
+        return index
+
+    def _shared_strings_xml(self):
+        parts = [f'<sst xmlns="{MAIN_NS}" count="{len(self.strings)}" uniqueCount="{len(self.strings)}">']
+        for text in self.strings:
+            space = ' xml:space="preserve"' if text[:1].isspace() or text[-1:].isspace() else ''
+            parts.append(f'<si><t{space}>{_escape(text)}</t></si>')
+        parts.append('</sst>')
+        return "".join(parts).encode('utf-8')
+
+    def _workbook_xml(self):
+        parts = [f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}"><workbookPr/><bookViews>'
+                 '<workbookView activeTab="0"/></bookViews><sheets>']
+        parts.extend(f'<sheet name="{_attribute(ws.title)}" sheetId="{i}" state="{ws.sheet_state}" r:id="rId{i}"/>'
+                      for i, ws in enumerate(self.sheets, 1))
+        parts.append('</sheets>')
+        if self.defined_names:
+            parts.append('<definedNames>')
+            parts.extend(f'<definedName name="{_attribute(name)}">{_escape(reference)}</definedName>'
+                         for name, reference in self.defined_names.items())
+            parts.append('</definedNames>')
+        if self.calc_id is not None:
+            parts.append(f'<calcPr calcId="{self.calc_id}" fullCalcOnLoad="0"/>')
+        parts.append('</workbook>')
+        return "".join(parts).encode('utf-8')
+
+    def _workbook_rels_xml(self):
+        count = len(self.sheets)
+        parts = [f'<Relationships xmlns="{PACKAGE_REL_NS}">']
+        parts.extend(f'<Relationship Id="rId{i}" Type="{REL_NS}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                     for i in range(1, count + 1))
+        parts.append(f'<Relationship Id="rId{count + 1}" Type="{REL_NS}/styles" Target="styles.xml"/>'
+                     f'<Relationship Id="rId{count + 2}" Type="{REL_NS}/theme" Target="theme/theme1.xml"/>'
+                     f'<Relationship Id="rId{count + 3}" Type="{REL_NS}/sharedStrings" '
+                     'Target="sharedStrings.xml"/></Relationships>')
+        return "".join(parts)
+
+    @staticmethod
+    def _content_types_xml(sheets, drawings, charts):
+        overrides = [
+            ('/xl/workbook.xml', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml'),
+            ('/xl/styles.xml', f'{CONTENT_TYPE}.spreadsheetml.styles+xml'),
+            ('/xl/theme/theme1.xml', f'{CONTENT_TYPE}.theme+xml'),
+            ('/xl/sharedStrings.xml', f'{CONTENT_TYPE}.spreadsheetml.sharedStrings+xml'),
+            ('/docProps/core.xml', 'application/vnd.openxmlformats-package.core-properties+xml'),
+            ('/docProps/app.xml', f'{CONTENT_TYPE}.extended-properties+xml'),
+        ]
+        overrides.extend((f'/xl/worksheets/sheet{i}.xml', f'{CONTENT_TYPE}.spreadsheetml.worksheet+xml')
+                         for i in range(1, sheets + 1))
+        overrides.extend((f'/xl/drawings/drawing{i}.xml', f'{CONTENT_TYPE}.drawing+xml')
+                         for i in range(1, drawings + 1))
+        overrides.extend((f'/xl/charts/chart{i}.xml', f'{CONTENT_TYPE}.drawingml.chart+xml')
+                         for i in range(1, charts + 1))
+        parts = ['<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                 '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                 '<Default Extension="xml" ContentType="application/xml"/>']
+        parts.extend(f'<Override PartName="{name}" ContentType="{content_type}"/>'
+                     for name, content_type in overrides)
+        parts.append('</Types>')
+        return "".join(parts)
+
+    @staticmethod
+    def _write_drawing(archive, drawing, charts, first_chart):
+        """Disegno con i grafici di un foglio, numerati da ``first_chart``"""
+        anchors, rels = [], []
+        for offset, (chart, anchor) in enumerate(charts):
+            row, col = coordinate_to_tuple(anchor)
+            anchors.append(CHART_ANCHOR.format(col=col - 1, row=row - 1, id=offset + 1,
+                                               cx=int(chart.width * EMU_PER_CM), cy=int(chart.height * EMU_PER_CM)))
+            rels.append(f'<Relationship Id="rId{offset + 1}" Type="{REL_NS}/chart" '
+                        f'Target="../charts/chart{first_chart + offset}.xml"/>')
+            archive.writestr(f'xl/charts/chart{first_chart + offset}.xml', tostring(chart._write()))
+        archive.writestr(f'xl/drawings/drawing{drawing}.xml', DRAWING_HEADER + "".join(anchors) + '</xdr:wsDr>')
+        archive.writestr(f'xl/drawings/_rels/drawing{drawing}.xml.rels',
+                         f'<Relationships xmlns="{PACKAGE_REL_NS}">{"".join(rels)}</Relationships>')
+
+    def save(self, filename, tracer=NULL_TRACER):
+        """Scrive il file xlsx (percorso o file binario aperto)"""
+        stylesheet, _ = compiled_styles()
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        drawings = charts = 0
+        with ZipFile(filename, 'w', ZIP_DEFLATED, allowZip64=True) as archive:
+            for index, ws in enumerate(self.sheets, 1):
+                with tracer.span(f"Scrittura {ws.title}", category='salvataggio'):
+                    if ws._charts:
+                        drawings += 1
+                        with tracer.span("Scrittura grafici", category='salvataggio', grafici=len(ws._charts)):
+                            self._write_drawing(archive, drawings, ws._charts, charts + 1)
+                        charts += len(ws._charts)
+                        archive.writestr(
+                            f'xl/worksheets/_rels/sheet{index}.xml.rels',
+                            f'<Relationships xmlns="{PACKAGE_REL_NS}"><Relationship Id="rId1" '
+                            f'Type="{REL_NS}/drawing" Target="../drawings/drawing{drawings}.xml"/></Relationships>'
+                        )
+                    ws.write(archive, f'xl/worksheets/sheet{index}.xml')
+
+            archive.writestr('xl/sharedStrings.xml', self._shared_strings_xml())
+            archive.writestr('xl/styles.xml', stylesheet)
+            archive.writestr('xl/theme/theme1.xml', theme_xml)
+            archive.writestr('xl/workbook.xml', self._workbook_xml())
+            archive.writestr('xl/_rels/workbook.xml.rels', self._workbook_rels_xml())
+            archive.writestr('docProps/app.xml', APP_XML)
+            archive.writestr('docProps/core.xml', CORE_XML.format(now=now))
+            archive.writestr('_rels/.rels', ROOT_RELS_XML)
+            archive.writestr('[Content_Types].xml', self._content_types_xml(len(self.sheets), drawings, charts))
@@ -14,7 +14,7 @@ build_exe_options = {
     ],
     "excludes": [
         "matplotlib", 
-        "numpy", 
+        "numpy",  # quotation_effort usa il fallback in puro Python
         "pandas",
         "scipy",
         "PIL"